@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import json
+import math
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _time_case(fn: Callable[[], int], min_time: float, repeat: int) -> Tuple[float, int]:
+    """Best items/s of ``fn`` (which returns how many items it processed) over ``repeat`` windows.
+
+    Taking the best window rather than the mean keeps scheduler noise out of
+    the comparison with the baseline.
+    """
+
+    fn()  # warm-up: imports, caches, first-call costs
+    best = 0.0
+    total_rounds = 0
+    for _ in range(repeat):
+        items = 0
+        rounds = 0
+        start = time.perf_counter()
+        while rounds < 1 or time.perf_counter() - start < min_time / repeat:
+            items += fn()
+            rounds += 1
+        best = max(best, items / (time.perf_counter() - start))
+        total_rounds += rounds
+    return best, total_rounds
+
+
+def _peak_kib(fn: Callable[[], int]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def _tiki_payload(project_root: Path) -> str:
+    # Turn the recorded Tiki CSVs back into an API-shaped JSON payload.
+    import pandas as pd
+
+    items = []
+    for path in sorted((project_root / "data" / "raw").glob("tiki_*.csv")):
+        df = pd.read_csv(path)
+        for record in df.to_dict("records"):
+            row = {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in record.items()}
+            url = row.get("product_url") or ""
+            items.append(
+                {
+                    **{k: row.get(k) for k in ("id", "sku", "name", "brand_name", "price", "original_price",
+                                               "discount", "discount_rate", "rating_average", "review_count",
+                                               "thumbnail_url", "seller_product_id")},
+                    "url_path": url.replace("https://tiki.vn/", "") or None,
+                    "quantity_sold": {"value": row.get("quantity_sold"), "text": row.get("quantity_sold_text")},
+                    "impression_info": [{"metadata": {"is_official_store": row.get("is_official_store")}}],
+                    "seller": {"id": row.get("seller_id"), "name": row.get("seller_name")},
+                    "badges": [{"code": "freeship"}] if row.get("is_freeship") else [],
+                    "categories": [{"id": row.get("category_id"), "name": row.get("category_name")}],
+                    "stock_item": {"qty": row.get("stock_qty")},
+                }
+            )
+    return json.dumps({"data": items}, default=str)
+
+
+def _shopee_items(n: int, seed: int = 0) -> List[Dict[str, object]]:
+    rng = random.Random(seed)
+    names = ["Chất liệu", "Xuất xứ", "Kiểu dáng", "Màu sắc", "Size", "Thương hiệu", "Mùa", "Phong cách"]
+    return [
+        {
+            "name": f"Áo dài nữ {i}",
+            "description": "Áo dài truyền thống, vải lụa mềm. " * 8,
+            "price": rng.randint(10, 500) * 1000 * 100000,
+            "price_before_discount": rng.randint(500, 900) * 1000 * 100000,
+            "discount": f"-{rng.randint(1, 60)}%",
+            "historical_sold": rng.randint(0, 5000),
+            "item_rating": {"rating_star": round(rng.uniform(3, 5), 2)},
+            "stock": rng.randint(0, 200),
+            "catid": 100017,
+            "shop_location": rng.choice(["TP. Hồ Chí Minh", "Hà Nội", "Đà Nẵng"]),
+            "attributes": [{"name": name, "value": f"{name} {rng.randint(1, 9)}"} for name in rng.sample(names, 5)],
+        }
+        for i in range(n)
+    ]
+
+
+def _start_stub_server(body: bytes):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_cases(project_root: Path) -> Dict[str, Callable[[], int]]:
+    import src.scrapers.batdongsan_detail as detail
+    import src.scrapers.batdongsan_scraper as bds
+    import src.scrapers.shopee_scraper as shopee
+    import src.scrapers.tiki_scraper as tiki
+    from src.utils.columnar import ColumnarRows
+    from src.utils.vn_location import LocationResolver
+
+    html = (project_root / "data" / "processed" / "debug_html" / "detail_first_url.html").read_text(encoding="utf-8")
+    prices = ["4,5 tỷ", "850 triệu", "Thỏa thuận", "12 tỷ 500 triệu", "35 triệu/tháng", "1,2 tỷ", "900 nghìn/m²"] * 200
+    addresses = [
+        "Đường Lê Tự Tài, Phường 4, Quận Phú Nhuận, Hồ Chí Minh",
+        "Dự án Vinhomes Grand Park, Đường Nguyễn Xiển, Phường Long Thạnh Mỹ, Thành phố Thủ Đức, Hồ Chí Minh",
+        "Phú Nhuận, Hồ Chí Minh",
+        "Nguyễn Văn Linh, Tân Phong, Quận 7",
+        "Xã Tân Nhựt, Bình Chánh, Hồ Chí Minh",
+    ] * 200
+    unique_addresses = [f"Hẻm {i} Lê Văn Sỹ, Phường {i % 15 + 1}, Quận {i % 12 + 1}, Hồ Chí Minh" for i in range(1000)]
+    tiki_payload = _tiki_payload(project_root)
+    shopee_items = _shopee_items(500)
+
+    def cards() -> int:
+        return len(bds._parse_cards_from_html(html, "https://batdongsan.com.vn/nha-dat-ban-tp-hcm"))
+
+    def detail_page() -> int:
+        detail.parse_detail_html(html, "https://batdongsan.com.vn/x")
+        return 1
+
+    def price() -> int:
+        for text in prices:
+            bds.parse_price(text)
+        return len(prices)
+
+    def location_repeated() -> int:
+        resolver = LocationResolver()
+        for text in addresses:
+            resolver.resolve(text)
+        return len(addresses)
+
+    def location_unique() -> int:
+        resolver = LocationResolver()
+        for text in unique_addresses:
+            resolver.resolve(text)
+        return len(unique_addresses)
+
+    def tiki_rows() -> int:
+        items = json.loads(tiki_payload)["data"]
+        return len([tiki._build_row(item) for item in items])
+
+    def shopee_rows() -> int:
+        return len([shopee._build_detail_row(i, 1, item) for i, item in enumerate(shopee_items)])
+
+    def tiki_frame() -> int:
+        rows = ColumnarRows()
+        for item in json.loads(tiki_payload)["data"]:
+            rows.append(tiki._build_row(item))
+        return len(rows.to_pandas())
+
+    def shopee_frame() -> int:
+        rows = ColumnarRows()
+        for i, item in enumerate(shopee_items):
+            rows.append(shopee._build_detail_row(i, 1, item))
+        return len(rows.to_pandas())
+
+    return {
+        "parse_cards": cards,
+        "parse_detail": detail_page,
+        "parse_price": price,
+        "parse_location_repeated": location_repeated,
+        "parse_location_unique": location_unique,
+        "tiki_build_row": tiki_rows,
+        "shopee_build_row": shopee_rows,
+        "tiki_frame": tiki_frame,
+        "shopee_frame": shopee_frame,
+    }
+
+
+def fetch_case() -> Tuple[Callable[[], int], Callable[[], None]]:
+    import src.scrapers.shopee_scraper as shopee
+
+    body = json.dumps({"item": _shopee_items(1)[0]}).encode("utf-8")
+    server = _start_stub_server(body)
+    url = f"http://127.0.0.1:{server.server_port}/api/v4/item/get"
+    pairs = [(i, 1) for i in range(200)]
+
+    def fetch() -> int:
+        details = shopee.iter_shopee_details(pairs, {}, concurrency=8, requests_per_second=1e6, detail_url=url)
+        return sum(1 for _ in details)
+
+    return fetch, server.shutdown
+
+
+def _compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_s']:.1f} ops/s vs baseline {base['ops_per_s']:.1f}")
+        if result["peak_kib"] > base["peak_kib"] * (1 + tolerance) + 64:
+            regressions.append(f"{name}: peak {result['peak_kib']:.0f} KiB vs baseline {base['peak_kib']:.0f}")
+    return regressions
+
+
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(project_root))
+
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the parsing and fetching hot paths.")
+    parser.add_argument("-k", dest="only", default=None, help="run only cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=2.0, help="seconds per case")
+    parser.add_argument("--repeat", type=int, default=5, help="timing windows per case; the best one counts")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / memory growth")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--no-fetch", action="store_true", help="skip the local stub-server fetch case")
+    args = parser.parse_args()
+
+    cases = build_cases(project_root)
+    stop_server = None
+    if not args.no_fetch:
+        cases["shopee_fetch_stub"], stop_server = fetch_case()
+    if args.only:
+        cases = {name: fn for name, fn in cases.items() if args.only in name}
+
+    results: Dict[str, dict] = {}
+    print(f"{'case':26s} {'ops/s':>12s} {'rounds':>7s} {'peak KiB':>10s}")
+    try:
+        for name, fn in cases.items():
+            ops_per_s, rounds = _time_case(fn, args.min_time, args.repeat)
+            peak = _peak_kib(fn)
+            results[name] = {"ops_per_s": round(ops_per_s, 2), "peak_kib": round(peak, 1)}
+            print(f"{name:26s} {ops_per_s:12.1f} {rounds:7d} {peak:10.0f}")
+    finally:
+        if stop_server:
+            stop_server()
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nBaseline saved: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("\nNo baseline yet; run with --save-baseline to record one.")
+        return 0
+    regressions = _compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline.name} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+import re
+import sys
+import time
+
+
+def _legacy_has_verified_badge(norm_key, html: str, full_text_norm: str) -> int:
+    # Previous implementation: normalise the whole raw HTML on every page.
+    html_norm = norm_key(html or "")
+    pat = r"batdongsan\.com\.vn.{0,80}da xac thuc"
+    if re.search(pat, full_text_norm):
+        return 1
+    if re.search(pat, html_norm):
+        return 1
+    if ("batdongsan com vn" in html_norm or "batdongsan com vn" in full_text_norm) and (
+        "da xac thuc" in html_norm or "da xac thuc" in full_text_norm
+    ):
+        return 1
+    return 0
+
+
+def _time_per_call(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(project_root))
+
+    import src.scrapers.batdongsan_detail as detail
+    from src.scrapers.html_backend import make_soup
+
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else (
+        project_root / "data" / "processed" / "debug_html" / "detail_first_url.html"
+    )
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    html = path.read_text(encoding="utf-8")
+
+    # Same page without the badge: the slow path of the old code ran on every unverified listing.
+    cases = {
+        "verified": html,
+        "unverified": html.replace("xác thực", "xác nhận"),
+    }
+
+    print(f"{path.name}: {len(html)} chars, {repeat} runs per case\n")
+    print(f"{'case':18s} {'before (ms)':>12s} {'after (ms)':>11s} {'speedup':>8s}  answer")
+    mismatches = 0
+    for name, page in cases.items():
+        soup = make_soup(page)
+        full_text_norm = detail._norm_key(" ".join(soup.stripped_strings))
+
+        before_answer = _legacy_has_verified_badge(detail._norm_key, page, full_text_norm)
+        after_answer = detail._has_verified_badge(page, full_text_norm, soup)
+        # Without the soup the detector has to go through the raw-HTML window search.
+        html_only_answer = detail._has_verified_badge(page, "")
+        same = before_answer == after_answer == _legacy_has_verified_badge(detail._norm_key, page, "") == html_only_answer
+        mismatches += not same
+
+        before_ms = _time_per_call(lambda: _legacy_has_verified_badge(detail._norm_key, page, full_text_norm), repeat)
+        after_ms = _time_per_call(lambda: detail._has_verified_badge(page, full_text_norm, soup), repeat)
+        print(
+            f"{name:18s} {before_ms:12.2f} {after_ms:11.2f} {before_ms / max(after_ms, 1e-9):7.1f}x"
+            f"  {before_answer} -> {after_answer}{'' if same else '  MISMATCH'}"
+        )
+
+        before_ms = _time_per_call(lambda: _legacy_has_verified_badge(detail._norm_key, page, ""), repeat)
+        after_ms = _time_per_call(lambda: detail._has_verified_badge(page, ""), repeat)
+        print(f"{name + ' (html)':18s} {before_ms:12.2f} {after_ms:11.2f} {before_ms / max(after_ms, 1e-9):7.1f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from pathlib import Path
+import random
+import sys
+import time
+
+
+# Pieces the random inputs are built from: real price/area/count wording plus awkward characters.
+FRAGMENTS = [
+    "1", "2", "12", "4,5", "3.25", "0", "999", "07", "٣", "²",
+    "tỷ", "ty", "Tỷ", "triệu", "trieu", "TRIỆU", "nghìn", "ngàn", "nghin", "m²", "m2", "phòng", "PN", "tầng",
+    "Thỏa thuận", "thoả thuận", "Thương lượng", "đ", "Đ", "/tháng", "~", "-", ",", ".", "(", ")",
+    " ", "  ", "\xa0", "\t", "\n", " ", "", "ﬁ", "İ", "Ấp", "Quận", "é",
+]
+
+
+def _random_text(rng: random.Random) -> str | None:
+    if rng.random() < 0.05:
+        return None
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 8)))
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value) or type(value).__name__ == "NAType"
+
+
+def _same(a, b) -> bool:
+    if _missing(a) or _missing(b):
+        return _missing(a) and _missing(b)
+    return a == b
+
+
+def _scalar_or_missing(fn, value):
+    # The scalar parsers take strings; a missing value is passed as None.
+    return fn(None if value is None else value)
+
+
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(project_root))
+
+    import pandas as pd
+
+    import src.scrapers.batdongsan_detail as detail
+    import src.scrapers.batdongsan_scraper as scraper
+    import src.utils.normalize as normalize
+
+    pairs = {
+        "normalize_text": (scraper._normalize_text, normalize.normalize_text),
+        "norm_key": (detail._norm_key, normalize.norm_key),
+        "parse_price": (scraper.parse_price, normalize.parse_price),
+        "parse_area": (scraper.parse_area, normalize.parse_area),
+        "parse_integer": (scraper.parse_integer, normalize.parse_integer),
+        "to_float_number": (detail._to_float_number, normalize.to_float_number),
+        "to_int": (detail._to_int, normalize.to_int),
+        "parse_price_to_billion": (detail._parse_price_to_billion, normalize.parse_price_to_billion),
+    }
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    values = [_random_text(rng) for _ in range(n)]
+    series = pd.Series(values, index=[f"r{i % 97}" for i in range(n)], dtype=object)  # non-unique index on purpose
+
+    failures = 0
+    print(f"{n} random inputs\n")
+    print(f"{'function':24s} {'scalar (ms)':>12s} {'series (ms)':>12s}  result")
+    for name, (scalar_fn, series_fn) in pairs.items():
+        start = time.perf_counter()
+        expected = [_scalar_or_missing(scalar_fn, value) for value in values]
+        scalar_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        actual = series_fn(series)
+        series_ms = (time.perf_counter() - start) * 1000
+
+        mismatches = [
+            (value, exp, act)
+            for value, exp, act in zip(values, expected, actual.tolist())
+            if not _same(exp, act)
+        ]
+        index_ok = actual.index.equals(series.index)
+        failures += bool(mismatches) or not index_ok
+        status = "OK" if not mismatches and index_ok else f"{len(mismatches)} MISMATCHES"
+        print(f"{name:24s} {scalar_ms:12.1f} {series_ms:12.1f}  {status}")
+        for value, exp, act in mismatches[:5]:
+            print(f"    {value!r}: scalar={exp!r} series={act!r}")
+
+    # Scraped columns repeat a small set of strings; this is where the column versions pay off.
+    rows = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+    pool = values[:2000]
+    repeated = [rng.choice(pool) for _ in range(rows)]
+    repeated_series = pd.Series(repeated, dtype=object)
+    print(f"\n{rows} rows drawn from {len(pool)} distinct values\n")
+    print(f"{'function':24s} {'scalar (ms)':>12s} {'series (ms)':>12s} {'speedup':>8s}")
+    for name, (scalar_fn, series_fn) in pairs.items():
+        start = time.perf_counter()
+        for value in repeated:
+            _scalar_or_missing(scalar_fn, value)
+        scalar_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        series_fn(repeated_series)
+        series_ms = (time.perf_counter() - start) * 1000
+        print(f"{name:24s} {scalar_ms:12.1f} {series_ms:12.1f} {scalar_ms / max(series_ms, 1e-9):7.1f}x")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import time
+
+
+# Text probes that the card and detail parsers read from a page.
+PROBE_SELECTORS = [
+    "div.re__card-info",
+    ".re__pr-specs-content-item",
+    ".re__pr-short-info-item",
+    ".re__pr-short-description.js__pr-address",
+    ".re__pr-listing-verified-section",
+    ".cta-number",
+]
+
+# Addresses -> (street, ward, district, city) from the detail parser; the
+# districts of provinces outside the gazetteer rely on the positional fallback.
+ADDRESS_CASES = [
+    ("Đường Lê Tự Tài, Phường 4, Quận Phú Nhuận, Hồ Chí Minh",
+     ("Đường Lê Tự Tài", "Phường 4", "Quận Phú Nhuận", "Hồ Chí Minh")),
+    ("Phú Nhuận, Hồ Chí Minh", (None, None, "Phú Nhuận", "Hồ Chí Minh")),
+    ("Nha Trang, Khánh Hòa", (None, None, "Nha Trang", "Khánh Hòa")),
+    ("Đường Hùng Vương, Phường 1, Thành phố Tân An, Long An",
+     ("Đường Hùng Vương", "Phường 1", "Thành phố Tân An", "Long An")),
+    ("Đường Trần Phú, Phường Lộc Thọ, Nha Trang, Khánh Hòa",
+     ("Đường Trần Phú", "Phường Lộc Thọ", "Nha Trang", "Khánh Hòa")),
+    ("Tây Ninh, Tây Ninh", (None, None, "Tây Ninh", "Tây Ninh")),
+    ("Vũng Tàu, Bà Rịa Vũng Tàu", (None, None, "Vũng Tàu", "Bà Rịa - Vũng Tàu")),
+    # The city is the canonical name whether it is written out or inferred from the district.
+    ("Đường Nguyễn Thị Thập, Quận 7, TP. HCM", ("Đường Nguyễn Thị Thập", None, "Quận 7", "Hồ Chí Minh")),
+    ("Phường 4, Quận Phú Nhuận, Tp Hồ Chí Minh", (None, "Phường 4", "Quận Phú Nhuận", "Hồ Chí Minh")),
+    ("Đường Nguyễn Thị Thập, Quận 7", ("Đường Nguyễn Thị Thập", None, "Quận 7", "Hồ Chí Minh")),
+]
+
+
+def _available_backends(html_backend) -> list[str]:
+    backends = []
+    for backend in html_backend.HTML_BACKENDS:
+        try:
+            html_backend.make_soup("<p></p>", backend=backend)
+        except Exception:
+            continue
+        backends.append(backend)
+    return backends
+
+
+def _snapshot(html_backend, html: str, backend: str) -> dict:
+    soup = html_backend.make_soup(html, backend=backend)
+    probes = []
+    for selector in PROBE_SELECTORS:
+        for node in soup.select(selector):
+            probes.append(
+                (selector, node.get_text(" ", strip=True), node.get_text(strip=True), list(node.stripped_strings))
+            )
+    return {
+        "title": soup.title.get_text(strip=True) if soup.title else "",
+        "full_text": " ".join(soup.stripped_strings),
+        "probes": probes,
+    }
+
+
+def _same_value(a, b) -> bool:
+    # NaT/NaN never compare equal to themselves.
+    if a is b or a == b:
+        return True
+    try:
+        return bool(a != a and b != b)
+    except (TypeError, ValueError):
+        return False
+
+
+def _row_diff(expected: dict, actual: dict) -> list[str]:
+    keys = list(dict.fromkeys(list(expected) + list(actual)))
+    return [k for k in keys if not _same_value(expected.get(k), actual.get(k))]
+
+
+def _check_addresses(parse_address) -> int:
+    failures = 0
+    print("\nAddresses")
+    for address, expected in ADDRESS_CASES:
+        actual = parse_address(address)
+        same = tuple(actual) == expected
+        failures += not same
+        print(f"  {'OK' if same else 'MISMATCH':8s} {address}")
+        if not same:
+            print("    expected", expected, "got", tuple(actual))
+    return failures
+
+
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(project_root))
+
+    import pandas as pd
+
+    import src.scrapers.batdongsan_scraper as bds
+    from src.scrapers.batdongsan_detail import DetailParser, _parse_address_parts
+    import src.scrapers.html_backend as html_backend
+
+    paths = [Path(arg) for arg in sys.argv[1:]] or [
+        project_root / "data" / "processed" / "debug_html" / "detail_first_url.html"
+    ]
+    backends = _available_backends(html_backend)
+    print("Backends:", ", ".join(backends))
+
+    reference = "html.parser"
+    crawled_at = pd.Timestamp("2026-01-01")
+    failures = 0
+    for path in paths:
+        html = path.read_text(encoding="utf-8")
+        print(f"\n{path.name} ({len(html)} chars)")
+
+        expected_cards = bds._parse_cards_from_html(html, str(path), backend=reference)
+        expected_snapshot = _snapshot(html_backend, html, reference)
+        expected_detail = DetailParser(reference).parse(html, str(path), crawled_at=crawled_at)
+
+        for backend in backends:
+            start = time.perf_counter()
+            cards = bds._parse_cards_from_html(html, str(path), backend=backend)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            detail = DetailParser(backend).parse(html, str(path), crawled_at=crawled_at)
+            detail_ms = (time.perf_counter() - start) * 1000
+            snapshot = _snapshot(html_backend, html, backend)
+
+            detail_diff = _row_diff(expected_detail, detail)
+            same = cards == expected_cards and snapshot == expected_snapshot and not detail_diff
+            failures += not same
+            status = "OK" if same else "MISMATCH"
+            print(
+                f"  {backend:12s} {status:8s} cards={len(cards)} "
+                f"parse_cards={elapsed_ms:.1f} ms parse_detail={detail_ms:.1f} ms"
+            )
+            if detail_diff:
+                print("    detail row differs in:", ", ".join(detail_diff))
+            if snapshot["full_text"] != expected_snapshot["full_text"]:
+                print("    full_text differs")
+            if snapshot["probes"] != expected_snapshot["probes"]:
+                print("    probe text differs")
+
+    failures += _check_addresses(_parse_address_parts)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -41,6 +41,7 @@ def main() -> int:
     print("URL:", url)
 
     import src.scrapers.batdongsan_scraper as bds
+    import src.scrapers.batdongsan_detail as bds_detail
 
     bds._ensure_windows_proactor_policy()
 
@@ -94,9 +95,11 @@ def main() -> int:
     out_html.write_text(html, encoding="utf-8")
 
     phrase_raw = "Batdongsan.com.vn đã xác thực"
-    pat = r"batdongsan\.com\.vn.{0,120}da xac thuc"
+    # Same pattern (and gap) as the detector, so this check cannot drift from it.
+    verified_re = bds_detail._VERIFIED_RE
 
-    html_norm = _norm(html)
+    # Only body text is normalised; the raw HTML goes through the windowed detector.
+    html_window = bds_detail._verified_html_window(html.lower())
     text_norm = _norm(body_text)
 
     print("\nTitle:", title[:200])
@@ -105,8 +108,9 @@ def main() -> int:
 
     print("\nRaw contains phrase in html?", phrase_raw in html)
     print("Raw contains phrase in body_text?", phrase_raw in body_text)
-    print("Regex match in html_norm?", bool(re.search(pat, html_norm)))
-    print("Regex match in text_norm?", bool(re.search(pat, text_norm)))
+    print("Verified window in html?", html_window is not None)
+    print("Regex match in text_norm?", bool(verified_re.search(text_norm)))
+    print("Detector (Có xác thực):", bds_detail._has_verified_badge(html, text_norm))
 
     # Cloudflare strings can exist in normal pages; use stronger signals for blocks.
     blocked = (
@@ -118,15 +122,12 @@ def main() -> int:
     print("Blocked heuristics:", blocked)
 
     # Print a window around match if present
-    m = re.search(pat, html_norm)
-    if m:
-        a = max(0, m.start() - 120)
-        b = min(len(html_norm), m.end() + 120)
-        print("\nHTML_NORM window:\n", html_norm[a:b])
+    if html_window:
+        print("\nHTML window:\n", html_window)
     else:
-        print("\nNo match in HTML_NORM")
+        print("\nNo match in HTML")
 
-    m2 = re.search(pat, text_norm)
+    m2 = verified_re.search(text_norm)
     if m2:
         a = max(0, m2.start() - 120)
         b = min(len(text_norm), m2.end() + 120)
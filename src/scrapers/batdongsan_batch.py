@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.scrapers.batdongsan_detail import DETAIL_DEBUG_COLUMNS, DETAIL_MAIN_COLUMNS
+from src.scrapers.batdongsan_frontier import UrlFrontier
+from src.scrapers.batdongsan_hybrid import HybridFetcher
+from src.scrapers.batdongsan_pipeline import run_pipeline
+from src.scrapers.resource_blocking import ResourceBlocker
+from src.utils.html_cache import HtmlCache
+from src.utils.merge_results import main as merge_main
+from src.utils.metrics import default_metrics
+from src.utils.parquet_io import write_parquet
+from src.utils.rate_limit import HostThrottles
+
+LISTING_URL_TEMPLATE = "https://batdongsan.com.vn/nha-dat-ban-tp-hcm/p{page}"
+
+
+def parse_pages(text: str) -> List[int]:
+    """``"2-500"``, ``"7"`` or ``"2-10,15,20-22"`` -> sorted unique page numbers."""
+
+    pages = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            start = int(first)
+            end = int(last) if sep else start
+        except ValueError:
+            raise ValueError(f"Invalid page range: {part!r}") from None
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: {part!r}")
+        pages.update(range(start, end + 1))
+    if not pages:
+        raise ValueError("No pages given")
+    return sorted(pages)
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """``"i/N"`` -> ``(i, N)`` with ``0 <= i < N``."""
+
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard: {text!r} (expected i/N, e.g. 0/4)") from None
+    if not sep or count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard: {text!r} (expected i/N with 0 <= i < N)")
+    return index, count
+
+
+def shard_pages(pages: Sequence[int], index: int, count: int) -> List[int]:
+    """Pages owned by shard ``index`` of ``count``: those with ``page % count == index``.
+
+    The owner depends only on the page number, so a page keeps its shard when
+    the range is extended, and the shards of one ``count`` never overlap.
+    """
+
+    return [page for page in pages if page % count == index]
+
+
+def shard_suffix(index: int, count: int) -> str:
+    return f".shard{index}of{count}" if count > 1 else ""
+
+
+def save_detail_rows(
+    rows: List[Dict[str, object]],
+    page: int,
+    frontier: UrlFrontier,
+    out_dir: str | Path = "data/raw/scraped",
+    parquet_root: Optional[str | Path] = "data/raw/parquet",
+) -> Tuple[int, int]:
+    """Append the rows of listing page ``page`` to ``scraped_results_p{page}.csv``; return ``(saved, blocked)``.
+
+    Blocked pages are marked failed in the frontier (retried next run), saved
+    URLs are marked done.
+    """
+
+    if not rows:
+        return 0, 0
+    df = pd.DataFrame(rows)[DETAIL_MAIN_COLUMNS + DETAIL_DEBUG_COLUMNS]
+    blocked = df["blocked"].astype(bool)
+    frontier.mark_failed(df.loc[blocked, "source_url"], error="blocked")
+    df = df[~blocked]
+    if df.empty:
+        return 0, int(blocked.sum())
+
+    output_path = Path(out_dir) / f"scraped_results_p{page}.csv"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.exists():
+        df.to_csv(output_path, mode="a", header=False, index=False, encoding="utf-8")
+    else:
+        df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    if parquet_root is not None:
+        write_parquet(df, "batdongsan", f"scraped_results_p{page}_{pd.Timestamp.now():%H%M%S}", root=parquet_root)
+    frontier.mark_done(df["source_url"])
+    return len(df), int(blocked.sum())
+
+
+def collect_links(
+    fetcher: HybridFetcher,
+    frontier: UrlFrontier,
+    pages: Sequence[int],
+    max_links: Optional[int] = None,
+) -> None:
+    frontier.add_listing_pages(LISTING_URL_TEMPLATE.format(page=page) for page in pages)
+    wanted = {LISTING_URL_TEMPLATE.format(page=page) for page in pages}
+    todo = [url for url in frontier.pending_listing_pages() if url in wanted]
+    print(f"[INFO] Listing pages left: {len(todo)}")
+    for listing_url in todo:
+        try:
+            detail_urls: Optional[List[str]] = fetcher.collect_links(listing_url, timeout=45, max_links=max_links)
+        except Exception as exc:
+            print(f"[WARN] {listing_url}: {exc}")
+            detail_urls = None
+        added = frontier.record_listing(listing_url, detail_urls)
+        print(f"{listing_url}: {len(detail_urls or [])} links ({added} new)")
+
+
+def scrape_details(
+    fetcher: HybridFetcher,
+    frontier: UrlFrontier,
+    pages: Sequence[int],
+    out_dir: str | Path = "data/raw/scraped",
+    parquet_root: Optional[str | Path] = "data/raw/parquet",
+    fetch_workers: int = 4,
+) -> int:
+    total = 0
+    for page in pages:
+        detail_urls = frontier.pending(source=LISTING_URL_TEMPLATE.format(page=page))
+        print(f"p{page}: {len(detail_urls)} urls left")
+        if not detail_urls:
+            continue
+        rows, _ = run_pipeline(
+            detail_urls,
+            frontier.wrap_fetch(lambda url: fetcher.fetch_detail_html(url, timeout=45)),
+            kind="detail",
+            fetch_workers=fetch_workers,
+            queue_size=16,
+        )
+        saved, blocked = save_detail_rows(rows, page, frontier, out_dir, parquet_root)
+        total += saved
+        print(f"p{page}: saved {saved} rows ({blocked} blocked)")
+    return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Headless batdongsan crawl over a page range, split across workers with --shard i/N."
+    )
+    parser.add_argument("stage", choices=("links", "details", "crawl", "merge"), help="crawl = links then details")
+    parser.add_argument("--pages", default="2-500", help="listing pages, e.g. 2-500 or 2-10,15")
+    parser.add_argument("--shard", default="0/1", help="run only shard i of N (pages with page %% N == i)")
+    parser.add_argument(
+        "--frontier", default="data/processed/frontier.sqlite", help="frontier SQLite, shared by all shards"
+    )
+    parser.add_argument("--out", default="data/raw/scraped", help="folder for scraped_results_p*.csv")
+    parser.add_argument("--parquet", default="data/raw/parquet", help="Parquet root; '' to skip Parquet")
+    parser.add_argument("--cache", default="data/raw/html_cache", help="HTML cache folder; '' to disable")
+    parser.add_argument("--replay", action="store_true", help="re-parse from the HTML cache only, no network")
+    parser.add_argument("--max-links", type=int, default=None)
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="starting requests/second per host")
+    parser.add_argument("--show-browser", action="store_true", help="run Chromium with a window")
+    parser.add_argument("--format", dest="fmt", choices=("csv", "parquet"), default="csv", help="merge output")
+    args = parser.parse_args(argv)
+
+    try:
+        pages = parse_pages(args.pages)
+        index, count = parse_shard(args.shard)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.stage == "merge":
+        # Shards write disjoint scraped_results_p{page}.csv files; the merge dedupes on ID/source_url.
+        return merge_main(["--src", args.out, "--from", str(pages[0]), "--to", str(pages[-1]), "--format", args.fmt])
+
+    own_pages = shard_pages(pages, index, count)
+    print(f"[INFO] Shard {index}/{count}: {len(own_pages)} of {len(pages)} pages")
+    if not own_pages:
+        return 0
+
+    suffix = shard_suffix(index, count)
+    metrics = default_metrics()
+    metrics.reset()
+    metrics_dir = Path("data/processed/metrics")
+    metrics_name = f"crawl_metrics{suffix}"
+    metrics.start_live(every=60, out_dir=metrics_dir, name=metrics_name, verbose=False)
+
+    cache = HtmlCache(args.cache) if args.cache else None
+    # One frontier for all shards: a detail URL belongs to the first listing page that found it,
+    # so a listing that shows up on pages of two shards (or moves mid-crawl) is fetched once.
+    frontier = UrlFrontier(args.frontier)
+    blocker = ResourceBlocker()
+    throttle = HostThrottles(args.rate, min_rate=args.rate / 20, max_rate=args.rate * 4)
+    fetcher = HybridFetcher(
+        cookies=os.getenv("BDS_COOKIE"), headless=not args.show_browser, blocker=blocker,
+        cache=cache, replay=args.replay, throttle=throttle,
+    )
+    try:
+        if args.stage in ("links", "crawl") and not args.replay:
+            collect_links(fetcher, frontier, own_pages, args.max_links)
+        if args.stage in ("details", "crawl"):
+            saved = scrape_details(
+                fetcher, frontier, own_pages, args.out, args.parquet or None, fetch_workers=args.fetch_workers
+            )
+            print(f"[INFO] Shard {index}/{count}: {saved} rows saved")
+    finally:
+        fetcher.close()
+        if cache is not None:
+            cache.close()
+        print("Frontier:", frontier.stats())
+        frontier.close()
+        print("Fetch path:", fetcher.summary())
+        print("Throttle:", throttle.summary())
+        metrics.stop_live()
+        metrics.export(metrics_dir, metrics_name)
+        print(metrics.report())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
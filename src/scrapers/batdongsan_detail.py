@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.scrapers.html_backend import make_soup
+from src.utils.metrics import default_metrics
+from src.utils.vn_location import resolve_location
+
+# Columns of scraped_results_pX.csv, in output order.
+DETAIL_MAIN_COLUMNS = [
+    "ID", "Giá (tỷ đồng)", "Giá đã tăng 1 năm qua (%)", "Diện tích", "Số phòng tắm", "Số phòng ngủ",
+    "Số tầng", "Có nội thất", "Mặt tiền(m)", "Đường vào(m)", "Hướng nhà",
+    "Đường", "Phường", "Quận", "Thành Phố", "Có sổ hồng", "Có xác thực",
+    "Ngày đăng", "Ngày hết hạn", "Loại Tin", "ngày crawl",
+]
+# Debug columns kept next to the main ones to inspect failures.
+DETAIL_DEBUG_COLUMNS = ["blocked", "source_url", "address", "legal", "raw_price", "raw_area", "page_title"]
+
+_WS_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"(\d+(?:[\.,]\d+)?)")
+_INT_RE = re.compile(r"(\d+)")
+_VERIFIED_RE = re.compile(r"batdongsan\.com\.vn.{0,80}da xac thuc")
+
+
+# ----------------- Text / numeric / date normalizers -----------------
+
+def _clean_text(s):
+    if s is None:
+        return None
+    s = str(s).replace("\xa0", " ")
+    s = _WS_RE.sub(" ", s).strip()
+    return s or None
+
+
+def _norm_key(s: str) -> str:
+    s = _clean_text(s) or ""
+    # NFKD and the combining-mark filter are no-ops on ASCII text.
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = s.lower()
+    s = s.replace("đ", "d")
+    s = _WS_RE.sub(" ", s).strip()
+    return s
+
+
+def _to_float_number(s):
+    if s is None:
+        return None
+    s = str(s).strip().lower()
+    if not s:
+        return None
+    m = _NUMBER_RE.search(s)
+    if not m:
+        return None
+    try:
+        return float(m.group(1).replace(",", "."))
+    except Exception:
+        return None
+
+
+def _to_int(s: str | None):
+    if not s:
+        return None
+    m = _INT_RE.search(str(s))
+    return int(m.group(1)) if m else None
+
+
+def _parse_percent(s: str | None):
+    if s is None:
+        return None
+    s = _clean_text(s)
+    if not s:
+        return None
+    m = _NUMBER_RE.search(s)
+    if not m:
+        return None
+    try:
+        return float(m.group(1).replace(",", "."))
+    except Exception:
+        return None
+
+
+def _parse_price_to_billion(price_text: str | None):
+    # Output in "tỷ" (billions). Handles:
+    # - "4,5 tỷ" -> 4.5
+    # - "450 triệu" -> 0.45
+    # - "10 tỷ 500 triệu" -> 10.5
+    if not price_text:
+        return None
+
+    t_raw = str(price_text)
+    t = _norm_key(t_raw)
+    if not t:
+        return None
+
+    if any(k in t for k in ["thoa thuan", "thuong luong"]):
+        return None
+
+    total_ty = 0.0
+    found_any = False
+
+    # Keep unit with its nearby number by scanning tokens
+    tokens = _WS_RE.split(t_raw)
+    tokens_norm = [_norm_key(tok) for tok in tokens]
+    for i, tok in enumerate(tokens):
+        tok_norm = tokens_norm[i]
+        val = _to_float_number(tok_norm)
+        if val is None:
+            continue
+
+        # lookahead for unit token
+        unit = tokens_norm[i + 1] if i + 1 < len(tokens) else ""
+
+        # also allow unit in same token
+        if "tỷ" in tok or "ty" in tok_norm or "tỷ" in unit or "ty" in unit:
+            total_ty += val
+            found_any = True
+            continue
+        if "triệu" in tok or "trieu" in tok_norm or "triệu" in unit or "trieu" in unit:
+            total_ty += val / 1000.0
+            found_any = True
+            continue
+        if any(u in tok_norm for u in ["nghin", "ngan"]) or any(u in unit for u in ["nghin", "ngan"]):
+            total_ty += val / 1_000_000.0
+            found_any = True
+            continue
+
+    return round(total_ty, 6) if found_any else None
+
+
+def _flag_has_furnishing(furnishing_text: str | None) -> int:
+    t = _norm_key(furnishing_text or "")
+    if not t:
+        return 0
+    if any(k in t for k in ["khong", "chua", "trong", "ban giao tho", "khong noi that"]):
+        return 0
+    return 1
+
+
+def _flag_has_red_book(legal_text: str | None) -> int:
+    t = _norm_key(legal_text or "")
+    if not t:
+        return 0
+    return 1 if ("so hong" in t or "so do" in t) else 0
+
+
+_EMPTY_MARKERS = frozenset({"-", "--", "khong", "kxd", "khong co", "na"})
+
+
+def _as_none_if_empty(v: str | None):
+    v = _clean_text(v)
+    if not v:
+        return None
+    if _norm_key(v) in _EMPTY_MARKERS:
+        return None
+    return v
+
+
+def _pick_first(*values):
+    for v in values:
+        v = _as_none_if_empty(v)
+        if v is not None:
+            return v
+    return None
+
+
+# ----------------- DOM extractors -----------------
+
+def _extract_kv_items(soup) -> Dict[str, str]:
+    # Spec section: "Đặc điểm bất động sản"
+    out: Dict[str, str] = {}
+    for item in soup.select(".re__pr-specs-content-item") or []:
+        k_el = item.select_one(".re__pr-specs-content-item-title")
+        v_el = item.select_one(".re__pr-specs-content-item-value")
+        k = _clean_text(k_el.get_text(" ", strip=True) if k_el else None)
+        v = _clean_text(v_el.get_text(" ", strip=True) if v_el else None)
+        if k and v:
+            out[_norm_key(k)] = v
+    return out
+
+
+def _extract_short_info(soup) -> Dict[str, str]:
+    # Usually shows: Ngày đăng / Ngày hết hạn / Loại tin / Mã tin
+    out: Dict[str, str] = {}
+    for item in soup.select(".re__pr-short-info-item") or []:
+        parts = [p.strip() for p in item.stripped_strings if p and p.strip()]
+        if len(parts) >= 2:
+            out[_norm_key(parts[0])] = parts[1]
+    return out
+
+
+def _parse_address_parts(address: str | None) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    # e.g. "Đường Lê Tự Tài, Phường 4, Quận Phú Nhuận, Hồ Chí Minh"; see src/utils/vn_location.py.
+    if not address:
+        return None, None, None, None
+    street, ward, district, city = resolve_location(str(address))
+    return _clean_text(street), _clean_text(ward), _clean_text(district), _clean_text(city)
+
+
+_VERIFIED_SECTION_SELECTOR = ".re__pr-listing-verified-section"
+_VERIFIED_ATTRS = ("alt", "title", "aria-label")
+# The raw-HTML patterns run on html.lower(), which keeps them plain literal scans.
+_BDS_HIT_RE = re.compile(r"batdongsan")
+_BDS_SPACED_RE = re.compile(r"batdongsan\s+com\s+vn")
+# Raw spellings of "thuc"/"thực" (precomposed or with combining marks)
+_THUC_RE = re.compile(r"th(?:u[\u0300-\u036f]*|[ùúủũụưừứửữự])c")
+# "batdongsan.com.vn" + up to 80 chars + "da xac thuc", measured after normalisation
+_VERIFIED_WINDOW_CHARS = len("batdongsan.com.vn") + 80 + len("da xac thuc")
+
+
+def _verified_section_match(soup) -> bool:
+    section = soup.select_one(_VERIFIED_SECTION_SELECTOR)
+    if section is None:
+        return False
+    if _VERIFIED_RE.search(_norm_key(section.get_text(" ", strip=True))):
+        return True
+    # The phrase may only live in alt/title/aria-label of the badge icon.
+    for node in [section] + section.select("*"):
+        for attr in _VERIFIED_ATTRS:
+            value = node.get(attr)
+            if isinstance(value, str) and _VERIFIED_RE.search(_norm_key(value)):
+                return True
+    return False
+
+
+def _anchor_reach(html: str, anchor: int) -> int:
+    # Earliest raw offset from which ``anchor`` can still fall inside one window.
+    # Each normalised char needs at least one non-space raw char (at most two
+    # combining marks ride along), so stop once 3x the window is non-space.
+    limit = 3 * _VERIFIED_WINDOW_CHARS
+    start = max(0, anchor - 2 * limit)
+    while start > 0 and len(_WS_RE.sub("", html[start:anchor])) <= limit:
+        start = max(0, anchor - 2 * (anchor - start))
+    return start
+
+
+def _verified_html_window(html: str) -> Optional[str]:
+    """Return the normalised window around the first raw-HTML verified match.
+
+    ``html`` must already be lowercased (``_norm_key`` lowercases anyway).
+
+    Instead of normalising the whole page, only the text after a raw
+    "batdongsan" hit is normalised, and only for hits that sit close enough
+    before a raw "thực"/"thuc". The window grows until it covers the regex span
+    even after whitespace collapsing, so it finds the same matches as a
+    full-page scan.
+    """
+
+    size = len(html)
+    checked = set()
+    for anchor in _THUC_RE.finditer(html):
+        for hit in _BDS_HIT_RE.finditer(html, _anchor_reach(html, anchor.start()), anchor.start()):
+            start = hit.start()
+            if start in checked:
+                continue
+            checked.add(start)
+
+            end = min(size, start + 2 * _VERIFIED_WINDOW_CHARS)
+            while True:
+                window = _norm_key(html[start:end])
+                if len(window) > _VERIFIED_WINDOW_CHARS or end >= size:
+                    break
+                end = min(size, end + 2 * _VERIFIED_WINDOW_CHARS)
+            if _VERIFIED_RE.match(window):
+                return window
+    return None
+
+
+def _has_verified_badge(html: str, full_text_norm: str, soup=None) -> int:
+    # Requirement: if the page contains the phrase "Batdongsan.com.vn đã xác thực" -> 1 else 0
+    # In practice it may appear in attributes (alt/title/aria-label), so scan text, the badge
+    # section and the raw HTML. The raw HTML is never normalised as a whole: that costs more
+    # than parsing the page.
+    if soup is not None and _verified_section_match(soup):
+        return 1
+    # flexible match: "batdongsan.com.vn" ... "da xac thuc" (allow some chars in between)
+    if _VERIFIED_RE.search(full_text_norm):
+        return 1
+    html_lower = (html or "").lower()
+    if _verified_html_window(html_lower) is not None:
+        return 1
+    # fallback: sometimes missing dot in domain or extra spaces
+    if "batdongsan com vn" in full_text_norm or _BDS_SPACED_RE.search(html_lower):
+        if "da xac thuc" in full_text_norm or "da xac thuc" in _norm_key(html_lower):
+            return 1
+    return 0
+
+
+def _label_keys(*labels: str) -> Tuple[str, ...]:
+    return tuple(_norm_key(label) for label in labels)
+
+
+class DetailParser:
+    """Turn a rendered batdongsan detail page into one scraped_results row.
+
+    Label lookups are normalised once here instead of on every page, and the
+    parser holds no per-page state, so one instance (or the module-level
+    :func:`parse_detail_html`) can be shared by threads or process workers.
+    """
+
+    # Spec / short-info labels (several variants per field), normalised at import.
+    ID_KEYS = _label_keys("Mã tin")
+    PRICE_KEYS = _label_keys("Mức giá", "Khoảng giá", "Giá")
+    AREA_KEYS = _label_keys("Diện tích")
+    BEDROOM_KEYS = _label_keys("Số phòng ngủ", "Phòng ngủ")
+    BATHROOM_KEYS = _label_keys("Số phòng tắm, vệ sinh", "Số phòng vệ sinh", "Số phòng tắm")
+    FLOOR_KEYS = _label_keys("Số tầng")
+    FURNISHING_KEYS = _label_keys("Nội thất")
+    FACADE_KEYS = _label_keys("Mặt tiền")
+    ACCESS_ROAD_KEYS = _label_keys("Đường vào")
+    DIRECTION_KEYS = _label_keys("Hướng nhà")
+    LEGAL_KEYS = _label_keys("Pháp lý")
+    POSTED_DATE_KEYS = _label_keys("Ngày đăng")
+    EXPIRY_DATE_KEYS = _label_keys("Ngày hết hạn")
+    LISTING_TYPE_KEYS = _label_keys("Loại tin")
+
+    def __init__(self, backend: Optional[str] = None) -> None:
+        self.backend = backend
+
+    def parse(self, html: str, url: str, crawled_at: Optional[pd.Timestamp] = None) -> Dict[str, object]:
+        soup = make_soup(html, backend=self.backend)
+
+        page_title = soup.title.get_text(strip=True) if soup.title else ""
+        full_text = " ".join(soup.stripped_strings)
+        full_text_norm = _norm_key(full_text)
+        blocked = ("just a moment" in (page_title or "").lower()) or ("cloudflare" in (full_text or "").lower())
+
+        # Address
+        address_el = soup.select_one(".re__pr-short-description.js__pr-address")
+        address = _clean_text(address_el.get_text(" ", strip=True) if address_el else None)
+        street, ward, district, city = _parse_address_parts(address)
+
+        specs = _extract_kv_items(soup)
+        short_info = _extract_short_info(soup)
+
+        def spec(keys):
+            return [specs.get(k) for k in keys]
+
+        def info_or_spec(keys):
+            return [short_info.get(keys[0]), specs.get(keys[0])]
+
+        # Values (try multiple label variants)
+        id_value = _pick_first(*info_or_spec(self.ID_KEYS))
+        price_text = _pick_first(*spec(self.PRICE_KEYS))
+        area_text = _pick_first(*spec(self.AREA_KEYS))
+        bedrooms_text = _pick_first(*spec(self.BEDROOM_KEYS))
+        bathrooms_text = _pick_first(*spec(self.BATHROOM_KEYS))
+        floors_text = _pick_first(*spec(self.FLOOR_KEYS))
+        furnishing_text = _pick_first(*spec(self.FURNISHING_KEYS))
+        facade_text = _pick_first(*spec(self.FACADE_KEYS))
+        access_road_text = _pick_first(*spec(self.ACCESS_ROAD_KEYS))
+        direction_text = _pick_first(*spec(self.DIRECTION_KEYS))
+        legal_text = _pick_first(*spec(self.LEGAL_KEYS))
+        posted_date_text = _pick_first(*info_or_spec(self.POSTED_DATE_KEYS))
+        expiry_date_text = _pick_first(*info_or_spec(self.EXPIRY_DATE_KEYS))
+        listing_type_text = _pick_first(*info_or_spec(self.LISTING_TYPE_KEYS))
+
+        verified = _has_verified_badge(html, full_text_norm, soup)
+
+        # Price increase in last year (percent)
+        price_increase_el = soup.select_one(".cta-number")
+        price_increase_pct = _parse_percent(price_increase_el.get_text(" ", strip=True) if price_increase_el else None)
+
+        row = {
+            "ID": _clean_text(id_value),
+            "Giá (tỷ đồng)": _parse_price_to_billion(price_text),
+            "Giá đã tăng 1 năm qua (%)": price_increase_pct,
+            "Diện tích": _to_float_number(area_text),
+            "Số phòng tắm": _to_int(bathrooms_text),
+            "Số phòng ngủ": _to_int(bedrooms_text),
+            "Số tầng": _to_int(floors_text),
+            "Có nội thất": int(_flag_has_furnishing(furnishing_text)),
+            "Mặt tiền(m)": _to_float_number(facade_text),
+            "Đường vào(m)": _to_float_number(access_road_text),
+            "Hướng nhà": _clean_text(direction_text),
+            "Đường": _clean_text(street),
+            "Phường": _clean_text(ward),
+            "Quận": _clean_text(district),
+            "Thành Phố": _clean_text(city),
+            "Có sổ hồng": int(_flag_has_red_book(legal_text)),
+            "Có xác thực": int(verified),
+            "Ngày đăng": pd.to_datetime(posted_date_text, dayfirst=True, errors="coerce"),
+            "Ngày hết hạn": pd.to_datetime(expiry_date_text, dayfirst=True, errors="coerce"),
+            "Loại Tin": _clean_text(listing_type_text),
+            "ngày crawl": crawled_at if crawled_at is not None else pd.Timestamp.now(),
+            # debug extras
+            "blocked": bool(blocked),
+            "source_url": url,
+            "raw_price": _clean_text(price_text),
+            "raw_area": _clean_text(area_text),
+            "legal": _clean_text(legal_text),
+            "address": _clean_text(address),
+            "page_title": _clean_text(page_title),
+        }
+        return row
+
+
+_DEFAULT_PARSER = DetailParser()
+
+
+def parse_detail_html(html: str, url: str, crawled_at: Optional[pd.Timestamp] = None) -> Dict[str, object]:
+    """Module-level entry point; picklable, so it can be submitted to a process pool."""
+
+    with default_metrics().timer("batdongsan", "parse_detail"):
+        return _DEFAULT_PARSER.parse(html, url, crawled_at=crawled_at)
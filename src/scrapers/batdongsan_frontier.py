@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Detail URL lifecycle: pending -> fetched (HTML in hand) -> done (rows saved).
+# "failed" URLs go back to the queue until they run out of attempts.
+PENDING = "pending"
+FETCHED = "fetched"
+DONE = "done"
+FAILED = "failed"
+
+
+class UrlFrontier:
+    """SQLite-backed crawl state for the batdongsan listing and detail stages.
+
+    Listing pages and detail URLs are each stored once. A listing that shows up
+    on several pages keeps the first page it was found on (``source``), so
+    the detail stage can still write one output file per listing page without
+    fetching the same listing twice. Every fetch records the attempt count,
+    time and a SHA-256 of the HTML, so an interrupted crawl resumes with
+    exactly the URLs that are not ``done``.
+
+    Several processes can share one file (WAL journal, writers wait up to
+    ``timeout`` seconds for each other). Since a detail URL keeps the first
+    ``source`` that inserted it, workers that each take ``pending(source=...)``
+    for their own listing pages never claim the same URL.
+    """
+
+    def __init__(
+        self, path: str | Path = "../data/processed/frontier.sqlite", max_attempts: int = 3, timeout: float = 60.0
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS listing_pages (
+                url TEXT PRIMARY KEY, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+                last_fetched_at REAL, links_found INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY, source TEXT, discovered_at REAL NOT NULL,
+                status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+                last_fetched_at REAL, content_hash TEXT, error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS urls_source_status ON urls (source, status);
+            """
+        )
+        self._db.commit()
+
+    def __enter__(self) -> "UrlFrontier":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ----- listing pages -----
+
+    def add_listing_pages(self, urls: Iterable[str]) -> int:
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO listing_pages (url, status) VALUES (?, ?)",
+                ((url, PENDING) for url in urls),
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def pending_listing_pages(self) -> List[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM listing_pages WHERE status != ? AND attempts < ? ORDER BY rowid",
+                (DONE, self.max_attempts),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def record_listing(self, url: str, links: Optional[List[str]]) -> int:
+        """Store the outcome of one listing page; ``links=None`` marks it failed.
+
+        Returns how many of ``links`` were new to the frontier.
+        """
+
+        now = time.time()
+        with self._lock:
+            before = self._db.total_changes
+            if links:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO urls (url, source, discovered_at, status) VALUES (?, ?, ?, ?)",
+                    ((link, url, now, PENDING) for link in links),
+                )
+            added = self._db.total_changes - before
+            self._db.execute(
+                "INSERT INTO listing_pages (url, status, attempts, last_fetched_at, links_found)"
+                " VALUES (?, ?, 1, ?, ?) ON CONFLICT(url) DO UPDATE SET status = excluded.status,"
+                " attempts = attempts + 1, last_fetched_at = excluded.last_fetched_at,"
+                " links_found = excluded.links_found",
+                # An empty page is usually a block or the end of the results: retry it.
+                (url, DONE if links else FAILED, now, len(links) if links is not None else None),
+            )
+            self._db.commit()
+        return added
+
+    # ----- detail URLs -----
+
+    def add_urls(self, urls: Iterable[str], source: Optional[str] = None) -> int:
+        now = time.time()
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO urls (url, source, discovered_at, status) VALUES (?, ?, ?, ?)",
+                ((url, source, now, PENDING) for url in urls),
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def pending(self, source: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """URLs still to do (pending, fetched but not saved, or failed with attempts left)."""
+
+        query = "SELECT url FROM urls WHERE status != ? AND attempts < ?"
+        params: List[object] = [DONE, self.max_attempts]
+        if source is not None:
+            query += " AND source = ?"
+            params.append(source)
+        query += " ORDER BY rowid"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [row[0] for row in self._db.execute(query, params).fetchall()]
+
+    def record_fetch(self, url: str, html: Optional[str], error: Optional[str] = None) -> None:
+        now = time.time()
+        content_hash = hashlib.sha256(html.encode("utf-8")).hexdigest() if html is not None else None
+        with self._lock:
+            self._db.execute(
+                "UPDATE urls SET status = ?, attempts = attempts + 1, last_fetched_at = ?,"
+                " content_hash = COALESCE(?, content_hash), error = ? WHERE url = ?",
+                (FETCHED if html is not None else FAILED, now, content_hash, error, url),
+            )
+            self._db.commit()
+
+    def wrap_fetch(self, fetch: Callable[[str], Optional[str]]) -> Callable[[str], Optional[str]]:
+        """Wrap a ``fetch(url)`` callable so every call is recorded in the frontier."""
+
+        def recorded_fetch(url: str) -> Optional[str]:
+            try:
+                html = fetch(url)
+            except Exception as exc:
+                self.record_fetch(url, None, error=str(exc))
+                raise
+            self.record_fetch(url, html, error=None if html is not None else "no html")
+            return html
+
+        return recorded_fetch
+
+    def mark_done(self, urls: Iterable[str]) -> None:
+        with self._lock:
+            self._db.executemany("UPDATE urls SET status = ? WHERE url = ?", ((DONE, url) for url in urls))
+            self._db.commit()
+
+    def mark_failed(self, urls: Iterable[str], error: str = "") -> None:
+        with self._lock:
+            self._db.executemany(
+                "UPDATE urls SET status = ?, error = ? WHERE url = ?", ((FAILED, error, url) for url in urls)
+            )
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall())
+            pages = dict(self._db.execute("SELECT status, COUNT(*) FROM listing_pages GROUP BY status").fetchall())
+        return {
+            **{f"urls_{status}": counts.get(status, 0) for status in (PENDING, FETCHED, DONE, FAILED)},
+            **{f"pages_{status}": pages.get(status, 0) for status in (PENDING, DONE, FAILED)},
+        }
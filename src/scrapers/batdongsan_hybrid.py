@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+import requests.adapters
+from bs4 import SoupStrainer
+
+from src.scrapers.batdongsan_scraper import (
+    DEFAULT_HEADERS,
+    DETAIL_WAIT_SELECTORS,
+    LISTING_CARD_SELECTOR,
+    LISTING_LINK_SELECTOR,
+    BrowserPool,
+    _build_extra_headers,
+    _normalize_links,
+    _record_page,
+)
+from src.scrapers.html_backend import make_soup
+from src.scrapers.resource_blocking import ResourceBlocker
+from src.utils.html_cache import HtmlCache, is_cacheable
+from src.utils.metrics import default_metrics
+from src.utils.rate_limit import HostThrottles, block_reason, is_block_status, is_challenge_page
+
+# Markup that must be present in the server-rendered HTML for the parsers to work.
+LISTING_REQUIRED = (LISTING_CARD_SELECTOR,)
+LINKS_REQUIRED = (LISTING_LINK_SELECTOR,)
+# Only verified listings have the badge section, so it cannot be required; the
+# detail parser decides verified/unverified from the same HTML it gets here.
+DETAIL_REQUIRED = (".re__pr-specs",)
+
+_CLASS_SELECTOR_RE = re.compile(r"^([a-z][a-z0-9]*)?\.([\w-]+)$", re.IGNORECASE)
+
+
+def _class_pattern(name: str) -> re.Pattern:
+    return re.compile(r"""class\s*=\s*["'][^"']*(?<![\w-])""" + re.escape(name) + r"""(?![\w-])""", re.IGNORECASE)
+
+
+def has_selectors(html: str, selectors: Iterable[str]) -> bool:
+    """Whether every selector matches ``html``.
+
+    ``.cls`` / ``tag.cls`` selectors are checked with a class-attribute regex,
+    without building a DOM; anything else goes through :func:`make_soup`.
+    """
+
+    soup = None
+    for selector in selectors:
+        m = _CLASS_SELECTOR_RE.match(selector)
+        if m:
+            if not _class_pattern(m.group(2)).search(html):
+                return False
+            continue
+        if soup is None:
+            soup = make_soup(html)
+        if soup.select_one(selector) is None:
+            return False
+    return True
+
+
+class HybridFetcher:
+    """Plain HTTP first, Chromium only when the server-rendered page is not usable.
+
+    Each fetch is a pooled ``requests`` GET with the browser's User-Agent,
+    Referer and ``BDS_COOKIE``. The response is accepted when it is a 200,
+    is not a 403/429 or Cloudflare challenge, and contains the markup the
+    parsers need; otherwise the URL is fetched through a :class:`BrowserPool`
+    (created lazily, so Chromium is only launched if a fallback happens).
+    After ``max_http_failures`` HTTP misses in a row, the next
+    ``browser_streak`` fetches go straight to the browser before HTTP is
+    tried again.
+
+    ``cache``/``replay`` behave as in :class:`BrowserPool`; ``throttle`` paces
+    both paths per host. :meth:`summary` reports the HTTP-vs-browser split.
+    Safe to call from several threads (e.g. ``run_pipeline(fetch_workers=4)``);
+    browser fallbacks are serialised by the pool.
+    """
+
+    def __init__(
+        self,
+        cookies: Optional[str] = None,
+        headless: bool = True,
+        pool: Optional[BrowserPool] = None,
+        blocker: Optional[ResourceBlocker] = None,
+        cache: Optional[HtmlCache] = None,
+        replay: bool = False,
+        throttle: Optional[HostThrottles] = None,
+        http_pool_size: int = 8,
+        http_timeout: int = 20,
+        max_http_failures: int = 5,
+        browser_streak: int = 20,
+    ) -> None:
+        if replay and cache is None:
+            raise ValueError("replay=True needs a cache")
+        self.cache = cache
+        self.replay = replay
+        self.throttle = throttle
+        self.http_timeout = http_timeout
+        self.max_http_failures = max_http_failures
+        self.browser_streak = browser_streak
+        self._owns_pool = pool is None
+        self.pool = pool or BrowserPool(cookies=cookies, headless=headless, blocker=blocker, throttle=throttle)
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=http_pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.headers.update(_build_extra_headers(cookies))
+
+        self.counts: Counter = Counter()  # "http", "browser", "cache"
+        self.http_misses: Counter = Counter()  # why HTTP was not enough
+        self._failures_in_row = 0
+        self._browser_only_left = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "HybridFetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+        if self._owns_pool:
+            self.pool.close()
+
+    # ----------------- HTTP path -----------------
+
+    def _http_get(self, url: str) -> Tuple[Optional[str], Optional[int], str]:
+        """Return ``(html, status, miss_reason)``; ``miss_reason`` is "" when the page was fetched."""
+
+        metrics = default_metrics()
+        throttle = self.throttle.for_url(url) if self.throttle is not None else None
+        if throttle is not None:
+            metrics.observe("batdongsan", "sleep", throttle.wait())
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.http_timeout)
+        except requests.RequestException as exc:
+            metrics.record_error("batdongsan", "http_get", exc)
+            if throttle is not None:
+                throttle.record(error=True)
+            return None, None, "error"
+        latency = time.perf_counter() - start
+        metrics.observe("batdongsan", "http_get", latency)
+        if "charset" not in (response.headers.get("Content-Type") or "").lower():
+            # requests would fall back to ISO-8859-1 and garble the Vietnamese text; the site serves UTF-8.
+            response.encoding = "utf-8"
+        html = response.text
+        _record_page(response.status_code, html)
+        if throttle is not None:
+            throttle.record(response.status_code, latency, html)
+        if is_block_status(response.status_code) or is_challenge_page(html):
+            return html, response.status_code, block_reason(response.status_code)
+        if response.status_code != 200:
+            return html, response.status_code, f"status_{response.status_code}"
+        return html, response.status_code, ""
+
+    def _try_http(self, url: str, required: Sequence[str]) -> Tuple[Optional[str], Optional[int]]:
+        """``(html, status)`` of a usable HTTP response, else ``(None, None)``."""
+
+        with self._lock:
+            if self._browser_only_left > 0:
+                self._browser_only_left -= 1
+                return None, None
+        html, status, miss = self._http_get(url)
+        if not miss and not has_selectors(html, required):
+            miss = "missing_markup"
+        with self._lock:
+            if not miss:
+                self._failures_in_row = 0
+                return html, status
+            self.http_misses[miss] += 1
+            self._failures_in_row += 1
+            if self._failures_in_row >= self.max_http_failures:
+                print(
+                    f"[INFO] {self._failures_in_row} HTTP misses in a row ({miss}); "
+                    f"using the browser for the next {self.browser_streak} pages"
+                )
+                self._failures_in_row = 0
+                self._browser_only_left = self.browser_streak
+        return None, None
+
+    def _count(self, path: str) -> None:
+        with self._lock:
+            self.counts[path] += 1
+        default_metrics().inc("fetch_path", source="batdongsan", path=path)
+
+    # ----------------- public API (same as BrowserPool) -----------------
+
+    def fetch_html(
+        self,
+        url: str,
+        required: Sequence[str] = (),
+        wait_selectors: Iterable[Tuple[str, int]] = (),
+        timeout: int = 45,
+    ) -> Optional[str]:
+        """Rendered-enough HTML for ``url``: HTTP if it has ``required``, else the browser."""
+
+        if self.cache is not None:
+            cached = self.cache.get(url, allow_stale=self.replay)
+            if cached is not None:
+                self._count("cache")
+                default_metrics().inc("cache_hits", source="batdongsan")
+                return cached.html
+            if self.replay:
+                print(f"[WARN] Not in cache (replay): {url}")
+                return None
+
+        html, status = self._try_http(url, required)
+        if html is not None:
+            self._count("http")
+        else:
+            html, status = self.pool.fetch_page(url, wait_selectors, timeout)
+            self._count("browser")
+        if self.cache is not None and is_cacheable(html, status):
+            self.cache.put(url, html, status=status)
+        return html
+
+    def fetch_listing_html(self, url: str, timeout: int = 30) -> Optional[str]:
+        return self.fetch_html(url, LISTING_REQUIRED, [(LISTING_CARD_SELECTOR, timeout * 1000)], timeout)
+
+    def fetch_detail_html(self, url: str, timeout: int = 45) -> Optional[str]:
+        return self.fetch_html(url, DETAIL_REQUIRED, DETAIL_WAIT_SELECTORS, timeout)
+
+    def collect_links(self, listing_url: str, timeout: int = 45, max_links: Optional[int] = None) -> List[str]:
+        """Return unique absolute detail URLs found on one listing page."""
+
+        html, _ = self._try_http(listing_url, LINKS_REQUIRED)
+        if html is None:
+            self._count("browser")
+            return self.pool.collect_links(listing_url, timeout=timeout, max_links=max_links)
+        self._count("http")
+        soup = make_soup(html, parse_only=SoupStrainer("a", class_=LISTING_LINK_SELECTOR.split(".", 1)[1]))
+        hrefs = [a.get("href") for a in soup.select(LISTING_LINK_SELECTOR)]
+        return _normalize_links([href for href in hrefs if href], max_links)
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            fetched = self.counts["http"] + self.counts["browser"]
+            return {
+                "http": self.counts["http"],
+                "browser": self.counts["browser"],
+                "cache": self.counts["cache"],
+                "http_ratio": round(self.counts["http"] / fetched, 3) if fetched else None,
+                "http_misses": dict(self.http_misses),
+            }
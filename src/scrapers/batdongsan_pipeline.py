@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.scrapers.batdongsan_detail import parse_detail_html
+from src.scrapers.batdongsan_scraper import _parse_cards_from_html
+from src.utils.metrics import default_metrics
+
+# Marks the end of the fetch stage on the HTML queue.
+_DONE = object()
+
+
+def _parse_page(kind: str, html: str, url: str) -> Tuple[List[Dict[str, object]], float]:
+    # Runs inside the worker processes, so it must stay a module-level function.
+    # Metrics recorded there stay in the worker; the parse time is sent back instead.
+    start = time.perf_counter()
+    if kind == "cards":
+        rows = _parse_cards_from_html(html, url)
+    elif kind == "detail":
+        rows = [parse_detail_html(html, url)]
+    else:
+        raise ValueError(f"Unknown page kind: {kind!r} (expected 'cards' or 'detail')")
+    return rows, time.perf_counter() - start
+
+
+class PipelineStats:
+    """Counters for :func:`run_pipeline`, safe to read while it runs."""
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.fetched = 0
+        self.fetch_failed = 0
+        self.parsed = 0
+        self.parse_failed = 0
+        self.rows = 0
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.in_flight = 0
+        self.fetch_seconds = 0.0
+        self._queue_depth_total = 0
+        self._queue_depth_samples = 0
+        self._lock = threading.Lock()
+
+    def _sample_queue(self, depth: int) -> None:
+        self.queue_depth = depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+        self._queue_depth_total += depth
+        self._queue_depth_samples += 1
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self) -> Dict[str, float]:
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "fetched": self.fetched,
+            "fetch_failed": self.fetch_failed,
+            "parsed": self.parsed,
+            "parse_failed": self.parse_failed,
+            "rows": self.rows,
+            "fetch_s_per_page": round(self.fetch_seconds / max(self.fetched + self.fetch_failed, 1), 3),
+            "pages_per_s": round(self.fetched / elapsed, 3),
+            "rows_per_s": round(self.rows / elapsed, 3),
+            "queue_depth": self.queue_depth,
+            "queue_depth_max": self.queue_depth_max,
+            "queue_depth_mean": round(self._queue_depth_total / max(self._queue_depth_samples, 1), 2),
+            "queue_size": self.queue_size,
+        }
+
+    def report(self) -> str:
+        s = self.summary()
+        # A queue that stays full means parsing is the bottleneck; an empty one means fetching is.
+        return (
+            f"[PIPE] {s['elapsed_s']:.0f}s fetched={s['fetched']} (failed {s['fetch_failed']}) "
+            f"parsed={s['parsed']} (failed {s['parse_failed']}) rows={s['rows']} "
+            f"rows/s={s['rows_per_s']:.2f} queue={s['queue_depth']}/{s['queue_size']} "
+            f"(mean {s['queue_depth_mean']}, max {s['queue_depth_max']})"
+        )
+
+
+def run_pipeline(
+    urls: Iterable[str],
+    fetch: Callable[[str], Optional[str]],
+    kind: str = "detail",
+    fetch_workers: int = 1,
+    parse_workers: Optional[int] = None,
+    queue_size: int = 32,
+    report_every: Optional[float] = 30.0,
+    stats: Optional[PipelineStats] = None,
+) -> Tuple[List[Dict[str, object]], PipelineStats]:
+    """Fetch ``urls`` and parse them in a process pool, overlapping both stages.
+
+    ``fetch_workers`` threads call ``fetch(url)`` (e.g. ``BrowserPool.fetch_detail_html``)
+    and push the raw HTML into a queue of at most ``queue_size`` pages. The
+    calling thread hands pages to ``parse_workers`` processes, keeping at most
+    two tasks per worker in flight. Both bounds block the stage in front of them,
+    so memory stays flat however many URLs there are.
+
+    ``kind`` selects the parser: ``"detail"`` for :func:`parse_detail_html`,
+    ``"cards"`` for listing pages. Rows come back in URL order.
+    """
+
+    if fetch_workers < 1:
+        raise ValueError("fetch_workers must be >= 1")
+    if kind not in ("cards", "detail"):
+        raise ValueError(f"Unknown page kind: {kind!r} (expected 'cards' or 'detail')")
+
+    stats = stats or PipelineStats(queue_size)
+    metrics = default_metrics()
+    html_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    url_iter = iter(enumerate(urls))
+    url_lock = threading.Lock()
+    stop = threading.Event()
+
+    def fetcher() -> None:
+        try:
+            while not stop.is_set():
+                with url_lock:
+                    try:
+                        index, url = next(url_iter)
+                    except StopIteration:
+                        return
+                start = time.monotonic()
+                try:
+                    html = fetch(url)
+                except Exception as exc:
+                    html = None
+                    print(f"[WARN] Fetch failed for {url}: {exc}")
+                elapsed = time.monotonic() - start
+                metrics.observe("batdongsan", "fetch", elapsed)
+                with stats._lock:
+                    stats.fetch_seconds += elapsed
+                    if html is None:
+                        stats.fetch_failed += 1
+                    else:
+                        stats.fetched += 1
+                if html is not None:
+                    html_queue.put((index, url, html))
+        finally:
+            html_queue.put(_DONE)
+
+    threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetch_workers)]
+    for thread in threads:
+        thread.start()
+
+    results: Dict[int, List[Dict[str, object]]] = {}
+    pending: Dict[concurrent.futures.Future, Tuple[int, str]] = {}
+    last_report = time.monotonic()
+
+    def collect(done) -> None:
+        for future in done:
+            index, url = pending.pop(future)
+            try:
+                rows, seconds = future.result()
+            except Exception as exc:
+                stats.parse_failed += 1
+                metrics.record_error("batdongsan", f"parse_{kind}", exc)
+                print(f"[WARN] Parse failed for {url}: {exc}")
+                continue
+            metrics.observe("batdongsan", f"parse_{kind}", seconds)
+            # The detail parser flags Cloudflare pages in a "blocked" column.
+            blocked = sum(1 for row in rows if row.get("blocked"))
+            if blocked:
+                metrics.inc("blocked_rows", blocked, source="batdongsan")
+            stats.parsed += 1
+            stats.rows += len(rows)
+            results[index] = rows
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    max_in_flight = 2 * parse_workers
+    with concurrent.futures.ProcessPoolExecutor(max_workers=parse_workers) as executor:
+        fetchers_left = fetch_workers
+        try:
+            while fetchers_left:
+                item = html_queue.get()
+                stats._sample_queue(html_queue.qsize())
+                if item is _DONE:
+                    fetchers_left -= 1
+                    continue
+
+                index, url, html = item
+                pending[executor.submit(_parse_page, kind, html, url)] = (index, url)
+                stats.in_flight = len(pending)
+                if len(pending) >= max_in_flight:
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+
+                if report_every and time.monotonic() - last_report >= report_every:
+                    print(stats.report())
+                    last_report = time.monotonic()
+
+            collect(concurrent.futures.wait(pending).done)
+        finally:
+            stop.set()
+            # Unblock fetchers stuck on a full queue so they can exit.
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    html_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            stats.in_flight = 0
+
+    stats.finished = time.monotonic()
+    if report_every:
+        print(stats.report())
+
+    rows: List[Dict[str, object]] = []
+    for index in sorted(results):
+        rows.extend(results[index])
+    return rows, stats
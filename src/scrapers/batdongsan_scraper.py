@@ -4,11 +4,20 @@ import os
 import random
 import re
 import sys
+import threading
 import time
 import unicodedata
 from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
 
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+
+from src.scrapers.html_backend import make_soup
+from src.scrapers.resource_blocking import ResourceBlocker
+from src.utils.html_cache import HtmlCache, is_cacheable
+from src.utils.metrics import default_metrics
+from src.utils.rate_limit import HostThrottles, block_reason, is_challenge_page
+from src.utils.vn_location import resolve_location
 
 BASE_URL = "https://batdongsan.com.vn/"
 
@@ -98,39 +107,8 @@ def parse_integer(text: Optional[str]) -> Optional[int]:
 def parse_location_vn(text: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
     """Parse Vietnamese location into (street, ward, district, city)."""
 
-    if not text:
-        return None, None, None, None
-    parts = [part.strip() for part in text.split(",") if part.strip()]
-    if not parts:
-        return None, None, None, None
-
-    # Heuristic: last component is city for common cities.
-    city = None
-    if len(parts) >= 2:
-        last = parts[-1].lower()
-        if any(
-            key in last
-            for key in [
-                "ho chi minh",
-                "hồ chí minh",
-                "ha noi",
-                "hà nội",
-                "da nang",
-                "đà nẵng",
-            ]
-        ):
-            city = parts[-1]
-            parts = parts[:-1]
-
-    if len(parts) == 1:
-        return None, None, parts[0], city
-    if len(parts) == 2:
-        return None, None, parts[0], city or parts[1]
-
-    street = ", ".join(parts[:-2])
-    ward = parts[-2]
-    district = parts[-1]
-    return street or None, ward or None, district or None, city
+    # Cached single pass over the province/district gazetteer.
+    return tuple(resolve_location(text))
 
 
 def _has_red_book(description: Optional[str]) -> bool:
@@ -189,79 +167,586 @@ def _parse_card(card, source_url: str) -> Dict[str, Optional[object]]:
     }
 
 
-def _parse_cards_from_html(html: str, source_url: str) -> List[Dict[str, Optional[object]]]:
-    soup = BeautifulSoup(html, "html.parser")
-    cards = soup.select("div.re__card-info")
-    return [_parse_card(card, source_url) for card in cards]
+def _record_page(status: Optional[int], html: Optional[str]) -> None:
+    metrics = default_metrics()
+    metrics.record_status("batdongsan", status)
+    if status in (403, 429) or is_challenge_page(html):
+        metrics.record_blocked("batdongsan", block_reason(status))
 
 
-def _scrape_properties_with_playwright_sync(
-    urls: Iterable[str],
-    sleep_range: Tuple[float, float],
-    timeout: int,
-    cookies: Optional[str],
-    headless: bool,
+# bs4 backends only build the card subtrees; nothing outside them is read.
+CARD_STRAINER = SoupStrainer("div", class_="re__card-info")
+
+
+def _parse_cards_from_html(
+    html: str,
+    source_url: str,
+    backend: Optional[str] = None,
 ) -> List[Dict[str, Optional[object]]]:
-    _ensure_windows_proactor_policy()
+    with default_metrics().timer("batdongsan", "parse_cards"):
+        soup = make_soup(html, backend=backend, parse_only=CARD_STRAINER)
+        cards = soup.select("div.re__card-info")
+        return [_parse_card(card, source_url) for card in cards]
+
+
+LISTING_CARD_SELECTOR = "div.re__card-info"
+LISTING_LINK_SELECTOR = "a.js__product-link-for-product-id"
+
+# (selector, timeout in ms) pairs awaited after a detail page navigation.
+DETAIL_WAIT_SELECTORS: Tuple[Tuple[str, int], ...] = (
+    (".re__pr-specs", 8000),
+    # verified badge block may render after specs; wait briefly if present
+    (".re__pr-listing-verified-section", 3000),
+)
+
+
+def _build_extra_headers(cookies: Optional[str]) -> Dict[str, str]:
+    extra_headers = {"Referer": BASE_URL}
+    cookie_header = cookies or os.getenv("BDS_COOKIE")
+    if cookie_header:
+        extra_headers["Cookie"] = cookie_header
+    return extra_headers
+
+
+def _normalize_links(hrefs: Iterable[object], max_links: Optional[int] = None) -> List[str]:
+    links = []
+    for href in hrefs or []:
+        href = str(href)
+        if href.startswith("/"):
+            href = BASE_URL.rstrip("/") + href
+        if href.startswith("http"):
+            links.append(href)
+
+    # unique + optional limit
+    links = list(dict.fromkeys(links))
+    if max_links:
+        links = links[:max_links]
+    return links
+
+
+class BrowserPool:
+    """Warm Chromium contexts shared by listing-link and detail-page fetches.
+
+    The browser is launched once and ``size`` contexts are created with the
+    User-Agent, Referer and cookie headers applied up front. Fetches rotate
+    over the contexts; each context keeps one page that is replaced after
+    ``max_navigations`` navigations so long crawls do not accumulate memory.
+    Pass a :class:`ResourceBlocker` as ``blocker`` to skip images, fonts, ads
+    and trackers on every context. With :class:`HostThrottles` as
+    ``throttle``, navigations are paced per host and the pace adapts to
+    403/429 responses, Cloudflare challenge pages, errors and slow loads.
+
+    With an :class:`HtmlCache` as ``cache``, fresh cached pages are served
+    without navigating and every fetched page is stored, except 403/429,
+    other non-2xx and challenge pages. ``replay=True`` reads only from the
+    cache (stale entries included) and never launches Chromium; uncached URLs
+    come back as ``None``.
+
+    Sync Playwright objects belong to the thread that created them, so every
+    browser call runs on one dedicated worker thread. That also keeps the pool
+    usable from notebooks, whose main thread already runs an event loop.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        cookies: Optional[str] = None,
+        headless: bool = True,
+        max_navigations: int = 50,
+        blocker: Optional[ResourceBlocker] = None,
+        cache: Optional[HtmlCache] = None,
+        replay: bool = False,
+        throttle: Optional[HostThrottles] = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        if max_navigations < 1:
+            raise ValueError("max_navigations must be >= 1")
+        self.size = size
+        self.cookies = cookies
+        self.headless = headless
+        self.max_navigations = max_navigations
+        self.blocker = blocker
+        self.cache = cache
+        self.replay = replay
+        self.throttle = throttle
+        if replay and cache is None:
+            raise ValueError("replay=True needs a cache")
+        self.navigations = 0
+        self.pages_recycled = 0
+
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._playwright = None
+        self._browser = None
+        self._timeout_error = Exception
+        self._slots: List[Dict[str, object]] = []
+        self._next_slot = 0
+        self._start_lock = threading.Lock()
+
+    def __enter__(self) -> "BrowserPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> "BrowserPool":
+        if self._executor is not None or self.replay:
+            return self
+        # Concurrent first fetches (e.g. HybridFetcher fallbacks) must launch one browser, not one each.
+        with self._start_lock:
+            if self._executor is not None:
+                return self
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            try:
+                executor.submit(self._start_sync).result()
+            except BaseException:
+                self._executor = executor
+                self.close()
+                raise
+            self._executor = executor
+        return self
+
+    def close(self) -> None:
+        if self._executor is None:
+            return
+        try:
+            self._executor.submit(self._close_sync).result()
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _call(self, fn, *args):
+        if self._executor is None:
+            self.start()
+        return self._executor.submit(fn, *args).result()
+
+    def _start_sync(self) -> None:
+        _ensure_windows_proactor_policy()
+
+        try:
+            from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+            from playwright.sync_api import sync_playwright
+        except ImportError as exc:
+            raise ImportError(
+                "Playwright is required. Install with: pip install playwright; playwright install"
+            ) from exc
+
+        self._timeout_error = PlaywrightTimeoutError
+        with default_metrics().timer("batdongsan", "launch"):
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=self.headless)
+
+        extra_headers = _build_extra_headers(self.cookies)
+        for _ in range(self.size):
+            context = self._browser.new_context(user_agent=DEFAULT_HEADERS["User-Agent"])
+            context.set_extra_http_headers(extra_headers)
+            if self.blocker is not None:
+                self.blocker.attach(context)
+            self._slots.append({"context": context, "page": None, "navigations": 0})
+
+    def _close_sync(self) -> None:
+        for slot in self._slots:
+            try:
+                slot["context"].close()
+            except Exception:
+                pass
+        self._slots = []
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
 
-    try:
-        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
-        from playwright.sync_api import sync_playwright
-    except ImportError as exc:
-        raise ImportError(
-            "Playwright is required. Install with: pip install playwright; playwright install"
-        ) from exc
+    def _next_page(self):
+        slot = self._slots[self._next_slot]
+        self._next_slot = (self._next_slot + 1) % len(self._slots)
+
+        page = slot["page"]
+        if page is not None and slot["navigations"] >= self.max_navigations:
+            try:
+                page.close()
+            except Exception:
+                pass
+            page = None
+            self.pages_recycled += 1
+        if page is None:
+            page = slot["context"].new_page()
+            slot["page"] = page
+            slot["navigations"] = 0
+
+        slot["navigations"] += 1
+        self.navigations += 1
+        return slot, page
+
+    def _goto_sync(self, url: str, wait_selectors: Iterable[Tuple[str, int]], timeout: int):
+        metrics = default_metrics()
+        slot, page = self._next_page()
+        try:
+            with metrics.timer("batdongsan", "goto"):
+                response = page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+        except Exception as exc:
+            metrics.record_error("batdongsan", "goto", exc)
+            # A failed navigation can leave the page in a bad state; start fresh next time.
+            slot["navigations"] = self.max_navigations
+            raise
+        for selector, selector_timeout in wait_selectors:
+            try:
+                with metrics.timer("batdongsan", f"wait {selector}"):
+                    page.wait_for_selector(selector, timeout=selector_timeout)
+            except self._timeout_error:
+                metrics.inc("selector_timeouts", source="batdongsan", selector=selector)
+        return page, (response.status if response is not None else None)
+
+    def _fetch_html_sync(
+        self, url: str, wait_selectors: Iterable[Tuple[str, int]], timeout: int
+    ) -> Tuple[str, Optional[int], str]:
+        page, status = self._goto_sync(url, wait_selectors, timeout)
+        with default_metrics().timer("batdongsan", "content"):
+            html = page.content()
+        _record_page(status, html)
+        return html, status, html
+
+    def _collect_links_sync(
+        self, listing_url: str, timeout: int, max_links: Optional[int]
+    ) -> Tuple[List[str], Optional[int], str]:
+        page, status = self._goto_sync(listing_url, [(LISTING_LINK_SELECTOR, timeout * 1000)], timeout)
+        # A challenge page answers 200 too; only its content gives it away.
+        with default_metrics().timer("batdongsan", "content"):
+            html = page.content()
+        _record_page(status, html)
+        # Extract hrefs directly from DOM
+        try:
+            hrefs = page.eval_on_selector_all(
+                LISTING_LINK_SELECTOR,
+                "els => els.map(e => e.getAttribute('href') || e.href).filter(Boolean)",
+            )
+        except Exception:
+            hrefs = []
+        return _normalize_links(hrefs, max_links), status, html
+
+    def _navigate(self, url: str, fn, *args):
+        # Run one navigation on the browser thread, paced and fed back to the host throttle.
+        # ``fn`` returns ``(result, status, html)``; the html lets the throttle spot challenge pages.
+        if self.throttle is None:
+            result, status, _ = self._call(fn, *args)
+            return result, status
+        throttle = self.throttle.for_url(url)
+        default_metrics().observe("batdongsan", "sleep", throttle.wait())
+        start = time.perf_counter()
+        try:
+            result, status, html = self._call(fn, *args)
+        except Exception:
+            throttle.record(error=True)
+            raise
+        throttle.record(status, time.perf_counter() - start, html)
+        return result, status
+
+    def fetch_page(
+        self,
+        url: str,
+        wait_selectors: Iterable[Tuple[str, int]] = (),
+        timeout: int = 45,
+    ) -> Tuple[Optional[str], Optional[int]]:
+        """Like :meth:`fetch_html`, but return ``(html, status)``."""
+
+        if self.cache is not None:
+            cached = self.cache.get(url, allow_stale=self.replay)
+            if cached is not None:
+                default_metrics().inc("cache_hits", source="batdongsan")
+                return cached.html, cached.status
+            if self.replay:
+                print(f"[WARN] Not in cache (replay): {url}")
+                return None, None
+
+        html, status = self._navigate(url, self._fetch_html_sync, url, tuple(wait_selectors), timeout)
+        if self.cache is not None and is_cacheable(html, status):
+            self.cache.put(url, html, status=status)
+        return html, status
+
+    def fetch_html(
+        self,
+        url: str,
+        wait_selectors: Iterable[Tuple[str, int]] = (),
+        timeout: int = 45,
+    ) -> Optional[str]:
+        """Navigate a warm page to ``url`` and return the rendered HTML.
+
+        Goes through the cache when one is set; ``None`` only in replay mode
+        for URLs that were never cached.
+        """
+
+        return self.fetch_page(url, wait_selectors, timeout)[0]
+
+    def fetch_listing_html(self, url: str, timeout: int = 30) -> Optional[str]:
+        return self.fetch_html(url, [(LISTING_CARD_SELECTOR, timeout * 1000)], timeout)
+
+    def fetch_detail_html(self, url: str, timeout: int = 45) -> Optional[str]:
+        return self.fetch_html(url, DETAIL_WAIT_SELECTORS, timeout)
+
+    def collect_links(self, listing_url: str, timeout: int = 45, max_links: Optional[int] = None) -> List[str]:
+        """Return unique absolute detail URLs found on one listing page."""
+
+        links, _ = self._navigate(listing_url, self._collect_links_sync, listing_url, timeout, max_links)
+        return links
+
+
+def scrape_properties_with_playwright_threaded(
+    urls: Iterable[str],
+    sleep_range: Tuple[float, float] = (1.5, 3.5),
+    timeout: int = 30,
+    cookies: Optional[str] = None,
+    headless: bool = True,
+    pool: Optional[BrowserPool] = None,
+    blocker: Optional[ResourceBlocker] = None,
+    cache: Optional[HtmlCache] = None,
+    replay: bool = False,
+    throttle: Optional[HostThrottles] = None,
+) -> List[Dict[str, Optional[object]]]:
+    """Used by the notebook 'Playwright fallback' cell.
+
+    Pass ``pool`` to reuse an already running :class:`BrowserPool`; otherwise a
+    single-context pool is started for this call and closed afterwards, with
+    ``blocker``, ``cache``, ``replay`` and ``throttle`` passed on to it.
+    ``replay=True`` re-parses cached listing pages without any network access.
+    When the pool has a throttle it paces the navigations and the fixed
+    ``sleep_range`` pause is skipped.
+    """
+
+    owns_pool = pool is None
+    if pool is None:
+        pool = BrowserPool(
+            cookies=cookies, headless=headless, blocker=blocker, cache=cache, replay=replay, throttle=throttle
+        )
 
     url_list = list(urls)
     all_rows: List[Dict[str, Optional[object]]] = []
+    try:
+        for index, url in enumerate(url_list):
+            navigations = pool.navigations
+            html = pool.fetch_listing_html(url, timeout=timeout)
+            if html is not None:
+                all_rows.extend(_parse_cards_from_html(html, url))
+
+            # Cache hits never touch the site, so only real navigations need a pause.
+            if pool.throttle is None and pool.navigations != navigations and index < len(url_list) - 1:
+                with default_metrics().timer("batdongsan", "sleep"):
+                    time.sleep(random.uniform(*sleep_range))
+    finally:
+        if owns_pool:
+            pool.close()
 
-    with sync_playwright() as playwright:
-        browser = playwright.chromium.launch(headless=headless)
-        context = browser.new_context(user_agent=DEFAULT_HEADERS["User-Agent"])
+    return all_rows
 
-        extra_headers = {"Referer": BASE_URL}
-        cookie_header = cookies or os.getenv("BDS_COOKIE")
-        if cookie_header:
-            extra_headers["Cookie"] = cookie_header
-        context.set_extra_http_headers(extra_headers)
 
-        page = context.new_page()
+class _HostPoliteness:
+    """Space out request starts per host for the async engine.
 
-        for index, url in enumerate(url_list):
-            page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
-            try:
-                page.wait_for_selector("div.re__card-info", timeout=timeout * 1000)
-            except PlaywrightTimeoutError:
-                pass
+    Each host gets its own lock and "next allowed start" timestamp, so tasks
+    for one host wait ``random.uniform(*interval_range)`` seconds after the
+    previous start while other hosts are not held back.
+    """
 
-            html = page.content()
-            all_rows.extend(_parse_cards_from_html(html, url))
+    def __init__(self, interval_range: Tuple[float, float]) -> None:
+        self.interval_range = interval_range
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_start: Dict[str, float] = {}
 
-            if index < len(url_list) - 1:
-                time.sleep(random.uniform(*sleep_range))
+    async def wait(self, url: str) -> None:
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_start.get(host, 0.0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start[host] = loop.time() + random.uniform(*self.interval_range)
 
-        context.close()
-        browser.close()
 
-    return all_rows
+async def fetch_pages_async(
+    urls: Iterable[str],
+    wait_selectors: Iterable[Tuple[str, int]] = DETAIL_WAIT_SELECTORS,
+    concurrency: int = 4,
+    host_interval: Tuple[float, float] = (0.5, 1.5),
+    timeout: int = 45,
+    cookies: Optional[str] = None,
+    headless: bool = True,
+    max_navigations: int = 50,
+    blocker: Optional[ResourceBlocker] = None,
+    cache: Optional[HtmlCache] = None,
+    replay: bool = False,
+    throttle: Optional[HostThrottles] = None,
+) -> List[Tuple[str, Optional[str]]]:
+    """Fetch rendered HTML for ``urls`` with up to ``concurrency`` pages in flight.
+
+    A semaphore bounds the number of open navigations and ``host_interval``
+    spaces out navigation starts per host; with ``throttle`` the per-host pace
+    adapts to blocks, errors and latency instead. Results keep the input
+    order; a URL whose navigation failed is returned with ``None`` instead of
+    HTML. ``cache``/``replay`` behave as in :class:`BrowserPool`.
+    """
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    if replay and cache is None:
+        raise ValueError("replay=True needs a cache")
 
+    url_list = list(urls)
+    results: List[Optional[str]] = [None] * len(url_list)
+    to_fetch: List[Tuple[int, str]] = []
+    for index, url in enumerate(url_list):
+        cached = cache.get(url, allow_stale=replay) if cache is not None else None
+        if cached is not None:
+            default_metrics().inc("cache_hits", source="batdongsan")
+            results[index] = cached.html
+        elif replay:
+            print(f"[WARN] Not in cache (replay): {url}")
+        else:
+            to_fetch.append((index, url))
+    if not to_fetch:
+        return list(zip(url_list, results))
 
-def scrape_properties_with_playwright_threaded(
+    try:
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        from playwright.async_api import async_playwright
+    except ImportError as exc:
+        raise ImportError(
+            "Playwright is required. Install with: pip install playwright; playwright install"
+        ) from exc
+
+    selectors = tuple(wait_selectors)
+    semaphore = asyncio.Semaphore(concurrency)
+    politeness = _HostPoliteness(host_interval)
+    metrics = default_metrics()
+
+    async with async_playwright() as playwright:
+        with metrics.timer("batdongsan", "launch"):
+            browser = await playwright.chromium.launch(headless=headless)
+        context = await browser.new_context(user_agent=DEFAULT_HEADERS["User-Agent"])
+        await context.set_extra_http_headers(_build_extra_headers(cookies))
+        if blocker is not None:
+            await blocker.attach_async(context)
+
+        # One reusable page per semaphore slot: [page, navigations]
+        free_slots: List[List[object]] = [[None, 0] for _ in range(concurrency)]
+
+        async def fetch_one(index: int, url: str) -> None:
+            async with semaphore:
+                slot = free_slots.pop()
+                host_throttle = throttle.for_url(url) if throttle is not None else None
+                stage = "page"
+                try:
+                    # Any failure (crashed page, closed target, ...) only loses this URL, never the batch.
+                    try:
+                        page, navigations = slot
+                        if page is not None and navigations >= max_navigations:
+                            await page.close()
+                            page = None
+                        if page is None:
+                            page = await context.new_page()
+                            navigations = 0
+                        slot[0], slot[1] = page, navigations + 1
+
+                        with metrics.timer("batdongsan", "sleep"):
+                            if host_throttle is not None:
+                                await asyncio.sleep(host_throttle.reserve())
+                            else:
+                                await politeness.wait(url)
+                        started = time.perf_counter()
+                        stage = "goto"
+                        with metrics.timer("batdongsan", "goto"):
+                            response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+                        stage = "wait"
+                        for selector, selector_timeout in selectors:
+                            try:
+                                with metrics.timer("batdongsan", f"wait {selector}"):
+                                    await page.wait_for_selector(selector, timeout=selector_timeout)
+                            except PlaywrightTimeoutError:
+                                metrics.inc("selector_timeouts", source="batdongsan", selector=selector)
+                        stage = "content"
+                        with metrics.timer("batdongsan", "content"):
+                            html = await page.content()
+                    except Exception as exc:
+                        metrics.record_error("batdongsan", stage, exc)
+                        if host_throttle is not None:
+                            host_throttle.record(error=True)
+                        print(f"[WARN] Fetch failed for {url}: {exc}")
+                        # A failed page can be left in a bad state; start fresh next time.
+                        slot[1] = max_navigations
+                        return
+                    results[index] = html
+                    status = response.status if response is not None else None
+                    _record_page(status, html)
+                    if host_throttle is not None:
+                        host_throttle.record(status, time.perf_counter() - started, html)
+                    if cache is not None and is_cacheable(html, status):
+                        cache.put(url, html, status=status)
+                finally:
+                    free_slots.append(slot)
+
+        try:
+            await asyncio.gather(*(fetch_one(i, url) for i, url in to_fetch))
+        finally:
+            await context.close()
+            await browser.close()
+
+    return list(zip(url_list, results))
+
+
+async def scrape_properties_async(
     urls: Iterable[str],
-    sleep_range: Tuple[float, float] = (1.5, 3.5),
+    concurrency: int = 4,
+    host_interval: Tuple[float, float] = (0.5, 1.5),
     timeout: int = 30,
     cookies: Optional[str] = None,
     headless: bool = True,
+    blocker: Optional[ResourceBlocker] = None,
+    cache: Optional[HtmlCache] = None,
+    replay: bool = False,
+    throttle: Optional[HostThrottles] = None,
 ) -> List[Dict[str, Optional[object]]]:
-    """Used by the notebook 'Playwright fallback' cell."""
+    """Async counterpart of :func:`scrape_properties_with_playwright_threaded`."""
+
+    pages = await fetch_pages_async(
+        urls,
+        wait_selectors=[(LISTING_CARD_SELECTOR, timeout * 1000)],
+        concurrency=concurrency,
+        host_interval=host_interval,
+        timeout=timeout,
+        cookies=cookies,
+        headless=headless,
+        blocker=blocker,
+        cache=cache,
+        replay=replay,
+        throttle=throttle,
+    )
+    all_rows: List[Dict[str, Optional[object]]] = []
+    for url, html in pages:
+        if html is not None:
+            all_rows.extend(_parse_cards_from_html(html, url))
+    return all_rows
+
+
+def _run_coroutine_threaded(coroutine):
+    # Notebooks already run an event loop on the main thread, so run ours on a worker.
+    def runner():
+        _ensure_windows_proactor_policy()
+        return asyncio.run(coroutine)
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(
-            _scrape_properties_with_playwright_sync,
-            urls,
-            sleep_range,
-            timeout,
-            cookies,
-            headless,
-        )
-        return future.result()
+        return executor.submit(runner).result()
+
+
+def fetch_pages_concurrent(urls: Iterable[str], **kwargs) -> List[Tuple[str, Optional[str]]]:
+    """Blocking wrapper around :func:`fetch_pages_async` for notebooks and scripts."""
+
+    return _run_coroutine_threaded(fetch_pages_async(urls, **kwargs))
+
+
+def scrape_properties_concurrent(urls: Iterable[str], **kwargs) -> List[Dict[str, Optional[object]]]:
+    """Blocking wrapper around :func:`scrape_properties_async` for notebooks and scripts."""
+
+    return _run_coroutine_threaded(scrape_properties_async(urls, **kwargs))
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Optional
+
+from bs4 import BeautifulSoup
+
+# Backends in order of preference. "selectolax" wraps the lexbor parser, the
+# other two are bs4 tree builders.
+HTML_BACKENDS = ("selectolax", "lxml", "html.parser")
+
+# bs4 never returns strings that live inside these tags from get_text() or
+# stripped_strings (they become Script/Stylesheet/TemplateString/Ruby* nodes).
+_SKIP_STRING_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+def _detect_backend() -> str:
+    try:
+        import selectolax.lexbor  # noqa: F401
+
+        return "selectolax"
+    except ImportError:
+        pass
+    try:
+        import lxml  # noqa: F401
+
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+HTML_BACKEND = _detect_backend()
+
+
+class SelectolaxNode:
+    """Lexbor node exposing the subset of the bs4 ``Tag`` API our parsers use.
+
+    Only ``select``, ``select_one``, ``get_text``, ``stripped_strings``,
+    ``get`` and ``title`` are provided, with bs4 semantics, so the card and
+    detail extractors run unchanged on either backend.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node) -> None:
+        self._node = node
+
+    @property
+    def name(self) -> str:
+        return self._node.tag
+
+    @property
+    def title(self) -> Optional["SelectolaxNode"]:
+        return self.select_one("title")
+
+    def select(self, selector: str) -> List["SelectolaxNode"]:
+        return [SelectolaxNode(node) for node in self._node.css(selector)]
+
+    def select_one(self, selector: str) -> Optional["SelectolaxNode"]:
+        node = self._node.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._node.attributes.get(key)
+        return default if value is None else value
+
+    def _strings(self) -> Iterator[str]:
+        stack = list(reversed(list(self._node.iter(include_text=True))))
+        while stack:
+            node = stack.pop()
+            tag = node.tag
+            if tag == "-text":
+                yield node.text_content
+            elif not tag.startswith("-") and tag not in _SKIP_STRING_TAGS:
+                stack.extend(reversed(list(node.iter(include_text=True))))
+
+    @property
+    def stripped_strings(self) -> Iterator[str]:
+        for text in self._strings():
+            text = text.strip()
+            if text:
+                yield text
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        strings = self.stripped_strings if strip else self._strings()
+        return separator.join(strings)
+
+
+def make_soup(html: Optional[str], backend: Optional[str] = None, parse_only=None):
+    """Parse ``html`` with the chosen backend (default: fastest installed).
+
+    ``parse_only`` is a bs4 ``SoupStrainer`` and only applies to the bs4
+    backends; selectolax parses the whole document in less time than bs4
+    needs for the strained one.
+    """
+
+    backend = backend or HTML_BACKEND
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+
+        return SelectolaxNode(LexborHTMLParser(html or "").root)
+    if backend not in HTML_BACKENDS:
+        raise ValueError(f"Unknown HTML backend: {backend!r} (expected one of {HTML_BACKENDS})")
+    return BeautifulSoup(html or "", backend, parse_only=parse_only)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.scrapers import shopee_scraper as shopee
+from src.scrapers import tiki_scraper as tiki
+from src.utils.api_archive import ApiArchive, ArchiveEntry, read_entry
+from src.utils.columnar import ColumnarRows
+
+# Records handed to one worker task; large enough to amortise the process round-trip.
+CHUNK_SIZE = 64
+
+
+def _split_key(key: str) -> Tuple[str, int]:
+    # "<keyword>/<page or offset>"; the keyword itself may contain "/".
+    head, _, tail = key.rpartition("/")
+    return head, int(tail)
+
+
+def _extract_chunk(root: str, entries: List[ArchiveEntry]) -> List[Tuple[str, List[Dict[str, object]]]]:
+    # Runs inside the worker processes, so it must stay a module-level function.
+    out = []
+    for entry in entries:
+        payload = read_entry(root, entry) or {}
+        if entry.source == "tiki":
+            rows = [tiki._build_row(item) for item in payload.get("data") or []]
+        elif entry.source == "shopee" and entry.kind == "item":
+            itemid, shopid = (int(part) for part in entry.key.split("/"))
+            rows = [shopee._build_detail_row(itemid, shopid, payload.get("item") or {})]
+        else:
+            raise ValueError(f"Nothing to extract from {entry.source}/{entry.kind}")
+        out.append((entry.key, rows))
+    return out
+
+
+def _extract(
+    root: str | Path, entries: Sequence[ArchiveEntry], workers: Optional[int]
+) -> Dict[str, List[Dict[str, object]]]:
+    """Rows per archive key, decoded and built by ``workers`` processes."""
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [list(entries[i:i + CHUNK_SIZE]) for i in range(0, len(entries), CHUNK_SIZE)]
+    results: Dict[str, List[Dict[str, object]]] = {}
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            results.update(_extract_chunk(str(root), chunk))
+        return results
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(_extract_chunk, [str(root)] * len(chunks), chunks):
+            results.update(part)
+    return results
+
+
+def reextract_tiki(
+    archive: ApiArchive, keywords: Optional[Iterable[str]] = None, workers: Optional[int] = None
+) -> Dict[str, pd.DataFrame]:
+    """Rebuild ``fetch_tiki_products_many``'s frames from archived search pages, in page order.
+
+    The crawl archives only the pages it kept (not the page it stopped at),
+    so every archived page of a keyword is used.
+    """
+
+    pages: Dict[str, List[Tuple[int, ArchiveEntry]]] = {}
+    for entry in archive.entries("tiki", "search"):
+        keyword, page = _split_key(entry.key)
+        pages.setdefault(keyword, []).append((page, entry))
+    wanted = list(dict.fromkeys(keywords)) if keywords is not None else sorted(pages)
+    entries = [entry for keyword in wanted for _, entry in sorted(pages.get(keyword, []))]
+    rows_by_key = _extract(archive.root, entries, workers)
+
+    frames: Dict[str, pd.DataFrame] = {}
+    for keyword in wanted:
+        rows = ColumnarRows()
+        for _, entry in sorted(pages.get(keyword, [])):
+            rows.extend(rows_by_key.pop(entry.key))
+        frames[keyword] = rows.to_pandas()
+    return frames
+
+
+def reextract_shopee(
+    archive: ApiArchive, keywords: Optional[Iterable[str]] = None, workers: Optional[int] = None
+) -> Dict[str, pd.DataFrame]:
+    """Rebuild ``fetch_shopee_products``' frames from archived search and detail responses.
+
+    Items come in search order, once per keyword; items whose detail was
+    never archived are left out, as a failed detail request would be.
+    """
+
+    offsets: Dict[str, List[Tuple[int, ArchiveEntry]]] = {}
+    for entry in archive.entries("shopee", "search"):
+        keyword, offset = _split_key(entry.key)
+        offsets.setdefault(keyword, []).append((offset, entry))
+    wanted = list(dict.fromkeys(keywords)) if keywords is not None else sorted(offsets)
+
+    orders: Dict[str, List[str]] = {}
+    for keyword in wanted:
+        pairs: List[Tuple[int, int]] = []
+        for offset, entry in sorted(offsets.get(keyword, [])):
+            pairs.extend(shopee._search_pairs(read_entry(archive.root, entry) or {}, offset))
+        orders[keyword] = [f"{itemid}/{shopid}" for itemid, shopid in dict.fromkeys(pairs)]
+
+    needed = {key for keys in orders.values() for key in keys}
+    entries = [entry for entry in archive.entries("shopee", "item") if entry.key in needed]
+    rows_by_key = _extract(archive.root, entries, workers)
+
+    frames: Dict[str, pd.DataFrame] = {}
+    for keyword in wanted:
+        rows = ColumnarRows()
+        for key in orders[keyword]:
+            rows.extend(rows_by_key.get(key, []))
+        frames[keyword] = rows.to_pandas()
+    return frames
+
+
+def reextract(
+    source: str,
+    root: str | Path = "../data/raw/api_archive",
+    keywords: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Rebuild the ``source`` ("tiki" or "shopee") DataFrames per keyword from the raw API archive.
+
+    Uses the current ``_build_row`` / ``_build_detail_row`` (and the
+    ``_extract_*`` helpers behind them), so a new field only needs a code
+    change and a re-run of this, not a new crawl. No requests are made.
+    """
+
+    with ApiArchive(root) as archive:
+        if source == "tiki":
+            return reextract_tiki(archive, keywords, workers)
+        if source == "shopee":
+            return reextract_shopee(archive, keywords, workers)
+    raise ValueError(f"Unknown source: {source!r} (expected 'tiki' or 'shopee')")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild Tiki/Shopee DataFrames from the raw API archive, offline.")
+    parser.add_argument("source", choices=("tiki", "shopee"))
+    parser.add_argument("--root", default="data/raw/api_archive", help="archive folder")
+    parser.add_argument("--keyword", action="append", dest="keywords", help="only these keywords (repeatable)")
+    parser.add_argument("--out", default="data/raw/reextracted", help="output folder")
+    parser.add_argument("--format", dest="fmt", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    if not (Path(args.root) / "index.sqlite").exists():
+        print(f"[WARN] No API archive in {args.root}")
+        return 1
+    frames = reextract(args.source, args.root, args.keywords, args.workers)
+    if not frames:
+        print(f"[WARN] No {args.source} records in {args.root}")
+        return 1
+    for keyword, df in frames.items():
+        if args.source == "shopee":
+            path = shopee.save_full_dataset(df, keyword, out_dir=args.out, fmt=args.fmt)
+        else:
+            path = tiki.save_with_timestamp(df, keyword, out_dir=args.out, fmt=args.fmt)
+        print(f"{keyword}: {len(df)} rows -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
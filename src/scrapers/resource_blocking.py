@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+# Resource types the scrapers need: the HTML itself plus the scripts/XHR that
+# render late blocks such as the verified badge. Everything else is aborted.
+DEFAULT_ALLOWED_RESOURCE_TYPES = frozenset({"document", "script", "xhr", "fetch"})
+
+# Ad, analytics and tracking hosts seen on batdongsan.com.vn pages. Matching is
+# by suffix, so "doubleclick.net" also covers "securepubads.g.doubleclick.net".
+DEFAULT_BLOCKED_DOMAINS = frozenset(
+    {
+        "appboycdn.com",
+        "adtrafficquality.google",
+        "admicro.vn",
+        "amcdn.vn",
+        "clarity.ms",
+        "cloudflareinsights.com",
+        "contineljs.com",
+        "deqik.com",
+        "doubleclick.net",
+        "facebook.com",
+        "facebook.net",
+        "google-analytics.com",
+        "googlesyndication.com",
+        "googletagmanager.com",
+        "hotjar.com",
+        "omicrm.com",
+        "onelink.me",
+        "segment.com",
+        "tiktok.com",
+        "youtube.com",
+        "zaloapp.com",
+    }
+)
+
+# Rough transfer sizes per resource type, used only to estimate bytes saved:
+# an aborted request never reports its real size.
+DEFAULT_BYTES_ESTIMATE: Dict[str, int] = {
+    "image": 40_000,
+    "media": 200_000,
+    "font": 30_000,
+    "stylesheet": 25_000,
+    "script": 50_000,
+}
+
+
+def _is_main_frame_navigation(request) -> bool:
+    # Playwright request; frame access is synchronous in both APIs.
+    return request.is_navigation_request() and request.frame.parent_frame is None
+
+
+class ResourceBlocker:
+    """Abort unneeded sub-resources on a Playwright context via ``context.route``.
+
+    A request is allowed only when its resource type is in ``allowed_types``
+    and its host is not under one of ``blocked_domains``; the page's own
+    navigation is always allowed, but iframe documents (ad and tracker frames)
+    are not exempt. The same instance can be attached to several contexts;
+    counters accumulate across all of them.
+    """
+
+    def __init__(
+        self,
+        allowed_types: Iterable[str] = DEFAULT_ALLOWED_RESOURCE_TYPES,
+        blocked_domains: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+        bytes_estimate: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.allowed_types = frozenset(allowed_types)
+        self.blocked_domains = frozenset(d.lower().lstrip(".") for d in blocked_domains)
+        self.bytes_estimate = dict(DEFAULT_BYTES_ESTIMATE if bytes_estimate is None else bytes_estimate)
+
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.bytes_saved_estimate = 0
+        self.blocked_by_type: Counter = Counter()
+        self.blocked_by_domain: Counter = Counter()
+        self._domain_cache: Dict[str, Optional[str]] = {}
+
+    def _blocked_domain(self, host: str) -> Optional[str]:
+        if host in self._domain_cache:
+            return self._domain_cache[host]
+        match = None
+        for domain in self.blocked_domains:
+            if host == domain or host.endswith("." + domain):
+                match = domain
+                break
+        self._domain_cache[host] = match
+        return match
+
+    def should_block(self, url: str, resource_type: str, main_frame: bool = False) -> bool:
+        """Decide for one request and update the counters.
+
+        ``main_frame`` marks the top-level navigation, which is never blocked.
+        """
+
+        host = (urlparse(url).hostname or "").lower()
+        domain = self._blocked_domain(host)
+        # Never block the top-level document, otherwise the page itself fails.
+        if not main_frame and (domain or resource_type not in self.allowed_types):
+            self.requests_blocked += 1
+            self.blocked_by_type[resource_type] += 1
+            if domain:
+                self.blocked_by_domain[domain] += 1
+            self.bytes_saved_estimate += self.bytes_estimate.get(resource_type, 0)
+            return True
+        self.requests_allowed += 1
+        return False
+
+    def _handle_sync(self, route) -> None:
+        request = route.request
+        if self.should_block(request.url, request.resource_type, _is_main_frame_navigation(request)):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def _handle_async(self, route) -> None:
+        request = route.request
+        if self.should_block(request.url, request.resource_type, _is_main_frame_navigation(request)):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def attach(self, context) -> None:
+        """Install the route handler on a sync Playwright ``BrowserContext``."""
+
+        context.route("**/*", self._handle_sync)
+
+    async def attach_async(self, context) -> None:
+        """Install the route handler on an async Playwright ``BrowserContext``."""
+
+        await context.route("**/*", self._handle_async)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "requests_allowed": self.requests_allowed,
+            "requests_blocked": self.requests_blocked,
+            "bytes_saved_estimate": self.bytes_saved_estimate,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "blocked_by_domain": dict(self.blocked_by_domain),
+        }
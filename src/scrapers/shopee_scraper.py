@@ -1,14 +1,29 @@
 from __future__ import annotations
 
-import random
+import concurrent.futures
 import re
 import time
-from urllib.parse import quote
+from urllib.parse import quote, urlparse
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 import requests
+import requests.adapters
+
+from src.utils.api_archive import ApiArchive
+from src.utils.attribute_store import AttributeStore, split_attributes
+from src.utils.checkpoint import JsonlCheckpoint
+from src.utils.columnar import ColumnarRows
+from src.utils.metrics import default_metrics
+from src.utils.rate_limit import (
+    AdaptiveThrottle,
+    HostThrottles,
+    block_reason,
+    is_retryable_status,
+    jittered_backoff,
+    response_html,
+)
 
 SEARCH_API = "https://shopee.vn/api/v4/search/search_items"
 DETAIL_API = "https://shopee.vn/api/v4/item/get"
@@ -30,43 +45,147 @@ def _normalize_keyword(keyword: str) -> str:
     return re.sub(r"\s+", " ", keyword.strip())
 
 
-def _sleep_polite(min_s: float = 3.0, max_s: float = 6.0) -> None:
-    time.sleep(random.uniform(min_s, max_s))
+def _search_payload(
+    keyword: str,
+    headers: Dict[str, str],
+    offset: int,
+    limit: int = 60,
+    timeout: int = 20,
+    throttle: Optional[AdaptiveThrottle] = None,
+    archive: Optional[ApiArchive] = None,
+    session: Optional[requests.Session] = None,
+) -> Optional[Dict[str, object]]:
+    """Return the search API JSON at one offset, or ``None`` if the request failed.
+
+    With a ``throttle`` the request waits for its slot and reports back to it;
+    with an ``archive`` the payload is stored under ``"<keyword>/<offset>"``.
+    A ``session`` reuses its keep-alive connections.
+    """
+    metrics = default_metrics()
+    params = {"keyword": keyword, "limit": limit, "newest": offset}
+    if throttle is not None:
+        metrics.observe("shopee", "rate_wait", throttle.wait())
+    start = time.perf_counter()
+    response = None
+    try:
+        response = (session or requests).get(
+            SEARCH_API, headers=headers, params=params, timeout=timeout
+        )
+        latency = time.perf_counter() - start
+        metrics.observe("shopee", "search_request", latency)
+        metrics.record_status("shopee", response.status_code)
+        outcome = throttle.record(response.status_code, latency, response_html(response)) if throttle else None
+        if outcome == "blocked":
+            metrics.record_blocked("shopee", block_reason(response.status_code))
+        response.raise_for_status()
+        payload = response.json()
+    except (requests.RequestException, ValueError) as exc:
+        metrics.record_error("shopee", "search_request", exc)
+        if response is None and throttle is not None:
+            throttle.record(error=True)
+        print(f"[WARN] Search offset {offset} failed: {exc}")
+        return None
+    if archive is not None:
+        archive.put("shopee", "search", f"{keyword}/{offset}", payload)
+    return payload
+
+
+def _search_pairs(payload: Dict[str, object], offset: int) -> List[Tuple[int, int]]:
+    pairs: List[Tuple[int, int]] = []
+    items = payload.get("items", []) or []
+    if not items:
+        err = payload.get("error") or payload.get("error_msg") or "no_items"
+        print(f"[WARN] Empty search results at offset {offset}: {err}")
+    for entry in items:
+        basic = entry.get("item_basic") or {}
+        itemid = basic.get("itemid")
+        shopid = basic.get("shopid")
+        if itemid and shopid:
+            pairs.append((int(itemid), int(shopid)))
+    return pairs
 
 
-def _collect_item_pairs(
+def _search_offset(
     keyword: str,
     headers: Dict[str, str],
-    offsets: Iterable[int],
+    offset: int,
     limit: int = 60,
     timeout: int = 20,
-) -> List[Tuple[int, int]]:
-    pairs: List[Tuple[int, int]] = []
-    for offset in offsets:
-        params = {"keyword": keyword, "limit": limit, "newest": offset}
-        try:
-            response = requests.get(
-                SEARCH_API, headers=headers, params=params, timeout=timeout
-            )
-            response.raise_for_status()
-            payload = response.json()
-        except requests.RequestException as exc:
-            print(f"[WARN] Search offset {offset} failed: {exc}")
-            _sleep_polite()
-            continue
+    throttle: Optional[AdaptiveThrottle] = None,
+    archive: Optional[ApiArchive] = None,
+    session: Optional[requests.Session] = None,
+) -> Optional[List[Tuple[int, int]]]:
+    """Return the itemid/shopid pairs at one search offset, or ``None`` if the request failed."""
+    payload = _search_payload(
+        keyword, headers, offset, limit=limit, timeout=timeout, throttle=throttle, archive=archive,
+        session=session,
+    )
+    return None if payload is None else _search_pairs(payload, offset)
 
-        items = payload.get("items", []) or []
-        if not items:
-            err = payload.get("error") or payload.get("error_msg") or "no_items"
-            print(f"[WARN] Empty search results at offset {offset}: {err}")
-        for entry in items:
-            basic = entry.get("item_basic") or {}
-            itemid = basic.get("itemid")
-            shopid = basic.get("shopid")
-            if itemid and shopid:
-                pairs.append((int(itemid), int(shopid)))
-        _sleep_polite()
-    return pairs
+
+def _search_has_more(payload: Dict[str, object], offset: int, limit: int, found: int) -> bool:
+    """Whether another page follows, from ``nomore``/``total_count``; else whether this page was full."""
+    if not found or payload.get("nomore"):
+        return False
+    total = payload.get("total_count")
+    if isinstance(total, int) and total > 0:
+        return offset + limit < total
+    return found >= limit
+
+
+def iter_shopee_search(
+    keyword: str,
+    headers: Dict[str, str],
+    limit: int = 60,
+    max_pages: Optional[int] = None,
+    timeout: int = 20,
+    throttle: Optional[AdaptiveThrottle] = None,
+    known: Optional[Dict[int, List[Tuple[int, int]]]] = None,
+    archive: Optional[ApiArchive] = None,
+    session: Optional[requests.Session] = None,
+) -> Iterator[Tuple[int, List[Tuple[int, int]], bool]]:
+    """
+    Yield ``(offset, pairs, fetched)`` for offsets 0, limit, 2*limit, ...
+    until the API reports no more results (``nomore``, ``total_count``), a
+    page comes back empty, a request fails, or ``max_pages`` pages were read.
+    The next offset is requested in the background while the caller handles
+    the current one. Offsets in ``known`` (e.g. from a checkpoint) are
+    replayed without a request and come with ``fetched=False``; a full known
+    page means there may be more.
+    """
+    known = known or {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def submit(offset: int) -> Optional[concurrent.futures.Future]:
+        if offset in known:
+            return None
+        return executor.submit(
+            _search_payload, keyword, headers, offset, limit=limit, timeout=timeout, throttle=throttle,
+            archive=archive, session=session,
+        )
+
+    try:
+        offset, page = 0, 1
+        future = submit(offset)
+        while True:
+            if offset in known:
+                pairs, fetched = known[offset], False
+                more = len(pairs) >= limit
+            else:
+                payload = future.result()
+                if payload is None:
+                    return
+                pairs, fetched = _search_pairs(payload, offset), True
+                more = _search_has_more(payload, offset, limit, len(pairs))
+            more = more and (max_pages is None or page < max_pages)
+            if more:
+                future = submit(offset + limit)
+            yield offset, pairs, fetched
+            if not more:
+                return
+            offset, page = offset + limit, page + 1
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
 def _attributes_to_dict(attributes: List[Dict[str, object]]) -> Dict[str, object]:
@@ -79,89 +198,444 @@ def _attributes_to_dict(attributes: List[Dict[str, object]]) -> Dict[str, object
     return attr_map
 
 
-def fetch_shopee_products(
-    keyword: str,
-    offsets: Iterable[int] = (0, 60, 120),
-    limit: int = 60,
-    cookie: str = "",
-    checkpoint_every: int = 10,
-    out_dir: str | Path = "../data/raw",
+# Fixed product fields of a detail row; everything after them is a spread-out attribute.
+DETAIL_COLUMNS: Tuple[str, ...] = (
+    "itemid", "shopid", "name", "description", "price", "price_before_discount", "discount",
+    "historical_sold", "rating_star", "stock", "brand", "category_id", "shop_location",
+    "is_official_shop", "is_preferred_plus_seller", "liked_count", "cmt_count",
+)
+
+
+def _build_detail_row(itemid: int, shopid: int, item: Dict[str, object]) -> Dict[str, object]:
+    attributes = _attributes_to_dict(item.get("attributes") or [])
+
+    return {
+        "itemid": itemid,
+        "shopid": shopid,
+        "name": item.get("name"),
+        "description": item.get("description"),
+        "price": (item.get("price") or 0) / 100000,
+        "price_before_discount": (item.get("price_before_discount") or 0) / 100000,
+        "discount": item.get("discount"),
+        "historical_sold": item.get("historical_sold"),
+        "rating_star": (item.get("item_rating") or {}).get("rating_star"),
+        "stock": item.get("stock"),
+        "brand": item.get("brand"),
+        "category_id": item.get("catid"),
+        "shop_location": item.get("shop_location"),
+        "is_official_shop": item.get("is_official_shop"),
+        "is_preferred_plus_seller": item.get("is_preferred_plus_seller"),
+        "liked_count": item.get("liked_count"),
+        "cmt_count": item.get("cmt_count"),
+        **attributes,
+    }
+
+
+def _build_session(headers: Dict[str, str], pool_size: int = 10) -> requests.Session:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(headers)
+    return session
+
+
+def _fetch_detail(
+    session: requests.Session,
+    throttle: AdaptiveThrottle,
+    itemid: int,
+    shopid: int,
+    detail_url: str,
+    timeout: int,
+    retries: int,
+    archive: Optional[ApiArchive] = None,
+) -> Optional[Dict[str, object]]:
+    metrics = default_metrics()
+    params = {"itemid": itemid, "shopid": shopid}
+    for attempt in range(retries + 1):
+        metrics.observe("shopee", "rate_wait", throttle.wait())
+        start = time.perf_counter()
+        response = None
+        try:
+            response = session.get(detail_url, params=params, timeout=timeout)
+            latency = time.perf_counter() - start
+            metrics.observe("shopee", "detail_request", latency)
+            metrics.record_status("shopee", response.status_code)
+            outcome = throttle.record(response.status_code, latency, response_html(response))
+            if outcome == "blocked":
+                metrics.record_blocked("shopee", block_reason(response.status_code))
+            if attempt < retries:
+                if outcome == "blocked":
+                    # The throttle has already slowed down and paused this host.
+                    continue
+                if is_retryable_status(response.status_code):
+                    with metrics.timer("shopee", "backoff"):
+                        time.sleep(jittered_backoff(attempt))
+                    continue
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            metrics.record_error("shopee", "detail_request", exc)
+            if response is None:
+                throttle.record(error=True)
+            if attempt < retries:
+                with metrics.timer("shopee", "backoff"):
+                    time.sleep(jittered_backoff(attempt))
+                continue
+            print(f"[WARN] Detail failed for item {itemid}: {exc}")
+            return None
+        if archive is not None:
+            archive.put("shopee", "item", f"{itemid}/{shopid}", payload)
+        return payload.get("item") or {}
+    return None
+
+
+def iter_shopee_details(
+    pairs: Iterable[Tuple[int, int]],
+    headers: Dict[str, str],
+    concurrency: int = 4,
+    requests_per_second: float = 1.0,
+    min_requests_per_second: float = 0.1,
     timeout: int = 20,
-) -> pd.DataFrame:
+    retries: int = 3,
+    session: Optional[requests.Session] = None,
+    detail_url: str = DETAIL_API,
+    max_requests_per_second: Optional[float] = None,
+    throttle: Optional[AdaptiveThrottle] = None,
+    archive: Optional[ApiArchive] = None,
+) -> Iterator[Tuple[int, Dict[str, object]]]:
     """
-    Two-step pipeline:
-    1) Search API -> itemid/shopid pairs
-    2) Detail API -> deep attributes and product fields
+    Fetch the detail API for each (itemid, shopid) pair and yield
+    ``(index, row)`` as rows complete (not necessarily in input order).
+
+    ``concurrency`` workers share one keep-alive session and one
+    :class:`AdaptiveThrottle`, which starts at ``requests_per_second``, speeds
+    up towards ``max_requests_per_second`` while responses are healthy and
+    backs off (down to ``min_requests_per_second``) on 403/429, challenge
+    pages, errors and slow responses. Pass ``throttle`` to share one with
+    other requests to the same host. Items that still fail after
+    ``retries`` are skipped with a warning. With an ``archive`` every raw
+    detail response is stored under ``"<itemid>/<shopid>"``.
     """
+    pair_list = list(pairs)
+    metrics = default_metrics()
+    if throttle is None:
+        throttle = AdaptiveThrottle(
+            requests_per_second,
+            min_rate=min_requests_per_second,
+            max_rate=max_requests_per_second,
+            name=urlparse(detail_url).netloc,
+        )
+    own_session = session is None
+    session = session or _build_session(headers, pool_size=concurrency)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(
+                    _fetch_detail, session, throttle, itemid, shopid, detail_url, timeout, retries, archive
+                ): (idx, itemid, shopid)
+                for idx, (itemid, shopid) in enumerate(pair_list)
+            }
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    idx, itemid, shopid = futures[future]
+                    item = future.result()
+                    if item is not None:
+                        with metrics.timer("shopee", "parse"):
+                            row = _build_detail_row(itemid, shopid, item)
+                        yield idx, row
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        if own_session:
+            session.close()
+        if throttle.outcomes["blocked"]:
+            print(
+                f"[INFO] Detail stage slowed down {throttle.outcomes['blocked']} times on blocks "
+                f"(rate now {throttle.rate:.2f} req/s)"
+            )
+
+
+def _load_checkpoint(
+    checkpoint: JsonlCheckpoint,
+) -> Tuple[Dict[int, List[Tuple[int, int]]], Dict[Tuple[int, int], Dict[str, object]]]:
+    """Read back the search offsets that succeeded and the rows already fetched."""
+    searched: Dict[int, List[Tuple[int, int]]] = {}
+    done: Dict[Tuple[int, int], Dict[str, object]] = {}
+    for record in checkpoint.iter_records():
+        kind = record.get("type")
+        if kind == "search":
+            searched[int(record["offset"])] = [tuple(pair) for pair in record.get("pairs") or []]
+        elif kind == "row":
+            row = record.get("row") or {}
+            done[(int(row["itemid"]), int(row["shopid"]))] = row
+    return searched, done
+
+
+def _build_search_headers(keyword: str, cookie: str) -> Dict[str, str]:
     headers = dict(DEFAULT_HEADERS)
     if cookie:
         safe_cookie = cookie.strip().replace("\n", "").replace("\r", "")
         headers["Cookie"] = safe_cookie
     headers["Referer"] = f"https://shopee.vn/search?keyword={quote(keyword)}"
+    return headers
+
+
+def _iter_fixed_offsets(
+    keyword: str,
+    headers: Dict[str, str],
+    offsets: Iterable[int],
+    limit: int,
+    timeout: int,
+    throttle: AdaptiveThrottle,
+    known: Dict[int, List[Tuple[int, int]]],
+    archive: Optional[ApiArchive] = None,
+    session: Optional[requests.Session] = None,
+) -> Iterator[Tuple[int, List[Tuple[int, int]], bool]]:
+    # Same (offset, pairs, fetched) items as iter_shopee_search, for an explicit offset list.
+    for offset in offsets:
+        if offset in known:
+            yield offset, known[offset], False
+            continue
+        found = _search_offset(
+            keyword, headers, offset, limit=limit, timeout=timeout, throttle=throttle, archive=archive,
+            session=session,
+        )
+        if found is not None:
+            yield offset, found, True
 
-    keyword = _normalize_keyword(keyword)
-    pairs = _collect_item_pairs(keyword, headers, offsets, limit=limit, timeout=timeout)
 
-    if not pairs:
+def _iter_products(
+    keyword: str,
+    headers: Dict[str, str],
+    offsets: Optional[Iterable[int]],
+    max_pages: Optional[int],
+    limit: int,
+    timeout: int,
+    concurrency: int,
+    requests_per_second: float,
+    max_requests_per_second: Optional[float],
+    retries: int,
+    detail_url: str,
+    checkpoint: Optional[JsonlCheckpoint],
+    searched: Dict[int, List[Tuple[int, int]]],
+    done: Dict[Tuple[int, int], Dict[str, object]],
+    order: List[Tuple[int, int]],
+    archive: Optional[ApiArchive] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Search page by page and fetch the details of each page's items before
+    moving on, while the next search page is prefetched. Fills ``searched``
+    and ``order`` (unique pairs in search order) as it goes. ``done`` holds
+    rows from a resumed checkpoint; they are yielded instead of refetched and
+    dropped from ``done`` once yielded. Search and detail requests share one
+    keep-alive session.
+    """
+    throttles = HostThrottles(requests_per_second, min_rate=0.1, max_rate=max_requests_per_second)
+    search_throttle = throttles.for_url(SEARCH_API)
+    # One more connection than the detail workers, for the search page prefetched alongside them.
+    session = _build_session(headers, pool_size=concurrency + 1)
+    if offsets is None:
+        pages = iter_shopee_search(
+            keyword, headers, limit=limit, max_pages=max_pages, timeout=timeout, throttle=search_throttle,
+            known=searched, archive=archive, session=session,
+        )
+    else:
+        pages = _iter_fixed_offsets(
+            keyword, headers, offsets, limit, timeout, search_throttle, searched, archive, session
+        )
+
+    queued = set()
+    try:
+        for offset, found, fetched in pages:
+            if fetched:
+                searched[offset] = found
+                if checkpoint is not None:
+                    checkpoint.append({"type": "search", "offset": offset, "pairs": found})
+            new = [pair for pair in dict.fromkeys(found) if pair not in queued]
+            queued.update(new)
+            order.extend(new)
+            todo = [pair for pair in new if pair not in done]
+            for pair in new:
+                if pair in done:
+                    yield done.pop(pair)
+            if not todo:
+                continue
+            details = iter_shopee_details(
+                todo,
+                headers,
+                concurrency=concurrency,
+                timeout=timeout,
+                retries=retries,
+                detail_url=detail_url,
+                throttle=throttles.for_url(detail_url),
+                session=session,
+                archive=archive,
+            )
+            for _, row in details:
+                if checkpoint is not None:
+                    checkpoint.append({"type": "row", "row": row})
+                yield row
+    finally:
+        # Close the search prefetch before the session it uses.
+        pages.close()
+        session.close()
+        print(f"[INFO] Throttle: {throttles.summary()}")
+
+    if not order:
         raise ValueError(
             "Khong tim thay itemid/shopid. Cookie co the da het han hoac keyword khong hop le."
         )
 
-    rows: List[Dict[str, object]] = []
-    out_path = Path(out_dir)
-    out_path.mkdir(parents=True, exist_ok=True)
-    safe_keyword = re.sub(r"\s+", "_", keyword.strip().lower())
-    checkpoint_path = out_path / f"shopee_{safe_keyword}_checkpoint.csv"
 
-    for idx, (itemid, shopid) in enumerate(pairs, start=1):
-        params = {"itemid": itemid, "shopid": shopid}
-        try:
-            response = requests.get(
-                DETAIL_API, headers=headers, params=params, timeout=timeout
-            )
-            response.raise_for_status()
-            payload = response.json()
-            item = payload.get("item") or {}
-        except requests.RequestException as exc:
-            print(f"[WARN] Detail failed for item {itemid}: {exc}")
-            _sleep_polite()
-            continue
+def iter_shopee_products(
+    keyword: str,
+    offsets: Optional[Iterable[int]] = None,
+    max_pages: Optional[int] = None,
+    limit: int = 60,
+    cookie: str = "",
+    timeout: int = 20,
+    concurrency: int = 4,
+    requests_per_second: float = 1.0,
+    max_requests_per_second: Optional[float] = None,
+    retries: int = 3,
+    detail_url: str = DETAIL_API,
+    archive: Optional[ApiArchive] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Stream product rows (same columns as ``fetch_shopee_products``) as they
+    are fetched, one search page at a time. With ``offsets=None`` search
+    pages are discovered from the API (see ``iter_shopee_search``) up to
+    ``max_pages``; otherwise exactly ``offsets`` are searched. Each item is
+    yielded once.
+    """
+    keyword = _normalize_keyword(keyword)
+    headers = _build_search_headers(keyword, cookie)
+    yield from _iter_products(
+        keyword, headers, offsets, max_pages, limit, timeout, concurrency, requests_per_second,
+        max_requests_per_second, retries, detail_url, None, {}, {}, [], archive,
+    )
+
+
+def fetch_shopee_products(
+    keyword: str,
+    offsets: Optional[Iterable[int]] = None,
+    limit: int = 60,
+    cookie: str = "",
+    checkpoint_every: int = 10,
+    out_dir: str | Path = "../data/raw",
+    timeout: int = 20,
+    concurrency: int = 4,
+    requests_per_second: float = 1.0,
+    retries: int = 3,
+    detail_url: str = DETAIL_API,
+    resume: bool = False,
+    max_requests_per_second: Optional[float] = None,
+    max_pages: Optional[int] = 3,
+    attribute_store: Optional[AttributeStore] = None,
+    archive: Optional[ApiArchive] = None,
+) -> pd.DataFrame:
+    """
+    Two-step pipeline:
+    1) Search API -> itemid/shopid pairs; with ``offsets=None`` pages are
+       followed until the API reports no more results or ``max_pages``
+       pages were read (default 3, the old offsets 0/60/120; ``None`` for all)
+    2) Detail API -> deep attributes and product fields, fetched by
+       ``concurrency`` workers while the next search page is prefetched
+
+    Both steps are paced per host by an :class:`AdaptiveThrottle` that starts
+    at ``requests_per_second`` and moves between 0.1 req/s and
+    ``max_requests_per_second`` (default 4x) depending on blocks, errors and
+    latency, instead of fixed sleeps.
 
-        attributes = _attributes_to_dict(item.get("attributes") or [])
+    Progress is appended to ``shopee_<keyword>_checkpoint.jsonl`` in
+    ``out_dir`` (fsync'ed every ``checkpoint_every`` records; 0 disables it).
+    With ``resume=True`` the log is read back: search offsets that already
+    succeeded and items already fetched are skipped.
+    Use ``iter_shopee_products`` to stream rows instead.
 
-        row = {
-            "itemid": itemid,
-            "shopid": shopid,
-            "name": item.get("name"),
-            "description": item.get("description"),
-            "price": (item.get("price") or 0) / 100000,
-            "price_before_discount": (item.get("price_before_discount") or 0) / 100000,
-            "discount": item.get("discount"),
-            "historical_sold": item.get("historical_sold"),
-            "rating_star": (item.get("item_rating") or {}).get("rating_star"),
-            "stock": item.get("stock"),
-            "brand": item.get("brand"),
-            "category_id": item.get("catid"),
-            "shop_location": item.get("shop_location"),
-            "is_official_shop": item.get("is_official_shop"),
-            "is_preferred_plus_seller": item.get("is_preferred_plus_seller"),
-            "liked_count": item.get("liked_count"),
-            "cmt_count": item.get("cmt_count"),
-            **attributes,
-        }
+    By default each deep attribute becomes its own column. With an
+    :class:`AttributeStore` as ``attribute_store`` the frame keeps only
+    ``DETAIL_COLUMNS`` and the attributes go into the store as a long
+    ``(itemid, attr_name_id, value)`` table; ``attribute_store.pivot(names)``
+    gives the wide view back for the attributes you need.
 
-        rows.append(row)
+    With an :class:`ApiArchive` as ``archive`` every raw search and detail
+    response is kept, so ``src.scrapers.reextract`` can rebuild the frame
+    later without requests.
+    """
+    headers = _build_search_headers(keyword, cookie)
 
-        if checkpoint_every and idx % checkpoint_every == 0:
-            pd.DataFrame(rows).to_csv(checkpoint_path, index=False, encoding="utf-8-sig")
+    keyword = _normalize_keyword(keyword)
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    safe_keyword = re.sub(r"\s+", "_", keyword.strip().lower())
+    checkpoint = (
+        JsonlCheckpoint(out_path / f"shopee_{safe_keyword}_checkpoint.jsonl", fsync_every=checkpoint_every)
+        if checkpoint_every
+        else None
+    )
 
-        _sleep_polite()
+    searched: Dict[int, List[Tuple[int, int]]] = {}
+    done: Dict[Tuple[int, int], Dict[str, object]] = {}
+    if checkpoint is not None:
+        if resume:
+            searched, done = _load_checkpoint(checkpoint)
+            print(f"[INFO] Resuming: {len(searched)} search offsets, {len(done)} items already done")
+        else:
+            checkpoint.reset()
 
-    return pd.DataFrame(rows)
+    # Rows arrive in completion order; they go straight into columns and are put in search order at the end.
+    order: List[Tuple[int, int]] = []
+    rows = ColumnarRows()
+    position: Dict[Tuple[int, int], int] = {}
+    try:
+        products = _iter_products(
+            keyword, headers, offsets, max_pages, limit, timeout, concurrency, requests_per_second,
+            max_requests_per_second, retries, detail_url, checkpoint, searched, done, order, archive,
+        )
+        for row in products:
+            position[(int(row["itemid"]), int(row["shopid"]))] = len(rows)
+            if attribute_store is not None:
+                row, attributes = split_attributes(row, DETAIL_COLUMNS)
+                attribute_store.add(row["itemid"], attributes)
+            rows.append(row)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
 
+    return rows.to_pandas(order=[position[pair] for pair in order if pair in position])
 
-def save_full_dataset(df: pd.DataFrame, keyword: str, out_dir: str | Path = "../data/raw") -> Path:
+
+def save_full_dataset(
+    df: pd.DataFrame,
+    keyword: str,
+    out_dir: str | Path = "../data/raw",
+    fmt: str = "csv",
+    attribute_store: Optional[AttributeStore] = None,
+) -> Path:
+    """
+    Save the crawl result and return the path. ``fmt="parquet"`` writes
+    ``<out_dir>/parquet/shopee/crawl_date=YYYY-MM-DD/`` with the typed Shopee
+    schema from ``src.utils.parquet_io`` instead of CSV.
+
+    With ``attribute_store``, ``shopee_<keyword>_attributes`` and
+    ``shopee_<keyword>_attribute_names`` are written in the same format, next
+    to the CSV or under ``parquet/shopee_attributes/crawl_date=.../``.
+    """
     safe_keyword = re.sub(r"\s+", "_", keyword.strip().lower())
+    if fmt == "parquet":
+        from src.utils.parquet_io import write_parquet
+
+        path = write_parquet(df, "shopee", f"shopee_{safe_keyword}", root=Path(out_dir) / "parquet")
+        if attribute_store is not None:
+            # Own folder: files in parquet/shopee/ are read back as one dataset with the product schema.
+            attributes_dir = Path(out_dir) / "parquet" / "shopee_attributes" / path.parent.name
+            attribute_store.save(attributes_dir, f"shopee_{safe_keyword}", fmt="parquet")
+        return path
+    if attribute_store is not None:
+        attribute_store.save(out_dir, f"shopee_{safe_keyword}")
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
     file_path = out_path / f"shopee_{safe_keyword}_full.csv"
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import concurrent.futures
+import math
 import re
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 import requests
+import requests.adapters
+
+from src.utils.api_archive import ApiArchive
+from src.utils.columnar import ColumnarRows
+from src.utils.metrics import default_metrics
+from src.utils.rate_limit import AdaptiveThrottle, block_reason, is_retryable_status, jittered_backoff, response_html
 
 TIKI_API_URL = "https://tiki.vn/api/v2/products"
 
@@ -116,92 +124,395 @@ def _extract_metadata(impression_info) -> Dict[str, object]:
     return {}
 
 
+def _build_row(item: Dict[str, object]) -> Dict[str, object]:
+    metadata = _extract_metadata(item.get("impression_info"))
+    seller_info = _extract_seller(item)
+    category_info = _extract_category(item)
+    stock_info = _extract_stock(item)
+    url_path = item.get("url_path")
+    product_url = f"https://tiki.vn/{url_path}" if url_path else None
+
+    return {
+        "id": item.get("id"),
+        "product_id": item.get("product_id"),
+        "tiki_product_id": item.get("tiki_product_id"),
+        "seller_product_id": item.get("seller_product_id"),
+        "sku": item.get("sku"),
+        "name": item.get("name"),
+        "short_description": item.get("short_description"),
+        "type": item.get("type"),
+        "brand_name": item.get("brand_name"),
+        "brand_id": item.get("brand_id"),
+        "price": item.get("price"),
+        "list_price": item.get("list_price"),
+        "original_price": item.get("original_price"),
+        "market_price": item.get("market_price"),
+        "discount": item.get("discount"),
+        "discount_rate": item.get("discount_rate"),
+        "rating_average": item.get("rating_average"),
+        "review_count": item.get("review_count"),
+        "quantity_sold": _safe_get_quantity_sold(item.get("quantity_sold")),
+        "quantity_sold_text": _safe_get_quantity_sold_text(
+            item.get("quantity_sold")
+        ),
+        "is_official_store": metadata.get("is_official_store"),
+        "is_freeship": item.get("is_freeship")
+        or item.get("is_free_ship"),
+        "inventory_status": item.get("inventory_status"),
+        "is_tikinow": item.get("is_tikinow"),
+        "tikinow_time": item.get("tikinow_time"),
+        "thumbnail_url": item.get("thumbnail_url"),
+        "product_url": product_url,
+        "badges": _extract_badges(item),
+        **seller_info,
+        **category_info,
+        **stock_info,
+    }
+
+
+def _build_session(pool_size: int = 10) -> requests.Session:
+    """Keep-alive session with a connection pool sized for ``pool_size`` workers."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.headers.update(_build_headers())
+    return session
+
+
+def _fetch_payload(
+    session: requests.Session,
+    throttle: AdaptiveThrottle,
+    keyword: str,
+    page: int,
+    limit: int,
+    timeout: int,
+    retries: int,
+    backoff: float,
+    archive: Optional[ApiArchive] = None,
+) -> Optional[Dict[str, object]]:
+    """Fetch one search page's JSON, retrying errors/429/5xx with jittered backoff.
+
+    Successful payloads are also stored in ``archive`` under ``"<keyword>/<page>"``.
+    """
+    metrics = default_metrics()
+    params = {"q": keyword, "limit": limit, "page": page}
+    for attempt in range(retries + 1):
+        metrics.observe("tiki", "rate_wait", throttle.wait())
+        start = time.perf_counter()
+        response = None
+        try:
+            response = session.get(TIKI_API_URL, params=params, timeout=timeout)
+            latency = time.perf_counter() - start
+            metrics.observe("tiki", "request", latency)
+            metrics.record_status("tiki", response.status_code)
+            if throttle.record(response.status_code, latency, response_html(response)) == "blocked":
+                metrics.record_blocked("tiki", block_reason(response.status_code))
+            if is_retryable_status(response.status_code) and attempt < retries:
+                with metrics.timer("tiki", "backoff"):
+                    time.sleep(jittered_backoff(attempt, base=backoff))
+                continue
+            response.raise_for_status()
+            payload = response.json()
+            if archive is not None:
+                archive.put("tiki", "search", f"{keyword}/{page}", payload)
+            return payload
+        except (requests.RequestException, ValueError) as exc:
+            metrics.record_error("tiki", "request", exc)
+            if response is None:
+                throttle.record(error=True)
+            if attempt < retries:
+                with metrics.timer("tiki", "backoff"):
+                    time.sleep(jittered_backoff(attempt, base=backoff))
+                continue
+            print(f"[WARN] Page {page} failed ({keyword}): {exc}")
+    return None
+
+
+def _fetch_page(
+    session: requests.Session,
+    throttle: AdaptiveThrottle,
+    keyword: str,
+    page: int,
+    limit: int,
+    timeout: int,
+    retries: int,
+    backoff: float,
+    archive: Optional[ApiArchive] = None,
+) -> Optional[List[Dict[str, object]]]:
+    payload = _fetch_payload(session, throttle, keyword, page, limit, timeout, retries, backoff, archive)
+    return None if payload is None else payload.get("data", [])
+
+
+def _last_page(payload: Dict[str, object], limit: int) -> Optional[int]:
+    """Last page announced in ``paging`` (``last_page``, else ``total / per_page``), if any."""
+    paging = payload.get("paging")
+    if not isinstance(paging, dict):
+        return None
+    last_page = paging.get("last_page")
+    if isinstance(last_page, int) and last_page > 0:
+        return last_page
+    total = paging.get("total")
+    per_page = paging.get("per_page") or limit
+    if isinstance(total, int) and isinstance(per_page, int) and per_page > 0:
+        return max(1, math.ceil(total / per_page))
+    return None
+
+
+def _iter_keyword_rows(
+    session: requests.Session,
+    throttle: AdaptiveThrottle,
+    keyword: str,
+    max_pages: Optional[int],
+    limit: int,
+    timeout: int,
+    retries: int,
+    backoff: float,
+    archive: Optional[ApiArchive] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Walk the search pages of one keyword until the last page announced by
+    the API, the first empty page, the first page without new product ids or
+    ``max_pages``. Page N+1 is requested in the background while the rows of
+    page N are built and consumed.
+
+    Only the pages whose rows are yielded go into ``archive``, so
+    ``reextract`` rebuilds exactly these rows.
+    """
+    metrics = default_metrics()
+    seen_ids = set()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def submit(page: int) -> concurrent.futures.Future:
+        return executor.submit(_fetch_payload, session, throttle, keyword, page, limit, timeout, retries, backoff)
+
+    try:
+        page = 1
+        future: Optional[concurrent.futures.Future] = submit(page)
+        last_page = max_pages
+        while future is not None:
+            payload = future.result()
+            future = None
+            if payload is not None:
+                items = payload.get("data") or []
+                if not items:
+                    break
+                ids = {item.get("id") for item in items}
+                if ids <= seen_ids:
+                    # Past the end, some API versions repeat the last page instead of returning nothing.
+                    print(f"[WARN] Stopping {keyword!r} at page {page}: no new products")
+                    break
+                seen_ids.update(ids)
+                if archive is not None:
+                    archive.put("tiki", "search", f"{keyword}/{page}", payload)
+                announced = _last_page(payload, limit)
+                if announced is not None:
+                    last_page = min(last_page, announced) if last_page else announced
+            elif last_page is None:
+                # Without paging info a failed page cannot be skipped safely.
+                print(f"[WARN] Stopping {keyword!r} at page {page}: no paging info to continue from")
+                break
+            else:
+                items = []
+            if last_page is None or page < last_page:
+                future = submit(page + 1)
+            with metrics.timer("tiki", "parse"):
+                rows = [_build_row(item) for item in items]
+            yield from rows
+            page += 1
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_tiki_products(
+    keyword: str,
+    max_pages: Optional[int] = None,
+    limit: int = 40,
+    sleep_seconds: float = 2.0,
+    timeout: int = 20,
+    requests_per_second: Optional[float] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    session: Optional[requests.Session] = None,
+    max_requests_per_second: Optional[float] = None,
+    archive: Optional[ApiArchive] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Yield product rows (same columns as ``fetch_tiki_products``) as the
+    search pages arrive, following the API's paging info instead of a fixed
+    page count: stops after ``paging.last_page``, on the first empty page, or
+    after ``max_pages``, or on a page with no new product ids. The next page
+    is prefetched while the current one is consumed.
+    """
+    if requests_per_second is None:
+        requests_per_second = 1.0 / sleep_seconds if sleep_seconds > 0 else 10.0
+    throttle = AdaptiveThrottle(requests_per_second, max_rate=max_requests_per_second, name="tiki.vn")
+    own_session = session is None
+    session = session or _build_session(pool_size=2)
+    try:
+        yield from _iter_keyword_rows(
+            session, throttle, keyword, max_pages, limit, timeout, retries, backoff, archive
+        )
+    finally:
+        if own_session:
+            session.close()
+
+
+def _fetch_keyword_pages(
+    jobs: Iterable[Tuple[str, int]],
+    session: requests.Session,
+    throttle: AdaptiveThrottle,
+    concurrency: int,
+    limit: int,
+    timeout: int,
+    retries: int,
+    backoff: float,
+    archive: Optional[ApiArchive] = None,
+) -> Dict[Tuple[str, int], List[Dict[str, object]]]:
+    """Fetch (keyword, page) jobs in parallel; failed pages are left out."""
+    results: Dict[Tuple[str, int], List[Dict[str, object]]] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                _fetch_page, session, throttle, keyword, page, limit, timeout, retries, backoff, archive
+            ): (keyword, page)
+            for keyword, page in jobs
+        }
+        for future in concurrent.futures.as_completed(futures):
+            items = future.result()
+            if items is not None:
+                results[futures[future]] = items
+    return results
+
+
 def fetch_tiki_products(
     keyword: str,
-    pages: int = 5,
+    pages: Optional[int] = None,
     limit: int = 40,
     sleep_seconds: float = 2.0,
     timeout: int = 20,
+    concurrency: int = 1,
+    requests_per_second: Optional[float] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    session: Optional[requests.Session] = None,
+    max_requests_per_second: Optional[float] = None,
+    archive: Optional[ApiArchive] = None,
+    max_pages: Optional[int] = 5,
 ) -> pd.DataFrame:
     """
     Crawl multiple pages of Tiki products for a keyword and return a DataFrame.
-    """
-    headers = _build_headers()
-    rows: List[Dict[str, object]] = []
 
-    for page in range(1, pages + 1):
-        params = {"q": keyword, "limit": limit, "page": page}
-        try:
-            response = requests.get(
-                TIKI_API_URL, headers=headers, params=params, timeout=timeout
-            )
-            response.raise_for_status()
-            payload = response.json()
-            items = payload.get("data", [])
-        except requests.RequestException as exc:
-            print(f"[WARN] Page {page} failed: {exc}")
-            time.sleep(sleep_seconds)
-            continue
-
-        for item in items:
-            metadata = _extract_metadata(item.get("impression_info"))
-            seller_info = _extract_seller(item)
-            category_info = _extract_category(item)
-            stock_info = _extract_stock(item)
-            url_path = item.get("url_path")
-            product_url = f"https://tiki.vn/{url_path}" if url_path else None
-
-            rows.append(
-                {
-                    "id": item.get("id"),
-                    "product_id": item.get("product_id"),
-                    "tiki_product_id": item.get("tiki_product_id"),
-                    "seller_product_id": item.get("seller_product_id"),
-                    "sku": item.get("sku"),
-                    "name": item.get("name"),
-                    "short_description": item.get("short_description"),
-                    "type": item.get("type"),
-                    "brand_name": item.get("brand_name"),
-                    "brand_id": item.get("brand_id"),
-                    "price": item.get("price"),
-                    "list_price": item.get("list_price"),
-                    "original_price": item.get("original_price"),
-                    "market_price": item.get("market_price"),
-                    "discount": item.get("discount"),
-                    "discount_rate": item.get("discount_rate"),
-                    "rating_average": item.get("rating_average"),
-                    "review_count": item.get("review_count"),
-                    "quantity_sold": _safe_get_quantity_sold(item.get("quantity_sold")),
-                    "quantity_sold_text": _safe_get_quantity_sold_text(
-                        item.get("quantity_sold")
-                    ),
-                    "is_official_store": metadata.get("is_official_store"),
-                    "is_freeship": item.get("is_freeship")
-                    or item.get("is_free_ship"),
-                    "inventory_status": item.get("inventory_status"),
-                    "is_tikinow": item.get("is_tikinow"),
-                    "tikinow_time": item.get("tikinow_time"),
-                    "thumbnail_url": item.get("thumbnail_url"),
-                    "product_url": product_url,
-                    "badges": _extract_badges(item),
-                    **seller_info,
-                    **category_info,
-                    **stock_info,
-                }
-            )
+    Pages are fetched by ``concurrency`` threads over one keep-alive session.
+    Requests start at ``requests_per_second`` (default: one request every
+    ``sleep_seconds``) and an :class:`AdaptiveThrottle` speeds up towards
+    ``max_requests_per_second`` (default 4x) while Tiki answers normally and
+    backs off on 429/403/5xx. Failed requests are retried with jittered
+    exponential backoff. Rows keep page order.
 
-        time.sleep(sleep_seconds)
+    ``pages=None`` follows the API's paging info (see ``iter_tiki_products``)
+    for at most ``max_pages`` pages (``None`` for all of them); a number
+    fetches exactly pages 1..N in parallel.
 
-    return pd.DataFrame(rows)
+    With an :class:`ApiArchive` as ``archive`` every raw page is kept, so
+    ``src.scrapers.reextract`` can rebuild the frame later without requests.
+    """
+    return fetch_tiki_products_many(
+        [keyword],
+        pages=pages,
+        limit=limit,
+        sleep_seconds=sleep_seconds,
+        timeout=timeout,
+        concurrency=concurrency,
+        requests_per_second=requests_per_second,
+        retries=retries,
+        backoff=backoff,
+        session=session,
+        max_requests_per_second=max_requests_per_second,
+        archive=archive,
+        max_pages=max_pages,
+    )[keyword]
+
+
+def fetch_tiki_products_many(
+    keywords: Iterable[str],
+    pages: Optional[int] = None,
+    limit: int = 40,
+    sleep_seconds: float = 2.0,
+    timeout: int = 20,
+    concurrency: int = 4,
+    requests_per_second: Optional[float] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    session: Optional[requests.Session] = None,
+    max_requests_per_second: Optional[float] = None,
+    archive: Optional[ApiArchive] = None,
+    max_pages: Optional[int] = 5,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Crawl several keywords through one shared session, thread pool and
+    adaptive rate limit. Returns a DataFrame per keyword (same columns as
+    ``fetch_tiki_products``). With ``pages=None`` each keyword is paginated
+    until its last page or ``max_pages``, ``concurrency`` keywords at a time.
+    """
+    keyword_list = list(dict.fromkeys(keywords))
+    if requests_per_second is None:
+        requests_per_second = 1.0 / sleep_seconds if sleep_seconds > 0 else 10.0
+    throttle = AdaptiveThrottle(requests_per_second, max_rate=max_requests_per_second, name="tiki.vn")
+    own_session = session is None
+    session = session or _build_session(pool_size=concurrency * 2)
+
+    if pages is None:
+        def crawl(keyword: str) -> pd.DataFrame:
+            rows = _iter_keyword_rows(
+                session, throttle, keyword, max_pages, limit, timeout, retries, backoff, archive
+            )
+            return ColumnarRows().extend(rows).to_pandas()
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = {keyword: executor.submit(crawl, keyword) for keyword in keyword_list}
+                return {keyword: future.result() for keyword, future in futures.items()}
+        finally:
+            if own_session:
+                session.close()
+
+    jobs = [(keyword, page) for keyword in keyword_list for page in range(1, pages + 1)]
+    try:
+        results = _fetch_keyword_pages(
+            jobs, session, throttle, concurrency, limit, timeout, retries, backoff, archive
+        )
+    finally:
+        if own_session:
+            session.close()
+
+    frames: Dict[str, pd.DataFrame] = {}
+    with default_metrics().timer("tiki", "parse"):
+        for keyword in keyword_list:
+            rows = ColumnarRows()
+            for page in range(1, pages + 1):
+                for item in results.pop((keyword, page), []):
+                    rows.append(_build_row(item))
+            frames[keyword] = rows.to_pandas()
+    return frames
 
 
 def save_with_timestamp(
     df: pd.DataFrame,
     keyword: str,
     out_dir: str | Path = "../data/raw",
+    fmt: str = "csv",
 ) -> Path:
-    """Save DataFrame to CSV with a date-stamped filename and return the path."""
+    """
+    Save DataFrame with a date-stamped filename and return the path.
+
+    ``fmt="parquet"`` writes ``<out_dir>/parquet/tiki/crawl_date=YYYY-MM-DD/``
+    with the typed Tiki schema from ``src.utils.parquet_io`` instead of CSV.
+    """
     safe_keyword = re.sub(r"\s+", "_", keyword.strip().lower())
+    if fmt == "parquet":
+        from src.utils.parquet_io import write_parquet
+
+        return write_parquet(df, "tiki", f"tiki_{safe_keyword}", root=Path(out_dir) / "parquet")
     ts = datetime.now().strftime("%Y%m%d")
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+
+class ArchiveEntry(NamedTuple):
+    source: str
+    kind: str
+    key: str
+    fetched_at: float
+    segment: str
+    offset: int
+    length: int
+
+
+class ApiArchive:
+    """Append-only, gzip-compressed archive of raw API responses with a SQLite index.
+
+    Every :meth:`put` appends one JSON record as its own gzip member to the
+    day's segment ``<root>/<source>/<YYYY-MM-DD>.jsonl.gz`` (so a segment is
+    also a valid ``.jsonl.gz`` for ``zcat``) and indexes it by
+    ``(source, kind, key)``, e.g. ``("tiki", "search", "<keyword>/<page>")`` or
+    ``("shopee", "item", "<itemid>/<shopid>")``. A key that is stored again
+    points to the newest record; older bytes stay in the segment.
+
+    Records are read back one by one with :func:`read_entry`, which only
+    needs the root path, so worker processes can decode them in parallel.
+    """
+
+    def __init__(self, root: str | Path = "../data/raw/api_archive", compresslevel: int = 6) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " source TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " segment TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL,"
+            " PRIMARY KEY (source, kind, key))"
+        )
+        self._db.commit()
+
+    def __enter__(self) -> "ApiArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def put(self, source: str, kind: str, key: str, payload: object, fetched_at: Optional[float] = None) -> None:
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        record = {"source": source, "kind": kind, "key": key, "fetched_at": fetched_at, "payload": payload}
+        data = gzip.compress(
+            (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"), compresslevel=self.compresslevel
+        )
+        segment = f"{source}/{time.strftime('%Y-%m-%d', time.localtime(fetched_at))}.jsonl.gz"
+        path = self.root / segment
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "ab") as fh:
+                offset = fh.tell()
+                fh.write(data)
+            self._db.execute(
+                "INSERT OR REPLACE INTO records (source, kind, key, fetched_at, segment, offset, length)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, kind, key, fetched_at, segment, offset, len(data)),
+            )
+            self._db.commit()
+
+    def entries(self, source: str, kind: str, key_prefix: Optional[str] = None) -> List[ArchiveEntry]:
+        query = "SELECT source, kind, key, fetched_at, segment, offset, length FROM records WHERE source = ? AND kind = ?"
+        params: List[object] = [source, kind]
+        if key_prefix is not None:
+            query += " AND substr(key, 1, ?) = ?"
+            params += [len(key_prefix), key_prefix]
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY segment, offset", params).fetchall()
+        return [ArchiveEntry(*row) for row in rows]
+
+    def get(self, source: str, kind: str, key: str) -> Optional[object]:
+        """Newest payload stored under ``key``, or ``None``."""
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT source, kind, key, fetched_at, segment, offset, length FROM records"
+                " WHERE source = ? AND kind = ? AND key = ?",
+                (source, kind, key),
+            ).fetchone()
+        return None if row is None else read_entry(self.root, ArchiveEntry(*row))
+
+    def iter_payloads(self, source: str, kind: str, key_prefix: Optional[str] = None) -> Iterator[tuple]:
+        """``(key, payload)`` for every indexed record, in the order they were written."""
+
+        for entry in self.entries(source, kind, key_prefix):
+            yield entry.key, read_entry(self.root, entry)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            counts = self._db.execute("SELECT source, kind, COUNT(*) FROM records GROUP BY source, kind").fetchall()
+        size = sum(path.stat().st_size for path in self.root.glob("*/*.jsonl.gz"))
+        return {"records": {f"{source}/{kind}": n for source, kind, n in counts}, "bytes": size}
+
+
+def read_entry(root: str | Path, entry: ArchiveEntry) -> object:
+    """Decode the payload of one indexed record."""
+
+    with open(Path(root) / entry.segment, "rb") as fh:
+        fh.seek(entry.offset)
+        data = fh.read(entry.length)
+    return json.loads(gzip.decompress(data))["payload"]
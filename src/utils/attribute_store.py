@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class AttributeStore:
+    """Sparse per-item attributes as a long ``(itemid, attr_name_id, value)`` table.
+
+    Attribute names are dictionary-encoded: each distinct name gets a small
+    integer id once (:attr:`names`), so the table grows with the number of
+    attributes actually present instead of ``items x distinct names`` as the
+    spread-out columns do. Item ids and name ids live in typed arrays; values
+    stay as given (Shopee sends text).
+
+    :meth:`pivot` rebuilds the wide view for the attributes you ask for, and
+    :meth:`save` / :meth:`load` write and read the pair of files
+    ``<stem>_attributes`` and ``<stem>_attribute_names`` (CSV or Parquet).
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._itemids = array("q")
+        self._attr_ids = array("i")
+        self._values: List[object] = []
+        self._strings: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def name_id(self, name: str) -> int:
+        attr_id = self._name_ids.get(name)
+        if attr_id is None:
+            attr_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return attr_id
+
+    def add(self, itemid: int, attributes: Mapping[str, object]) -> None:
+        """Store ``{name: value}`` for one item; ``None`` values are skipped."""
+
+        for name, value in attributes.items():
+            if value is None or not name:
+                continue
+            if type(value) is str:
+                value = self._strings.setdefault(value, value)
+            self._itemids.append(int(itemid))
+            self._attr_ids.append(self.name_id(str(name)))
+            self._values.append(value)
+
+    def vocabulary(self) -> pd.DataFrame:
+        return pd.DataFrame({"attr_name_id": pd.array(range(len(self.names)), dtype="int32"), "attr_name": self.names})
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "itemid": pd.array(self._itemids, dtype="int64"),
+                "attr_name_id": pd.array(self._attr_ids, dtype="int32"),
+                "value": pd.Series(self._values, dtype=object),
+            }
+        )
+
+    def to_arrow(self) -> pa.Table:
+        """Long table with ``attr_name`` as a dictionary column over :attr:`names` (no per-row strings)."""
+
+        values = pa.array([None if value is None else str(value) for value in self._values], type=pa.string())
+        return pa.table(
+            {
+                "itemid": pa.array(self._itemids, type=pa.int64()),
+                "attr_name": pa.DictionaryArray.from_arrays(
+                    pa.array(self._attr_ids, type=pa.int32()), pa.array(self.names, type=pa.string())
+                ),
+                "value": values,
+            }
+        )
+
+    def counts(self) -> pd.Series:
+        """How many items have each attribute, most common first."""
+
+        counts = pd.Series(self._attr_ids, dtype="int64").value_counts()
+        counts.index = [self.names[i] for i in counts.index]
+        return counts
+
+    def pivot(self, attributes: Optional[Iterable[str]] = None, itemids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """Wide ``itemid x attribute`` frame for ``attributes`` (all if ``None``), one row per item that has any.
+
+        Columns follow the order of ``attributes``; an item with the same
+        attribute twice keeps the last value, as the spread-out row did.
+        """
+
+        wanted = list(dict.fromkeys(attributes)) if attributes is not None else list(self.names)
+        ids = [self._name_ids[name] for name in wanted if name in self._name_ids]
+        long = self.to_frame()
+        long = long[long["attr_name_id"].isin(ids)]
+        if itemids is not None:
+            long = long[long["itemid"].isin(list(itemids))]
+        wide = long.drop_duplicates(["itemid", "attr_name_id"], keep="last").pivot(
+            index="itemid", columns="attr_name_id", values="value"
+        )
+        wide.columns = [self.names[i] for i in wide.columns]
+        return wide.reindex(columns=[name for name in wanted if name in self._name_ids])
+
+    def join(self, df: pd.DataFrame, attributes: Iterable[str], on: str = "itemid") -> pd.DataFrame:
+        """``df`` with the requested attributes added as columns (missing -> NaN)."""
+
+        wide = self.pivot(attributes, itemids=df[on])
+        return df.join(wide, on=on)
+
+    # ----------------- files -----------------
+
+    def save(self, out_dir: str | Path, stem: str, fmt: str = "csv") -> Tuple[Path, Path]:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if fmt == "parquet":
+            table_path = out_dir / f"{stem}_attributes.parquet"
+            names_path = out_dir / f"{stem}_attribute_names.parquet"
+            pq.write_table(self.to_arrow(), table_path)
+            pq.write_table(pa.Table.from_pandas(self.vocabulary(), preserve_index=False), names_path)
+        elif fmt == "csv":
+            table_path = out_dir / f"{stem}_attributes.csv"
+            names_path = out_dir / f"{stem}_attribute_names.csv"
+            self.to_frame().to_csv(table_path, index=False, encoding="utf-8-sig")
+            self.vocabulary().to_csv(names_path, index=False, encoding="utf-8-sig")
+        else:
+            raise ValueError(f"Unknown format: {fmt!r} (expected 'csv' or 'parquet')")
+        return table_path, names_path
+
+    @classmethod
+    def load(cls, out_dir: str | Path, stem: str, fmt: str = "csv") -> "AttributeStore":
+        out_dir = Path(out_dir)
+        store = cls()
+        if fmt == "parquet":
+            table = pq.read_table(out_dir / f"{stem}_attributes.parquet")
+            attr_names = table.column("attr_name").combine_chunks()
+            if isinstance(attr_names, pa.DictionaryArray):
+                attr_names = attr_names.dictionary_decode()
+            long = pd.DataFrame(
+                {"itemid": table.column("itemid").to_pylist(), "attr_name": attr_names.to_pylist(),
+                 "value": table.column("value").to_pylist()}
+            )
+        elif fmt == "csv":
+            names = pd.read_csv(out_dir / f"{stem}_attribute_names.csv", encoding="utf-8-sig", keep_default_na=False)
+            long = pd.read_csv(out_dir / f"{stem}_attributes.csv", encoding="utf-8-sig", dtype={"value": object})
+            long["attr_name"] = long["attr_name_id"].map(dict(zip(names["attr_name_id"], names["attr_name"])))
+        else:
+            raise ValueError(f"Unknown format: {fmt!r} (expected 'csv' or 'parquet')")
+        for itemid, name, value in zip(long["itemid"], long["attr_name"], long["value"]):
+            if not pd.isna(value):
+                store.add(itemid, {name: value})
+        return store
+
+
+def split_attributes(
+    row: Mapping[str, object], columns: Sequence[str]
+) -> Tuple[Dict[str, object], Dict[str, object]]:
+    """Split a spread-out row into ``(fixed columns, attributes)``."""
+
+    fixed = {name: row.get(name) for name in columns}
+    extra = {name: value for name, value in row.items() if name not in fixed}
+    return fixed, extra
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional
+
+
+class JsonlCheckpoint:
+    """Append-only JSON Lines log for crawl progress.
+
+    Each record is written as one line and flushed straight away; every
+    ``fsync_every`` records the file is also fsync'ed so a crash loses at most
+    that many. Only new records are ever written, so the cost of a
+    checkpoint does not grow with the crawl. A torn last line (crash
+    mid-write) is ignored when reading back.
+    """
+
+    def __init__(self, path: str | Path, fsync_every: int = 10) -> None:
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self._fh: Optional[IO[str]] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "JsonlCheckpoint":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read(self) -> List[Dict[str, object]]:
+        return list(self.iter_records())
+
+    def iter_records(self) -> Iterator[Dict[str, object]]:
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"[WARN] Skipping unreadable checkpoint line in {self.path.name}")
+
+    def reset(self) -> None:
+        """Start a fresh log, dropping anything written before."""
+
+        with self._lock:
+            self._close_locked()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+
+    def append(self, record: Dict[str, object]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._fh is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = self.path.open("a", encoding="utf-8")
+                self._repair_tail()
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            self._pending += 1
+            if self.fsync_every and self._pending >= self.fsync_every:
+                os.fsync(self._fh.fileno())
+                self._pending = 0
+
+    def _repair_tail(self) -> None:
+        # A crash can leave a half-written line without its newline; start on a fresh line.
+        size = self.path.stat().st_size
+        if size:
+            with self.path.open("rb") as fh:
+                fh.seek(size - 1)
+                if fh.read(1) != b"\n":
+                    self._fh.write("\n")
+
+    def _close_locked(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+            self._fh = None
+            self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
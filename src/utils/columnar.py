@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import sys
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+
+# Strings up to this length are interned: category, brand, seller and attribute
+# values repeat across thousands of items but the JSON decoder makes a new str each time.
+INTERN_MAX_LEN = 64
+
+# Cells of keys a row did not have. pd.DataFrame(list_of_dicts) fills those with
+# NaN rather than None, which is what makes an otherwise all-None column float64.
+_MISSING = float("nan")
+
+
+class ColumnarRows:
+    """Append-only table kept as one list per column instead of one dict per row.
+
+    ``append(row)`` spreads a row dict into the column lists and lets the dict
+    go, so a crawl only ever holds the values (plus 8 bytes per cell) rather
+    than a 40-key dict per item. Column names and short string values are
+    interned, so repeated texts are stored once. Keys a row does not have
+    (e.g. Shopee attributes) are filled with NaN and the column order is the
+    order of first appearance, both as with ``pd.DataFrame(list_of_dicts)``.
+
+    :meth:`to_pandas` and :meth:`to_arrow` convert one column at a time and,
+    with ``consume=True``, release each list as soon as it is converted, so
+    the peak is one column above the finished frame.
+    """
+
+    def __init__(self, intern_max_len: int = INTERN_MAX_LEN) -> None:
+        self.intern_max_len = intern_max_len
+        self._columns: Dict[str, List[object]] = {}
+        self._strings: Dict[str, str] = {}
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def _intern(self, value: object) -> object:
+        if type(value) is str and len(value) <= self.intern_max_len:
+            return self._strings.setdefault(value, value)
+        return value
+
+    def append(self, row: Mapping[str, object]) -> None:
+        columns = self._columns
+        rows = self._rows
+        for name, value in row.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[sys.intern(str(name))] = [_MISSING] * rows
+            elif len(column) < rows:
+                # Only columns present in this row are touched; gaps are filled when the column is next used.
+                column.extend([_MISSING] * (rows - len(column)))
+            column.append(self._intern(value))
+        self._rows = rows + 1
+
+    def extend(self, rows: Iterable[Mapping[str, object]]) -> "ColumnarRows":
+        for row in rows:
+            self.append(row)
+        return self
+
+    def _take(self, columns: Optional[Sequence[str]], order: Optional[Sequence[int]], consume: bool) -> Iterator:
+        names = list(self._columns) if columns is None else [name for name in columns if name in self._columns]
+        for name in names:
+            values = self._columns.pop(name) if consume else self._columns[name]
+            if len(values) < self._rows:
+                values.extend([_MISSING] * (self._rows - len(values)))
+            if order is not None:
+                values = [values[i] for i in order]
+            yield name, values
+        if consume:
+            self.clear()
+
+    def to_pandas(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        order: Optional[Sequence[int]] = None,
+        consume: bool = True,
+    ) -> pd.DataFrame:
+        """DataFrame with the same dtypes ``pd.DataFrame(list_of_row_dicts)`` would give.
+
+        ``order`` selects and reorders rows by position; ``columns`` selects columns.
+        """
+
+        n = len(order) if order is not None else self._rows
+        data: Dict[str, pd.Series] = {}
+        for name, values in self._take(columns, order, consume):
+            data[name] = pd.Series(values, dtype=object if not values else None, copy=False)
+            del values
+        return pd.DataFrame(data, index=pd.RangeIndex(n), copy=False) if data else pd.DataFrame(index=pd.RangeIndex(n))
+
+    def to_arrow(
+        self,
+        schema: Optional[Mapping[str, pa.DataType]] = None,
+        columns: Optional[Sequence[str]] = None,
+        order: Optional[Sequence[int]] = None,
+        consume: bool = True,
+    ) -> pa.Table:
+        """Arrow table; columns in ``schema`` (e.g. ``parquet_io.TIKI_SCHEMA``) are cast to its types.
+
+        ``table.to_pandas(types_mapper=pd.ArrowDtype)`` then gives a DataFrame
+        over the same buffers without copying.
+        """
+
+        arrays: Dict[str, pa.Array] = {}
+        for name, values in self._take(columns, order, consume):
+            arrays[name] = _to_arrow_array(values, (schema or {}).get(name))
+            del values
+        return pa.table(arrays)
+
+    def clear(self) -> None:
+        self._columns = {}
+        self._strings = {}
+        self._rows = 0
+
+
+def _to_arrow_array(values: List[object], type_: Optional[pa.DataType]) -> pa.Array:
+    if type_ is not None:
+        try:
+            return pa.array(values, from_pandas=True).cast(type_)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed types in one column (e.g. an attribute that is a number on some items): keep it as text.
+        return pa.array(
+            [None if value is None or value is _MISSING else str(value) for value in values], type=pa.string()
+        )
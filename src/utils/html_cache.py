@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from src.utils.rate_limit import is_block_status, is_challenge_page
+
+
+class CachedPage(NamedTuple):
+    url: str
+    html: str
+    status: Optional[int]
+    fetched_at: float
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(html: Optional[str], status: Optional[int] = None) -> bool:
+    """Only real pages are worth keeping: not 403/429, not another non-2xx status, not a Cloudflare challenge."""
+
+    if not html:
+        return False
+    if status is not None and (is_block_status(status) or not 200 <= status < 300):
+        return False
+    return not is_challenge_page(html)
+
+
+class HtmlCache:
+    """On-disk cache of fetched pages, keyed by the SHA-256 of the URL.
+
+    Each page is stored gzip-compressed as ``<root>/<key[:2]>/<key>.html.gz``;
+    URL, HTTP status, fetch time, size and last access live in a small SQLite
+    index next to them. Entries older than ``ttl`` seconds are treated as
+    misses (but kept for replay), and once the cache grows past ``max_bytes``
+    the least recently used pages are deleted.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = "../data/raw/html_cache",
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_bytes: Optional[int] = 2 * 1024**3,
+        compresslevel: int = 6,
+    ) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER,"
+            " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self._db.commit()
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def __enter__(self) -> "HtmlCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM pages WHERE key = ?", (url_key(url),)).fetchone()
+        return row is not None
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.html.gz"
+
+    def get(self, url: str, allow_stale: bool = False) -> Optional[CachedPage]:
+        """Return the cached page, or ``None`` if missing (or expired, unless ``allow_stale``)."""
+
+        key = url_key(url)
+        with self._lock:
+            row = self._db.execute("SELECT status, fetched_at FROM pages WHERE key = ?", (key,)).fetchone()
+            expired = row is not None and (
+                not allow_stale and self.ttl is not None and time.time() - row[1] > self.ttl
+            )
+            if row is None or expired:
+                self.misses += 1
+                return None
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as fh:
+                    html = fh.read()
+            except OSError:
+                # Index and files got out of sync (e.g. files deleted by hand).
+                self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+        return CachedPage(url, html, row[0], row[1])
+
+    def put(self, url: str, html: str, status: Optional[int] = None, fetched_at: Optional[float] = None) -> bool:
+        """Store ``html`` for ``url``; blocked, non-2xx and challenge pages are skipped (returns ``False``).
+
+        Otherwise a replay would serve the block page for the whole TTL.
+        """
+
+        if not is_cacheable(html, status):
+            return False
+        key = url_key(url)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = gzip.compress(html.encode("utf-8"), compresslevel=self.compresslevel)
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (key, url, status, fetched_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url, status, fetched_at if fetched_at is not None else now, now, len(data)),
+            )
+            self._db.commit()
+            self._total_bytes += len(data) - (old[0] if old else 0)
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict_locked(self.max_bytes)
+        return True
+
+    def _evict_locked(self, target_bytes: int) -> int:
+        removed = 0
+        rows = self._db.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self._total_bytes <= target_bytes:
+                break
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+            self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self._total_bytes -= size
+            removed += 1
+        self._db.commit()
+        return removed
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """Drop least recently used pages until the cache fits ``target_bytes``."""
+
+        target = self.max_bytes if target_bytes is None else target_bytes
+        if target is None:
+            return 0
+        with self._lock:
+            return self._evict_locked(target)
+
+    def urls(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT url FROM pages ORDER BY fetched_at")]
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+RESULT_FILE_RE = re.compile(r"scraped_results_p(\d+)\.csv$", re.IGNORECASE)
+
+
+def find_result_files(src_dir: str | Path, first: Optional[int] = None, last: Optional[int] = None) -> List[Tuple[int, Path]]:
+    """Return ``(page, path)`` for every ``scraped_results_p{page}.csv`` in range, sorted by page."""
+
+    found = []
+    for path in Path(src_dir).glob("scraped_results_p*.csv"):
+        m = RESULT_FILE_RE.search(path.name)
+        if not m:
+            continue
+        page = int(m.group(1))
+        if (first is None or page >= first) and (last is None or page <= last):
+            found.append((page, path))
+    return sorted(found)
+
+
+class MergeState:
+    """On-disk bookkeeping for incremental merges: merged files and dedupe keys already written."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, size INTEGER, mtime REAL, rows INTEGER);
+            CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+    def reset(self) -> None:
+        self._db.executescript("DELETE FROM files; DELETE FROM seen; DELETE FROM meta;")
+        self._db.commit()
+
+    def is_current(self, path: Path) -> bool:
+        stat = path.stat()
+        row = self._db.execute("SELECT size, mtime FROM files WHERE name = ?", (path.name,)).fetchone()
+        return row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime
+
+    def mark_file(self, path: Path, rows: int) -> None:
+        stat = path.stat()
+        self._db.execute(
+            "INSERT OR REPLACE INTO files (name, size, mtime, rows) VALUES (?, ?, ?, ?)",
+            (path.name, stat.st_size, stat.st_mtime, rows),
+        )
+        self._db.commit()
+
+    def add_keys(self, keys: Sequence[Optional[str]]) -> List[bool]:
+        """Record ``keys``; return for each one whether it is new. ``None`` keys are always new."""
+
+        new = []
+        for key in keys:
+            if key is None:
+                new.append(True)
+                continue
+            cur = self._db.execute("INSERT OR IGNORE INTO seen (key) VALUES (?)", (key,))
+            new.append(cur.rowcount == 1)
+        return new
+
+    def get_columns(self) -> Optional[List[str]]:
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'columns'").fetchone()
+        return row[0].split("\x1f") if row else None
+
+    def set_columns(self, columns: Iterable[str]) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('columns', ?)", ("\x1f".join(columns),))
+        self._db.commit()
+
+
+def _row_keys(chunk: pd.DataFrame, key_columns: Sequence[str]) -> List[Optional[str]]:
+    # The first non-empty key column identifies the row (ID, then source_url).
+    keys: List[Optional[str]] = [None] * len(chunk)
+    for column in reversed(key_columns):
+        if column not in chunk.columns:
+            continue
+        values = chunk[column].tolist()
+        for i, value in enumerate(values):
+            if isinstance(value, str) and value.strip():
+                keys[i] = f"{column}:{value.strip()}"
+    return keys
+
+
+def _read_columns(path: Path) -> List[str]:
+    return list(pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns)
+
+
+def merge_result_files(
+    files: Sequence[Path],
+    out_path: str | Path,
+    fmt: str = "csv",
+    key_columns: Sequence[str] = ("ID", "source_url"),
+    chunksize: int = 5000,
+    incremental: bool = True,
+    source: str = "batdongsan",
+) -> Dict[str, int]:
+    """Stream ``files`` chunk by chunk into one CSV (or a Parquet directory) at ``out_path``.
+
+    Columns are aligned to the union of all headers in first-seen order. Rows
+    whose ``key_columns`` value was already written are dropped, using a
+    SQLite index at ``<out_path>.merge.sqlite``. With ``incremental=True``,
+    files unchanged since the previous merge are skipped and new rows are
+    appended; if new columns show up the output is rebuilt from scratch.
+    Only one chunk is held in memory at a time.
+    """
+
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Unknown format: {fmt!r} (expected 'csv' or 'parquet')")
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    state = MergeState(out_path.with_name(out_path.name + ".merge.sqlite"))
+
+    columns: List[str] = []
+    for path in files:
+        for column in _read_columns(path):
+            if column not in columns:
+                columns.append(column)
+    columns.append("_source_file")
+
+    previous = state.get_columns()
+    rebuild = not incremental or previous is None or not out_path.exists()
+    if not rebuild and any(column not in previous for column in columns):
+        print("[INFO] New columns since the last merge; rebuilding the output")
+        rebuild = True
+    if rebuild:
+        state.reset()
+        if out_path.is_dir():
+            for part in out_path.glob("*.parquet"):
+                part.unlink()
+        elif out_path.exists():
+            out_path.unlink()
+        state.set_columns(columns)
+    else:
+        columns = previous
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        from src.utils.parquet_io import to_arrow_table
+
+        out_path.mkdir(parents=True, exist_ok=True)
+
+    run_id = time.strftime("%Y%m%d%H%M%S")
+    stats = {"files": 0, "files_skipped": 0, "rows_read": 0, "rows_written": 0, "duplicates": 0}
+    header_written = fmt == "csv" and out_path.exists() and out_path.stat().st_size > 0
+    try:
+        for path in files:
+            if not rebuild and state.is_current(path):
+                stats["files_skipped"] += 1
+                continue
+            written = 0
+            reader = pd.read_csv(path, dtype=str, chunksize=chunksize, encoding="utf-8-sig")
+            for part, chunk in enumerate(reader):
+                stats["rows_read"] += len(chunk)
+                chunk["_source_file"] = path.name
+                new = state.add_keys(_row_keys(chunk, key_columns))
+                chunk = chunk.loc[new].reindex(columns=columns)
+                stats["duplicates"] += len(new) - len(chunk)
+                if chunk.empty:
+                    continue
+                if fmt == "csv":
+                    chunk.to_csv(
+                        out_path,
+                        mode="a" if header_written else "w",
+                        header=not header_written,
+                        index=False,
+                        encoding="utf-8" if header_written else "utf-8-sig",
+                    )
+                    header_written = True
+                else:
+                    part_path = out_path / f"{path.stem}-{run_id}-{part:04d}.parquet"
+                    pq.write_table(to_arrow_table(chunk, source), part_path)
+                written += len(chunk)
+            state.mark_file(path, written)
+            stats["files"] += 1
+            stats["rows_written"] += written
+    finally:
+        state.close()
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge scraped_results_p{X}.csv files into one output.")
+    parser.add_argument("--src", default="data/raw/scraped", help="folder with scraped_results_p*.csv")
+    parser.add_argument("--from", dest="first", type=int, default=None, help="first page X (inclusive)")
+    parser.add_argument("--to", dest="last", type=int, default=None, help="last page Y (inclusive)")
+    parser.add_argument("--out", default=None, help="output file (csv) or folder (parquet)")
+    parser.add_argument("--format", dest="fmt", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--full", action="store_true", help="rebuild instead of merging only changed files")
+    args = parser.parse_args(argv)
+
+    files = find_result_files(args.src, args.first, args.last)
+    if not files:
+        print(f"[WARN] No scraped_results_p*.csv in {args.src}")
+        return 1
+
+    pages = {page for page, _ in files}
+    first = args.first if args.first is not None else min(pages)
+    last = args.last if args.last is not None else max(pages)
+    missing = [page for page in range(first, last + 1) if page not in pages]
+
+    out = args.out
+    if out is None:
+        suffix = ".csv" if args.fmt == "csv" else ""
+        out = Path("data/raw/merge") / f"scraped_results_{first}to{last}{suffix}"
+
+    stats = merge_result_files([path for _, path in files], out, fmt=args.fmt, chunksize=args.chunksize, incremental=not args.full)
+    print(
+        f"Merged {stats['files']} files ({stats['files_skipped']} unchanged) -> {out}: "
+        f"{stats['rows_written']} new rows, {stats['duplicates']} duplicates dropped"
+    )
+    if missing:
+        print("Missing pages:", ", ".join(str(page) for page in missing))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
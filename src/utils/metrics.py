@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the stage histograms: from a parse of one card up to a slow page.goto.
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max (not thread-safe on its own)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile by interpolating inside the bucket it falls in."""
+
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "sum_s": round(self.total, 6),
+            "mean_s": round(self.total / self.count, 6) if self.count else None,
+            "min_s": round(self.min, 6) if self.count else None,
+            "p50_s": _round(self.quantile(0.5)),
+            "p90_s": _round(self.quantile(0.9)),
+            "p99_s": _round(self.quantile(0.99)),
+            "max_s": round(self.max, 6) if self.count else None,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 6)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+
+class CrawlMetrics:
+    """Per-stage timings and counters shared by the Tiki, Shopee and batdongsan scrapers.
+
+    Stages ("launch", "goto", "wait_selector", "parse", "sleep", ...) are
+    timed per source into :class:`Histogram` objects; HTTP statuses and
+    blocked/Cloudflare pages are counted. Everything is thread-safe and can
+    be read while a crawl runs (:meth:`snapshot`, :meth:`report`), exported
+    at the end as JSON (:meth:`write_json`) or in the Prometheus text format
+    (:meth:`write_prometheus`), or written out periodically with
+    :meth:`start_live`.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._live_stop: Optional[threading.Event] = None
+        self._live_thread: Optional[threading.Thread] = None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self._stages: Dict[Tuple[str, str], Histogram] = {}
+            self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    # ----------------- recording -----------------
+
+    def observe(self, source: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._stages.get((source, stage))
+            if histogram is None:
+                histogram = self._stages[(source, stage)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, source: str, stage: str) -> Iterator[None]:
+        """Time the ``with`` block into the ``stage`` histogram, also when it raises."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(source, stage, time.perf_counter() - start)
+
+    def inc(self, name: str, amount: float = 1, **labels: object) -> None:
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record_status(self, source: str, status: Optional[int]) -> None:
+        self.inc("http_responses", source=source, status=status if status is not None else "none")
+
+    def record_blocked(self, source: str, reason: str) -> None:
+        self.inc("blocked", source=source, reason=reason)
+
+    def record_error(self, source: str, stage: str, exc: BaseException) -> None:
+        self.inc("errors", source=source, stage=stage, error=type(exc).__name__)
+
+    # ----------------- reading -----------------
+
+    def counter(self, name: str, **labels: object) -> float:
+        """Sum of counter ``name`` over every label set that includes ``labels``."""
+
+        wanted = {(label, str(value)) for label, value in labels.items()}
+        with self._lock:
+            return sum(value for (key, pairs), value in self._counters.items() if key == name and wanted <= set(pairs))
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            stages: Dict[str, Dict[str, object]] = {}
+            for (source, stage), histogram in sorted(self._stages.items()):
+                stages.setdefault(source, {})[stage] = histogram.summary()
+            counters: Dict[str, List[Dict[str, object]]] = {}
+            for (name, pairs), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({**dict(pairs), "value": value})
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "elapsed_s": round(time.time() - self.started, 3),
+                "stages": stages,
+                "counters": counters,
+            }
+
+    def report(self) -> str:
+        """One line per source: total time, count and p90 of each stage, then status/blocked counts."""
+
+        snap = self.snapshot()
+        lines = [f"[METRICS] {snap['elapsed_s']:.0f}s"]
+        for source, stages in snap["stages"].items():
+            parts = [
+                f"{stage}={info['sum_s']:.1f}s/{info['count']} (p90 {info['p90_s']:.2f}s)"
+                for stage, info in sorted(stages.items(), key=lambda item: -item[1]["sum_s"])
+            ]
+            lines.append(f"  {source or '-'}: " + ", ".join(parts))
+        for name in ("http_responses", "blocked"):
+            entries = snap["counters"].get(name, [])
+            if entries:
+                text = ", ".join(
+                    f"{entry.get('source', '-')}:{entry.get('status', entry.get('reason'))}={entry['value']:g}"
+                    for entry in entries
+                )
+                lines.append(f"  {name}: {text}")
+        return "\n".join(lines)
+
+    def prometheus_text(self, prefix: str = "crawl") -> str:
+        lines: List[str] = []
+        with self._lock:
+            if self._stages:
+                name = f"{prefix}_stage_seconds"
+                lines += [f"# HELP {name} Time spent per crawl stage.", f"# TYPE {name} histogram"]
+                for (source, stage), histogram in sorted(self._stages.items()):
+                    base = (("source", source), ("stage", stage))
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + [math.inf], histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else repr(float(bound))
+                        lines.append(f"{name}_bucket{_labels(base + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(base)} {histogram.total!r}")
+                    lines.append(f"{name}_count{_labels(base)} {histogram.count}")
+            seen = set()
+            for (counter, pairs), value in sorted(self._counters.items()):
+                name = f"{prefix}_{counter}_total"
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_labels(pairs)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    # ----------------- export -----------------
+
+    def write_json(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2) + "\n")
+        return path
+
+    def write_prometheus(self, path: str | Path, prefix: str = "crawl") -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, self.prometheus_text(prefix))
+        return path
+
+    def export(self, out_dir: str | Path = "../data/processed/metrics", name: str = "crawl_metrics") -> Tuple[Path, Path]:
+        """Write ``<name>.json`` and ``<name>.prom`` into ``out_dir``."""
+
+        out_dir = Path(out_dir)
+        return self.write_json(out_dir / f"{name}.json"), self.write_prometheus(out_dir / f"{name}.prom")
+
+    def start_live(
+        self,
+        every: float = 30.0,
+        out_dir: Optional[str | Path] = None,
+        name: str = "crawl_metrics",
+        verbose: bool = True,
+    ) -> None:
+        """Print :meth:`report` (and rewrite the export files if ``out_dir`` is set) every ``every`` seconds."""
+
+        self.stop_live()
+        stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(every):
+                if verbose:
+                    print(self.report())
+                if out_dir is not None:
+                    self.export(out_dir, name)
+
+        self._live_stop = stop
+        self._live_thread = threading.Thread(target=loop, daemon=True)
+        self._live_thread.start()
+
+    def stop_live(self) -> None:
+        if self._live_stop is not None:
+            self._live_stop.set()
+            self._live_thread.join()
+            self._live_stop = self._live_thread = None
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    # Readers (a Prometheus textfile collector, a notebook) never see a half-written file.
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+_DEFAULT_METRICS: Optional[CrawlMetrics] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_metrics() -> CrawlMetrics:
+    """The process-wide registry the scrapers record into."""
+
+    global _DEFAULT_METRICS
+    if _DEFAULT_METRICS is None:
+        with _DEFAULT_LOCK:
+            if _DEFAULT_METRICS is None:
+                _DEFAULT_METRICS = CrawlMetrics()
+    return _DEFAULT_METRICS
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import functools
+import unicodedata
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Column-at-a-time versions of the scalar text parsers. Each function takes a
+# Series of strings (None/NaN for missing) and returns a Series on the same
+# index matching, value for value, the scalar function named in its docstring;
+# scripts/check_normalizer_parity.py checks that. Scraped columns repeat the
+# same few thousand strings ("4,5 tỷ", "3 phòng"), so the public functions
+# work on the distinct values and broadcast the result back.
+
+# Python-backed strings: the .str regexes must follow Python's \s and \d (Unicode), like the scalar code.
+_STR = pd.StringDtype("python")
+_NUMBER_PAT = r"(\d+(?:[\.,]\d+)?)"
+_INT_PAT = r"(\d+)"
+
+# char -> char without combining marks (NFKD). Filled lazily with every new char seen.
+_FOLD_TABLE: Dict[int, str] = {}
+
+
+def _fold_char(ch: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", ch)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _fold_table(values: Iterable[str]) -> Dict[int, str]:
+    for ch in set("".join(values)):
+        code = ord(ch)
+        if code >= 128 and code not in _FOLD_TABLE:
+            _FOLD_TABLE[code] = _fold_char(ch)
+    return _FOLD_TABLE
+
+
+def _on_uniques(fn):
+    @functools.wraps(fn)
+    def wrapper(series: pd.Series) -> pd.Series:
+        codes, uniques = pd.factorize(series.astype("object"), use_na_sentinel=True)
+        # Missing values get their own slot at the end so they go through fn too.
+        distinct = pd.Series(list(uniques) + [None], dtype=object)
+        codes = np.where(codes < 0, len(uniques), codes)
+        result = fn(distinct)
+        out = result.iloc[codes]
+        out.index = series.index
+        return out
+
+    return wrapper
+
+
+def fold_accents(series: pd.Series) -> pd.Series:
+    """Strip accents (NFKD minus combining marks) using the memoised per-character table."""
+
+    text = series.astype("object").where(series.notna(), None)
+    present = text.dropna()
+    uniques = present.unique()
+    non_ascii = [value for value in uniques if not value.isascii()]
+    if not non_ascii:
+        return text
+    table = _fold_table(non_ascii)
+    folded = {value: value.translate(table) for value in non_ascii}
+    return text.map(lambda value: folded.get(value, value) if value is not None else None)
+
+
+@_on_uniques
+def normalize_text(series: pd.Series) -> pd.Series:
+    """``batdongsan_scraper._normalize_text`` (missing/empty -> "")."""
+
+    folded = fold_accents(series.astype("object").where(series.notna() & (series.astype("object") != ""), None))
+    return folded.fillna("").astype(_STR).str.lower().astype(object)
+
+
+def _clean_text(series: pd.Series) -> pd.Series:
+    # batdongsan_detail._clean_text for strings; missing stays missing, "" becomes missing.
+    text = series.astype("object").where(series.notna(), None).astype(_STR)
+    text = text.str.replace("\xa0", " ", regex=False).str.replace(r"\s+", " ", regex=True).str.strip()
+    return text.where(text != "")
+
+
+@_on_uniques
+def norm_key(series: pd.Series) -> pd.Series:
+    """``batdongsan_detail._norm_key`` (missing -> "")."""
+
+    cleaned = _clean_text(series).fillna("").astype(object)
+    folded = fold_accents(cleaned).astype(_STR).str.lower().str.replace("đ", "d", regex=False)
+    return folded.str.replace(r"\s+", " ", regex=True).str.strip().astype(object)
+
+
+def _parse_unique(match: pd.Series, convert) -> pd.Series:
+    # Python's float()/int() (not to_numeric): same rounding and non-ASCII digits as the scalar code.
+    values = match.dropna()
+    lookup = {value: convert(value) for value in values.unique()}
+    return match.astype(object).map(lambda value: lookup.get(value) if isinstance(value, str) else None)
+
+
+def _first_number(text: pd.Series) -> pd.Series:
+    match = text.astype(_STR).str.extract(_NUMBER_PAT, expand=False)
+    return _parse_unique(match, lambda digits: float(digits.replace(",", "."))).astype(float)
+
+
+@_on_uniques
+def parse_price(series: pd.Series) -> pd.Series:
+    """``batdongsan_scraper.parse_price``."""
+
+    normalized = normalize_text(series).astype(_STR)
+    value = _first_number(normalized)
+    factor = np.select(
+        [
+            normalized.str.contains("ty", regex=False).to_numpy(dtype=bool),
+            normalized.str.contains("trieu", regex=False).to_numpy(dtype=bool),
+            (normalized.str.contains("nghin", regex=False) | normalized.str.contains("ngan", regex=False)).to_numpy(
+                dtype=bool
+            ),
+        ],
+        [1_000_000_000, 1_000_000, 1_000],
+        default=1,
+    )
+    result = value * factor
+    return result.where(~normalized.str.contains("thoa thuan", regex=False).to_numpy(dtype=bool))
+
+
+@_on_uniques
+def parse_area(series: pd.Series) -> pd.Series:
+    """``batdongsan_scraper.parse_area``."""
+
+    return _first_number(normalize_text(series))
+
+
+def _first_int(text: pd.Series) -> pd.Series:
+    match = text.astype(_STR).str.extract(_INT_PAT, expand=False)
+    values = _parse_unique(match, int)
+    try:
+        return values.astype("Int64")
+    except (OverflowError, TypeError, ValueError):
+        return values
+
+
+@_on_uniques
+def parse_integer(series: pd.Series) -> pd.Series:
+    """``batdongsan_scraper.parse_integer``."""
+
+    return _first_int(normalize_text(series))
+
+
+@_on_uniques
+def to_float_number(series: pd.Series) -> pd.Series:
+    """``batdongsan_detail._to_float_number``."""
+
+    text = series.astype("object").where(series.notna(), None).astype(_STR)
+    return _first_number(text.str.strip().str.lower())
+
+
+@_on_uniques
+def to_int(series: pd.Series) -> pd.Series:
+    """``batdongsan_detail._to_int``."""
+
+    text = series.astype("object").where(series.notna() & (series.astype("object") != ""), None)
+    return _first_int(text.astype(_STR))
+
+
+@_on_uniques
+def parse_price_to_billion(series: pd.Series) -> pd.Series:
+    """``batdongsan_detail._parse_price_to_billion``: sums every "<number> <unit>" pair, in tỷ."""
+
+    raw = series.astype("object").where(series.notna() & (series.astype("object") != ""), None)
+    raw = raw.reset_index(drop=True)
+    whole = norm_key(raw)
+    skip = (
+        raw.isna()
+        | (whole == "")
+        | whole.str.contains("thoa thuan", regex=False)
+        | whole.str.contains("thuong luong", regex=False)
+    )
+
+    # One row per whitespace-separated token, keeping its position inside the original value.
+    tokens = raw[~skip].astype(_STR).str.split(r"\s+", regex=True).explode()
+    if tokens.empty:
+        return pd.Series(np.nan, index=series.index, dtype=float)
+    frame = pd.DataFrame({"row": tokens.index, "tok": tokens.to_numpy(dtype=object)})
+    frame["pos"] = frame.groupby("row").cumcount()
+    frame["norm"] = norm_key(frame["tok"]).to_numpy()
+    frame["unit"] = frame.groupby("row")["norm"].shift(-1).fillna("")
+    frame["val"] = to_float_number(frame["norm"]).to_numpy()
+
+    tok = frame["tok"].astype(_STR)
+    norm = frame["norm"].astype(_STR)
+    unit = frame["unit"].astype(_STR)
+    is_ty = (
+        tok.str.contains("tỷ", regex=False)
+        | norm.str.contains("ty", regex=False)
+        | unit.str.contains("tỷ", regex=False)
+        | unit.str.contains("ty", regex=False)
+    )
+    is_trieu = (
+        tok.str.contains("triệu", regex=False)
+        | norm.str.contains("trieu", regex=False)
+        | unit.str.contains("triệu", regex=False)
+        | unit.str.contains("trieu", regex=False)
+    )
+    is_nghin = (
+        norm.str.contains("nghin", regex=False)
+        | norm.str.contains("ngan", regex=False)
+        | unit.str.contains("nghin", regex=False)
+        | unit.str.contains("ngan", regex=False)
+    )
+    has_val = frame["val"].notna().to_numpy()
+    is_ty = is_ty.to_numpy(dtype=bool) & has_val
+    is_trieu = is_trieu.to_numpy(dtype=bool) & has_val & ~is_ty
+    is_nghin = is_nghin.to_numpy(dtype=bool) & has_val & ~is_ty & ~is_trieu
+    val = frame["val"].to_numpy()
+    frame["part"] = np.select([is_ty, is_trieu, is_nghin], [val, val / 1000.0, val / 1_000_000.0], default=np.nan)
+
+    # Add the parts left to right, as the scalar loop does, so float rounding is identical.
+    wide = frame.pivot(index="row", columns="pos", values="part")
+    totals = np.zeros(len(wide))
+    for pos in wide.columns:
+        totals = totals + np.nan_to_num(wide[pos].to_numpy(), nan=0.0)
+    found = wide.notna().any(axis=1).to_numpy()
+    # Python's round() is correctly rounded; np.round is not, so round each distinct total.
+    totals = pd.Series(totals, index=wide.index)
+    rounded = totals.map({total: round(float(total), 6) for total in totals.unique()})
+    result = rounded.where(found).reindex(raw.index).astype(float)
+    result.index = series.index
+    return result
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.utils.metrics import default_metrics
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality text columns are stored dictionary-encoded and come back as pandas categoricals.
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+TIMESTAMP = pa.timestamp("us")
+
+TIKI_SCHEMA: Dict[str, pa.DataType] = {
+    "id": pa.int64(),
+    "product_id": pa.int64(),
+    "tiki_product_id": pa.int64(),
+    "seller_product_id": pa.int64(),
+    "sku": pa.string(),
+    "name": pa.string(),
+    "short_description": pa.string(),
+    "type": CATEGORY,
+    "brand_name": CATEGORY,
+    "brand_id": pa.int64(),
+    "price": pa.float64(),
+    "list_price": pa.float64(),
+    "original_price": pa.float64(),
+    "market_price": pa.float64(),
+    "discount": pa.float64(),
+    "discount_rate": pa.float64(),
+    "rating_average": pa.float64(),
+    "review_count": pa.int64(),
+    "quantity_sold": pa.int64(),
+    "quantity_sold_text": pa.string(),
+    "is_official_store": pa.bool_(),
+    "is_freeship": pa.bool_(),
+    "inventory_status": CATEGORY,
+    "is_tikinow": pa.bool_(),
+    "tikinow_time": pa.string(),
+    "thumbnail_url": pa.string(),
+    "product_url": pa.string(),
+    "badges": pa.string(),
+    "seller_id": pa.int64(),
+    "seller_name": CATEGORY,
+    "seller_type": CATEGORY,
+    "seller_logo": pa.string(),
+    "seller_rating": pa.float64(),
+    "seller_reviews": pa.int64(),
+    "seller_followers": pa.int64(),
+    "category_id": pa.int64(),
+    "category_name": CATEGORY,
+    "stock_qty": pa.int64(),
+    "stock_available": pa.int64(),
+    "stock_preorder": pa.bool_(),
+    "stock_min_sale_qty": pa.int64(),
+    "stock_max_sale_qty": pa.int64(),
+}
+
+# Only the fixed fields; the per-product ``**attributes`` columns are stored as strings.
+SHOPEE_SCHEMA: Dict[str, pa.DataType] = {
+    "itemid": pa.int64(),
+    "shopid": pa.int64(),
+    "name": pa.string(),
+    "description": pa.string(),
+    "price": pa.float64(),
+    "price_before_discount": pa.float64(),
+    "discount": pa.string(),
+    "historical_sold": pa.int64(),
+    "rating_star": pa.float64(),
+    "stock": pa.int64(),
+    "brand": CATEGORY,
+    "category_id": pa.int64(),
+    "shop_location": CATEGORY,
+    "is_official_shop": pa.bool_(),
+    "is_preferred_plus_seller": pa.bool_(),
+    "liked_count": pa.int64(),
+    "cmt_count": pa.int64(),
+}
+
+BATDONGSAN_SCHEMA: Dict[str, pa.DataType] = {
+    "ID": pa.string(),
+    "Giá (tỷ đồng)": pa.float64(),
+    "Giá đã tăng 1 năm qua (%)": pa.float64(),
+    "Diện tích": pa.float64(),
+    "Số phòng tắm": pa.int64(),
+    "Số phòng ngủ": pa.int64(),
+    "Số tầng": pa.int64(),
+    "Có nội thất": pa.int8(),
+    "Mặt tiền(m)": pa.float64(),
+    "Đường vào(m)": pa.float64(),
+    "Hướng nhà": CATEGORY,
+    "Đường": pa.string(),
+    "Phường": CATEGORY,
+    "Quận": CATEGORY,
+    "Thành Phố": CATEGORY,
+    "Có sổ hồng": pa.int8(),
+    "Có xác thực": pa.int8(),
+    "Ngày đăng": TIMESTAMP,
+    "Ngày hết hạn": TIMESTAMP,
+    "Loại Tin": CATEGORY,
+    "ngày crawl": TIMESTAMP,
+    "blocked": pa.bool_(),
+    "source_url": pa.string(),
+    "address": pa.string(),
+    "legal": pa.string(),
+    "raw_price": pa.string(),
+    "raw_area": pa.string(),
+    "page_title": pa.string(),
+}
+
+SCHEMAS: Dict[str, Dict[str, pa.DataType]] = {
+    "tiki": TIKI_SCHEMA,
+    "shopee": SHOPEE_SCHEMA,
+    "batdongsan": BATDONGSAN_SCHEMA,
+}
+
+_TRUE_VALUES = {"true", "1", "yes", "y", "t"}
+_FALSE_VALUES = {"false", "0", "no", "n", "f"}
+
+
+def _to_bool(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    def convert(value):
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return None
+        text = str(value).strip().lower()
+        if text in _TRUE_VALUES:
+            return True
+        if text in _FALSE_VALUES:
+            return False
+        return None
+
+    return series.map(convert).astype("boolean")
+
+
+def _to_text(series: pd.Series) -> pd.Series:
+    # Mixed columns (numbers, lists, dicts from the APIs) are stored as their text form.
+    # pd.isna on a list cell returns an array, so only scalars are checked for NA.
+    return series.map(
+        lambda v: v if v is None or isinstance(v, str) or (pd.api.types.is_scalar(v) and pd.isna(v)) else str(v)
+    ).astype("string")
+
+
+def _coerce_column(source: str, name: str, series: pd.Series, dtype: pa.DataType) -> pa.Array:
+    if pa.types.is_integer(dtype):
+        numeric = pd.to_numeric(series, errors="coerce")
+        # The declared type is kept so files stay mergeable by read_parquet: values that are not
+        # integers or do not fit (e.g. "Số tầng" = 2.5) become null rather than switching the column to float64.
+        info = np.iinfo(dtype.to_pandas_dtype())
+        bad = numeric.notna() & ((numeric % 1 != 0) | (numeric < info.min) | (numeric > info.max))
+        if bad.any():
+            count = int(bad.sum())
+            logger.warning("%s column %r: %d non-integer or out-of-range values stored as null", source, name, count)
+            default_metrics().inc("parquet_values_nulled", count, source=source, column=name)
+            numeric = numeric.mask(bad)
+        return pa.array(numeric.astype("Int64"), type=dtype, from_pandas=True)
+    if pa.types.is_floating(dtype):
+        return pa.array(pd.to_numeric(series, errors="coerce"), type=dtype, from_pandas=True)
+    if pa.types.is_boolean(dtype):
+        return pa.array(_to_bool(series), type=dtype, from_pandas=True)
+    if pa.types.is_timestamp(dtype):
+        return pa.array(pd.to_datetime(series, errors="coerce"), type=dtype, from_pandas=True)
+    if pa.types.is_dictionary(dtype):
+        return pa.array(_to_text(series), type=pa.string(), from_pandas=True).dictionary_encode()
+    return pa.array(_to_text(series), type=pa.string(), from_pandas=True)
+
+
+def to_arrow_table(df: pd.DataFrame, source: str) -> pa.Table:
+    """Convert ``df`` to an Arrow table using the declared schema for ``source``.
+
+    Declared columns are coerced to their type (unparseable values become
+    null) and missing ones are added as all-null. Any extra columns, such as
+    Shopee attributes, are kept as strings after the declared ones.
+    """
+
+    schema = SCHEMAS[source]
+    arrays: List[pa.Array] = []
+    fields: List[pa.Field] = []
+    for name, dtype in schema.items():
+        if name in df.columns:
+            array = _coerce_column(source, name, df[name], dtype)
+        elif pa.types.is_dictionary(dtype):
+            array = pa.nulls(len(df), type=pa.string()).dictionary_encode()
+        else:
+            array = pa.nulls(len(df), type=dtype)
+        arrays.append(array)
+        fields.append(pa.field(name, array.type))
+    for name in df.columns:
+        if name not in schema:
+            arrays.append(pa.array(_to_text(df[name]), type=pa.string(), from_pandas=True))
+            fields.append(pa.field(str(name), pa.string()))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def write_parquet(
+    df: pd.DataFrame,
+    source: str,
+    name: str,
+    root: str | Path = "../data/raw/parquet",
+    crawl_date: Optional[date | str] = None,
+) -> Path:
+    """Write ``df`` to ``<root>/<source>/crawl_date=YYYY-MM-DD/<name>.parquet`` and return the path."""
+
+    if source not in SCHEMAS:
+        raise ValueError(f"Unknown source: {source!r} (expected one of {sorted(SCHEMAS)})")
+    if crawl_date is None:
+        crawl_date = datetime.now().date()
+    day = crawl_date if isinstance(crawl_date, str) else crawl_date.isoformat()
+    safe_name = re.sub(r"\s+", "_", name.strip())
+
+    out_dir = Path(root) / source / f"crawl_date={day}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    file_path = out_dir / f"{safe_name}.parquet"
+    pq.write_table(to_arrow_table(df, source), file_path, compression="zstd")
+    return file_path
+
+
+def read_parquet(
+    source: str,
+    columns: Optional[Iterable[str]] = None,
+    root: str | Path = "../data/raw/parquet",
+    crawl_dates: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Load a source's Parquet files, reading only ``columns`` and the ``crawl_dates`` partitions.
+
+    ``crawl_date`` is available as a column. Files written with different
+    extra columns are read against their union schema.
+    """
+
+    path = Path(root) / source
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    schemas = [pq.read_schema(fragment.path) for fragment in dataset.get_fragments()]
+    if schemas:
+        schema = pa.unify_schemas(schemas + [dataset.partitioning.schema])
+        dataset = ds.dataset(path, format="parquet", partitioning="hive", schema=schema)
+
+    filter_expr = None
+    if crawl_dates is not None:
+        filter_expr = ds.field("crawl_date").isin([str(d) for d in crawl_dates])
+    table = dataset.to_table(columns=list(columns) if columns is not None else None, filter=filter_expr)
+    return table.to_pandas()
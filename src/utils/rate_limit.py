@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from src.utils.metrics import default_metrics
+
+
+def jittered_backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff delay for retry number ``attempt`` (0-based)."""
+
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_retryable_status(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def is_block_status(status: int) -> bool:
+    """Statuses that mean "slow down" rather than "try again": rate limited or forbidden."""
+
+    return status in (403, 429)
+
+
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_CHALLENGE_MARKUP_RE = re.compile(r"cf-chl|cf-error", re.IGNORECASE)
+
+
+def is_challenge_page(html: Optional[str]) -> bool:
+    """Cloudflare interstitial/error page instead of the real one.
+
+    Same signals as ``scripts/debug_verified_phrase.py``: the word
+    "cloudflare" alone shows up on normal pages too, so only the challenge
+    titles and the ``cf-chl``/``cf-error`` markup count.
+    """
+
+    if not html:
+        return False
+    m = _TITLE_RE.search(html, 0, 20000)
+    title = m.group(1).lower() if m else ""
+    if "just a moment" in title or "attention required" in title:
+        return True
+    return _CHALLENGE_MARKUP_RE.search(html) is not None
+
+
+def block_reason(status: Optional[int]) -> str:
+    """Label for a blocked response: the status if it was 403/429, otherwise a challenge page."""
+
+    return f"status_{status}" if status is not None and is_block_status(status) else "cloudflare"
+
+
+def response_html(response) -> Optional[str]:
+    """Body of an HTML ``requests`` response (e.g. a challenge page where JSON was expected), else ``None``."""
+
+    content_type = response.headers.get("Content-Type") or ""
+    return response.text if "html" in content_type.lower() else None
+
+
+class AdaptiveThrottle:
+    """AIMD pacing of request starts for one host.
+
+    Starts are spaced ``1 / rate`` seconds apart (+/- ``jitter``). Each healthy
+    response adds ``increase`` req/s, up to ``max_rate``. A block (403/429 or a
+    Cloudflare challenge page) multiplies the rate by ``decrease`` and pauses
+    the host for a jittered backoff that grows with consecutive blocks.
+    Server errors, network errors and responses ``slow_factor`` times slower
+    than the running average (and over ``slow_floor`` seconds) multiply it
+    by ``error_decrease`` instead.
+    The rate never drops below ``min_rate``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        increase: Optional[float] = None,
+        decrease: float = 0.5,
+        error_decrease: float = 0.8,
+        slow_factor: float = 3.0,
+        slow_floor: float = 1.0,
+        jitter: float = 0.25,
+        name: str = "",
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.min_rate = min(min_rate, rate) if min_rate is not None else rate / 10
+        self.max_rate = max(max_rate, rate) if max_rate is not None else rate * 4
+        self.increase = increase if increase is not None else rate / 10
+        self.decrease = decrease
+        self.error_decrease = error_decrease
+        self.slow_factor = slow_factor
+        self.slow_floor = slow_floor
+        self.jitter = jitter
+        self.name = name
+        self.outcomes: Dict[str, int] = {"ok": 0, "slow": 0, "error": 0, "blocked": 0}
+        self.latency: Optional[float] = None  # moving average of response times
+        self._consecutive_blocks = 0
+        self._next_start = 0.0
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Book the next start slot; return how many seconds to wait for it (for sync or async callers)."""
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start, self._pause_until)
+            self._next_start = start + random.uniform(1 - self.jitter, 1 + self.jitter) / self.rate
+            return start - now
+
+    def wait(self) -> float:
+        """Block until the next request may start; return the seconds waited."""
+
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def record(
+        self,
+        status: Optional[int] = None,
+        latency: Optional[float] = None,
+        html: Optional[str] = None,
+        error: bool = False,
+    ) -> str:
+        """Feed back one response; return its outcome: "ok", "slow", "error" or "blocked"."""
+
+        if (status is not None and is_block_status(status)) or is_challenge_page(html):
+            outcome = "blocked"
+        elif error or (status is not None and status >= 500):
+            outcome = "error"
+        elif (
+            latency is not None
+            and self.latency is not None
+            and self.outcomes["ok"] + self.outcomes["slow"] >= 5
+            and latency > max(self.slow_factor * self.latency, self.slow_floor)
+        ):
+            outcome = "slow"
+        else:
+            outcome = "ok"
+
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if latency is not None and outcome in ("ok", "slow"):
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if outcome == "ok":
+                self._consecutive_blocks = 0
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            elif outcome == "blocked":
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                pause = jittered_backoff(self._consecutive_blocks, base=2.0, cap=60.0)
+                self._consecutive_blocks += 1
+                self._pause_until = max(self._pause_until, time.monotonic() + pause)
+            else:
+                self.rate = max(self.min_rate, self.rate * self.error_decrease)
+
+        default_metrics().inc("throttle", source=self.name, outcome=outcome)
+        return outcome
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "latency_s": round(self.latency, 3) if self.latency is not None else None,
+                **self.outcomes,
+            }
+
+
+class HostThrottles:
+    """One :class:`AdaptiveThrottle` per host, created on first use with the same settings."""
+
+    def __init__(self, rate: float, **kwargs) -> None:
+        self.rate = rate
+        self.kwargs = kwargs
+        self._throttles: Dict[str, AdaptiveThrottle] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> AdaptiveThrottle:
+        host = urlparse(url).netloc or url
+        with self._lock:
+            throttle = self._throttles.get(host)
+            if throttle is None:
+                throttle = self._throttles[host] = AdaptiveThrottle(self.rate, name=host, **self.kwargs)
+            return throttle
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            throttles = dict(self._throttles)
+        return {host: throttle.summary() for host, throttle in throttles.items()}
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import functools
+import json
+import re
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Province-level units (pre-2025 boundaries, which is what listings still use).
+PROVINCES: Tuple[str, ...] = (
+    "An Giang", "Bà Rịa - Vũng Tàu", "Bắc Giang", "Bắc Kạn", "Bạc Liêu", "Bắc Ninh", "Bến Tre",
+    "Bình Định", "Bình Dương", "Bình Phước", "Bình Thuận", "Cà Mau", "Cần Thơ", "Cao Bằng",
+    "Đà Nẵng", "Đắk Lắk", "Đắk Nông", "Điện Biên", "Đồng Nai", "Đồng Tháp", "Gia Lai", "Hà Giang",
+    "Hà Nam", "Hà Nội", "Hà Tĩnh", "Hải Dương", "Hải Phòng", "Hậu Giang", "Hòa Bình", "Hưng Yên",
+    "Khánh Hòa", "Kiên Giang", "Kon Tum", "Lai Châu", "Lâm Đồng", "Lạng Sơn", "Lào Cai", "Long An",
+    "Nam Định", "Nghệ An", "Ninh Bình", "Ninh Thuận", "Phú Thọ", "Phú Yên", "Quảng Bình",
+    "Quảng Nam", "Quảng Ngãi", "Quảng Ninh", "Quảng Trị", "Sóc Trăng", "Sơn La", "Tây Ninh",
+    "Thái Bình", "Thái Nguyên", "Thanh Hóa", "Thừa Thiên Huế", "Tiền Giang", "Hồ Chí Minh",
+    "Trà Vinh", "Tuyên Quang", "Vĩnh Long", "Vĩnh Phúc", "Yên Bái",
+)
+
+PROVINCE_ALIASES: Dict[str, str] = {
+    "HCM": "Hồ Chí Minh",
+    "TPHCM": "Hồ Chí Minh",
+    "TP HCM": "Hồ Chí Minh",
+    "Sài Gòn": "Hồ Chí Minh",
+    "Huế": "Thừa Thiên Huế",
+    "Bà Rịa Vũng Tàu": "Bà Rịa - Vũng Tàu",
+    "BR-VT": "Bà Rịa - Vũng Tàu",
+    "Đắc Lắc": "Đắk Lắk",
+}
+
+DISTRICTS: Dict[str, Tuple[str, ...]] = {
+    "Hồ Chí Minh": (
+        "Quận 1", "Quận 2", "Quận 3", "Quận 4", "Quận 5", "Quận 6", "Quận 7", "Quận 8", "Quận 9",
+        "Quận 10", "Quận 11", "Quận 12", "Bình Thạnh", "Phú Nhuận", "Gò Vấp", "Tân Bình", "Tân Phú",
+        "Bình Tân", "Thủ Đức", "Củ Chi", "Hóc Môn", "Bình Chánh", "Nhà Bè", "Cần Giờ",
+    ),
+    "Hà Nội": (
+        "Ba Đình", "Hoàn Kiếm", "Tây Hồ", "Long Biên", "Cầu Giấy", "Đống Đa", "Hai Bà Trưng",
+        "Hoàng Mai", "Thanh Xuân", "Nam Từ Liêm", "Bắc Từ Liêm", "Hà Đông", "Sơn Tây", "Ba Vì",
+        "Phúc Thọ", "Đan Phượng", "Hoài Đức", "Quốc Oai", "Thạch Thất", "Chương Mỹ", "Thanh Oai",
+        "Thường Tín", "Phú Xuyên", "Ứng Hòa", "Mỹ Đức", "Sóc Sơn", "Đông Anh", "Gia Lâm", "Mê Linh",
+        "Thanh Trì",
+    ),
+    "Đà Nẵng": ("Hải Châu", "Thanh Khê", "Sơn Trà", "Ngũ Hành Sơn", "Liên Chiểu", "Cẩm Lệ", "Hòa Vang", "Hoàng Sa"),
+    "Bình Dương": (
+        "Thủ Dầu Một", "Dĩ An", "Thuận An", "Bến Cát", "Tân Uyên", "Bàu Bàng", "Bắc Tân Uyên", "Dầu Tiếng",
+        "Phú Giáo",
+    ),
+    "Đồng Nai": (
+        "Biên Hòa", "Long Khánh", "Long Thành", "Nhơn Trạch", "Trảng Bom", "Thống Nhất", "Vĩnh Cửu",
+        "Định Quán", "Tân Phú", "Xuân Lộc", "Cẩm Mỹ",
+    ),
+}
+
+_CITY_PREFIXES = ("thanh pho ", "tp ", "tinh ")
+_DISTRICT_PREFIXES = ("quan ", "huyen ", "thi xa ", "tx ", "thanh pho ", "tp ", "q ")
+_WARD_PREFIXES = ("phuong ", "xa ", "thi tran ", "tt ", "p ")
+_SHORT_NUMBERED_RE = re.compile(r"^([qp])\s*(\d+)$")  # "Q7", "Q.7", "P4", "P.4"
+_WS_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=4096)
+def _key(text: str) -> str:
+    # Accent-, case- and punctuation-insensitive key: "Q.Phú Nhuận" -> "q phu nhuan".
+    folded = unicodedata.normalize("NFKD", text)
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch)).lower().replace("đ", "d")
+    folded = re.sub(r"[.\-_/]", " ", folded)
+    return _WS_RE.sub(" ", folded).strip()
+
+
+def _strip_prefix(key: str, prefixes: Iterable[str]) -> Tuple[Optional[str], str]:
+    for prefix in prefixes:
+        if key.startswith(prefix):
+            return prefix.strip(), key[len(prefix):].strip()
+    return None, key
+
+
+class Location(NamedTuple):
+    street: Optional[str]
+    ward: Optional[str]
+    district: Optional[str]
+    city: Optional[str]
+
+
+class Gazetteer:
+    """Index of province and district names keyed by their accent-free lowercase form."""
+
+    def __init__(
+        self,
+        provinces: Iterable[str] = PROVINCES,
+        districts: Optional[Dict[str, Iterable[str]]] = None,
+        aliases: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.cities: Dict[str, str] = {}
+        self.districts: Dict[str, Dict[str, str]] = {}
+        for name in provinces:
+            self.cities[_key(name)] = name
+        for alias, name in (PROVINCE_ALIASES if aliases is None else aliases).items():
+            self.cities[_key(alias)] = name
+        for city, names in (DISTRICTS if districts is None else districts).items():
+            self.add_districts(city, names)
+
+    @classmethod
+    def from_json(cls, path: str | Path) -> "Gazetteer":
+        """Extend the built-in index with ``{"districts": {city: [names]}, "aliases": {alias: city}}``."""
+
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        gazetteer = cls()
+        for alias, name in (data.get("aliases") or {}).items():
+            gazetteer.cities[_key(alias)] = name
+        for city, names in (data.get("districts") or {}).items():
+            gazetteer.cities.setdefault(_key(city), city)
+            gazetteer.add_districts(city, names)
+        return gazetteer
+
+    def add_districts(self, city: str, names: Iterable[str]) -> None:
+        index = self.districts.setdefault(city, {})
+        for name in names:
+            key = _key(name)
+            index[key] = name
+            # "Quận 7" is also written "Q7"; named districts also appear as "Quận Phú Nhuận".
+            prefix, rest = _strip_prefix(key, _DISTRICT_PREFIXES)
+            if prefix and rest.isdigit():
+                index[f"q {rest}"] = name
+            elif prefix is None:
+                index[f"quan {key}"] = name
+
+    def city(self, key: str) -> Optional[str]:
+        if key in self.cities:
+            return self.cities[key]
+        _, rest = _strip_prefix(key, _CITY_PREFIXES)
+        return self.cities.get(rest)
+
+    def district_cities(self, key: str, city: Optional[str] = None) -> List[str]:
+        """Cities that have a district called ``key``; only ``city`` itself if it has one."""
+
+        _, rest = _strip_prefix(key, _DISTRICT_PREFIXES)
+        if city in self.districts and (key in self.districts[city] or rest in self.districts[city]):
+            return [city]
+        return [name for name, index in self.districts.items() if key in index or rest in index]
+
+
+class LocationResolver:
+    """Split a Vietnamese address into (street, ward, district, city) in one right-to-left pass.
+
+    Parts are matched against the :class:`Gazetteer` (cities, then districts of
+    the city found) and the usual ward/district prefixes ("Phường", "P.",
+    "Quận", "Huyện", ...). Whatever is left on the left is the street. The city
+    is always the gazetteer's canonical name, whether it was written in the
+    address or inferred from the district.
+    Results are cached per raw address string, and addresses that stay
+    without a district or city are counted in :meth:`stats`.
+    """
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None, cache_size: int = 65536, keep_unresolved: int = 1000) -> None:
+        self.gazetteer = gazetteer or Gazetteer()
+        self.keep_unresolved = keep_unresolved
+        self.calls = 0
+        self.missing: Counter = Counter()
+        self.unresolved: Counter = Counter()
+        self._lock = threading.Lock()
+        self._resolve_cached = functools.lru_cache(maxsize=cache_size)(self._resolve)
+
+    def resolve(self, address: Optional[str]) -> Location:
+        if not address:
+            return Location(None, None, None, None)
+        location = self._resolve_cached(address)
+        with self._lock:
+            self.calls += 1
+            gaps = [field for field in ("ward", "district", "city") if getattr(location, field) is None]
+            for field in gaps:
+                self.missing[field] += 1
+            if location.district is None or location.city is None:
+                if address in self.unresolved or len(self.unresolved) < self.keep_unresolved:
+                    self.unresolved[address] += 1
+        return location
+
+    __call__ = resolve
+
+    def _resolve(self, address: str) -> Location:
+        parts = [_WS_RE.sub(" ", part).strip() for part in str(address).split(",")]
+        parts = [part for part in parts if part]
+        ward = district = city = None
+        city_name = None
+        city_at = district_at = -1
+        rest = parts
+        # Right to left: city, then district, then ward, each at most once and in that order.
+        for index in range(len(parts) - 1, -1, -1):
+            part = parts[index]
+            key = _key(part)
+            m = _SHORT_NUMBERED_RE.match(key)
+            if m:
+                key = f"{'quan' if m.group(1) == 'q' else 'phuong'} {m.group(2)}"
+            if city is None and district is None and ward is None:
+                city_name = self.gazetteer.city(key)
+                if city_name:
+                    # The gazetteer name, not the raw part: "TP. HCM" and "Tp Hồ Chí Minh" group together.
+                    city = city_name
+                    city_at = index
+                    continue
+            if district is None and ward is None:
+                district_cities = self.gazetteer.district_cities(key, city_name)
+                # Below a province, "Thành phố Tân An" / "TP Nha Trang" is a district-level city.
+                prefixes = _DISTRICT_PREFIXES[:6] if city_name else _DISTRICT_PREFIXES[:4]
+                if district_cities or _strip_prefix(key, prefixes)[0]:
+                    district = part
+                    district_at = index
+                    if city is None and len(district_cities) == 1:
+                        # "Quận Phú Nhuận" without a city part can only be in HCMC.
+                        city = district_cities[0]
+                    continue
+            if ward is None and _strip_prefix(key, _WARD_PREFIXES)[0]:
+                ward = part
+                continue
+            if district is None and ward is None and (
+                index == city_at - 1 or (index > 0 and _strip_prefix(_key(parts[index - 1]), _WARD_PREFIXES)[0])
+            ):
+                # Positional fallback for districts the gazetteer does not list: the unprefixed part
+                # right before the city ("Nha Trang, Khánh Hòa") or right after a prefixed ward.
+                district = part
+                district_at = index
+                continue
+            rest = parts[: index + 1]
+            break
+        else:
+            rest = []
+
+        if ward is None and district is not None and len(rest) >= 2 and district_at == len(rest):
+            # "Street, <unprefixed ward>, District": the part right before the district is the ward.
+            ward = rest[-1]
+            rest = rest[:-1]
+        elif city is None and district is None and ward is None and len(rest) >= 3:
+            # Nothing recognised: fall back to the positional "street, ward, district" layout.
+            street_parts, ward, district = rest[:-2], rest[-2], rest[-1]
+            rest = street_parts
+        street = ", ".join(rest) or None
+        return Location(street, ward, district, city)
+
+    def stats(self, top: int = 10) -> Dict[str, object]:
+        info = self._resolve_cached.cache_info()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "cache_hits": info.hits,
+                "cache_size": info.currsize,
+                "missing_ward": self.missing["ward"],
+                "missing_district": self.missing["district"],
+                "missing_city": self.missing["city"],
+                "top_unresolved": self.unresolved.most_common(top),
+            }
+
+
+_DEFAULT_RESOLVER: Optional[LocationResolver] = None
+
+
+def default_resolver() -> LocationResolver:
+    global _DEFAULT_RESOLVER
+    if _DEFAULT_RESOLVER is None:
+        _DEFAULT_RESOLVER = LocationResolver()
+    return _DEFAULT_RESOLVER
+
+
+def resolve_location(address: Optional[str]) -> Location:
+    return default_resolver().resolve(address)